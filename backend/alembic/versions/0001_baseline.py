@@ -0,0 +1,59 @@
+"""Baseline schema
+
+The receipts and receipt_items tables as the app created them with Base.metadata.create_all
+before background ingestion and the OCR cache. Databases created that way are brought under
+migration with `alembic stamp 0001`; app.migrations.upgrade_database does this itself.
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'receipts',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('filename', sa.String(), nullable=False),
+        sa.Column('file_path', sa.String(), nullable=False),
+        sa.Column('total_amount', sa.Float(), nullable=True),
+        sa.Column('merchant_name', sa.String(), nullable=True),
+        sa.Column('purchase_date', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('raw_text', sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_receipts_id', 'receipts', ['id'], unique=False)
+
+    op.create_table(
+        'receipt_items',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('receipt_id', sa.Integer(), nullable=False),
+        sa.Column('item_name', sa.String(), nullable=False),
+        sa.Column('quantity', sa.Float(), nullable=True),
+        sa.Column('unit_price', sa.Float(), nullable=False),
+        sa.Column('total_price', sa.Float(), nullable=False),
+        sa.Column('category', sa.String(), nullable=True),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.ForeignKeyConstraint(['receipt_id'], ['receipts.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_receipt_items_id', 'receipt_items', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_receipt_items_id', table_name='receipt_items')
+    op.drop_table('receipt_items')
+    op.drop_index('ix_receipts_id', table_name='receipts')
+    op.drop_table('receipts')
@@ -0,0 +1,61 @@
+"""Background ingestion jobs and the OCR result cache
+
+Adds receipts.processing_status, the ingestion_jobs table and the ocr_cache table.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 09:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'receipts',
+        sa.Column('processing_status', sa.String(), server_default='completed', nullable=False)
+    )
+
+    op.create_table(
+        'ingestion_jobs',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('receipt_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('content_hash', sa.String(length=64), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('stage_timings', sa.JSON(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['receipt_id'], ['receipts.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+    op.create_table(
+        'ocr_cache',
+        sa.Column('content_hash', sa.String(length=64), nullable=False),
+        sa.Column('pipeline_version', sa.String(), nullable=False),
+        sa.Column('raw_text', sa.Text(), nullable=True),
+        sa.Column('result', sa.JSON(), nullable=False),
+        sa.Column('hit_count', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column('last_used_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.PrimaryKeyConstraint('content_hash')
+    )
+    op.create_index('ix_ocr_cache_last_used_at', 'ocr_cache', ['last_used_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_ocr_cache_last_used_at', table_name='ocr_cache')
+    op.drop_table('ocr_cache')
+    op.drop_table('ingestion_jobs')
+    with op.batch_alter_table('receipts') as batch_op:
+        batch_op.drop_column('processing_status')
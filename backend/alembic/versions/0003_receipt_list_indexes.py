@@ -0,0 +1,37 @@
+"""Indexes for listing and filtering receipts
+
+Covers the keyset order of the receipt list, the merchant and purchase date filters,
+and loading or filtering items per receipt. The (receipt_id, category, total_price)
+index also serves per-category sums without reading the items table.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 09:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_receipts_created_at_id', 'receipts', ['created_at', 'id'], unique=False)
+    op.create_index('ix_receipts_merchant_name', 'receipts', ['merchant_name'], unique=False)
+    op.create_index('ix_receipts_purchase_date', 'receipts', ['purchase_date'], unique=False)
+    op.create_index(
+        'ix_receipt_items_receipt_id_category_total_price', 'receipt_items',
+        ['receipt_id', 'category', 'total_price'], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_receipt_items_receipt_id_category_total_price', table_name='receipt_items')
+    op.drop_index('ix_receipts_purchase_date', table_name='receipts')
+    op.drop_index('ix_receipts_merchant_name', table_name='receipts')
+    op.drop_index('ix_receipts_created_at_id', table_name='receipts')
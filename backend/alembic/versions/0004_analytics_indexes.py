@@ -0,0 +1,32 @@
+"""Indexes for the analytics queries
+
+(created_at, total_amount) lets spending totals and monthly sums over a date range
+be read from the index alone; category covers per-category lookups of items.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 09:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_receipts_created_at_total_amount', 'receipts',
+        ['created_at', 'total_amount'], unique=False
+    )
+    op.create_index('ix_receipt_items_category', 'receipt_items', ['category'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_receipt_items_category', table_name='receipt_items')
+    op.drop_index('ix_receipts_created_at_total_amount', table_name='receipts')
@@ -0,0 +1,80 @@
+"""Daily spending rollup tables
+
+Per-day receipt totals and per-day, per-category item totals that the analytics
+endpoints read instead of aggregating the whole history. The write paths keep them
+current (app.services.spending_rollups); this migration backfills existing receipts.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    spend = op.create_table(
+        'daily_spend_rollups',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('receipt_count', sa.Integer(), nullable=False),
+        sa.Column('total_amount', sa.Float(), nullable=False),
+        sa.Column('min_amount', sa.Float(), nullable=False),
+        sa.Column('max_amount', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('day')
+    )
+    category = op.create_table(
+        'daily_category_rollups',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('category', sa.String(), nullable=False),
+        sa.Column('item_count', sa.Integer(), nullable=False),
+        sa.Column('total_amount', sa.Float(), nullable=False),
+        sa.Column('min_amount', sa.Float(), nullable=False),
+        sa.Column('max_amount', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('day', 'category')
+    )
+
+    # Backfill from the receipts already stored
+    receipts = sa.table(
+        'receipts', sa.column('id', sa.Integer), sa.column('created_at', sa.DateTime), sa.column('total_amount', sa.Float)
+    )
+    items = sa.table(
+        'receipt_items', sa.column('id', sa.Integer), sa.column('receipt_id', sa.Integer),
+        sa.column('category', sa.String), sa.column('total_price', sa.Float)
+    )
+    day = sa.func.date(receipts.c.created_at)
+    op.execute(spend.insert().from_select(
+        ['day', 'receipt_count', 'total_amount', 'min_amount', 'max_amount'],
+        sa.select(
+            day,
+            sa.func.count(receipts.c.total_amount),
+            sa.func.sum(receipts.c.total_amount),
+            sa.func.min(receipts.c.total_amount),
+            sa.func.max(receipts.c.total_amount)
+        ).where(receipts.c.total_amount.isnot(None)).group_by(day)
+    ))
+    op.execute(category.insert().from_select(
+        ['day', 'category', 'item_count', 'total_amount', 'min_amount', 'max_amount'],
+        sa.select(
+            day,
+            items.c.category,
+            sa.func.count(items.c.id),
+            sa.func.sum(items.c.total_price),
+            sa.func.min(items.c.total_price),
+            sa.func.max(items.c.total_price)
+        ).select_from(items.join(receipts, items.c.receipt_id == receipts.c.id))
+        .where(items.c.category.isnot(None))
+        .group_by(day, items.c.category)
+    ))
+
+
+def downgrade() -> None:
+    op.drop_table('daily_category_rollups')
+    op.drop_table('daily_spend_rollups')
@@ -0,0 +1,42 @@
+"""Data versions and the shared analytics response cache
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    data_versions = op.create_table(
+        'data_versions',
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('name')
+    )
+    # Receipt writes then only ever update this row
+    op.bulk_insert(data_versions, [{'name': 'receipts', 'version': 0}])
+
+    op.create_table(
+        'analytics_cache',
+        sa.Column('cache_key', sa.String(), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('cache_key')
+    )
+    op.create_index('ix_analytics_cache_expires_at', 'analytics_cache', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_analytics_cache_expires_at', table_name='analytics_cache')
+    op.drop_table('analytics_cache')
+    op.drop_table('data_versions')
@@ -0,0 +1,48 @@
+"""Receipt updated_at index, deletion log and export watermarks
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # updated_at used to stay NULL until the first edit; incremental exports order by it
+    op.execute("UPDATE receipts SET updated_at = created_at WHERE updated_at IS NULL")
+    op.create_index('ix_receipts_updated_at_id', 'receipts', ['updated_at', 'id'], unique=False)
+
+    op.create_table(
+        'receipt_deletions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('receipt_id', sa.Integer(), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_receipt_deletions_deleted_at', 'receipt_deletions', ['deleted_at'], unique=False)
+
+    op.create_table(
+        'export_watermarks',
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('receipt_id', sa.Integer(), nullable=False),
+        sa.Column('deletion_id', sa.Integer(), nullable=False),
+        sa.Column('exported_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('export_watermarks')
+    op.drop_index('ix_receipt_deletions_deleted_at', table_name='receipt_deletions')
+    op.drop_table('receipt_deletions')
+    op.drop_index('ix_receipts_updated_at_id', table_name='receipts')
@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from datetime import datetime
+
+from ..database import get_async_db
+from ..services.receipt_export import EXPORT_ENCODERS, stream_export
+
+router = APIRouter()
+
+@router.get("")
+async def export_receipts(
+    format: str = Query("csv", description="'csv', 'jsonl' or 'json'"),
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Stream receipts and their items as a download, without holding the export in memory"""
+    encoder_class = EXPORT_ENCODERS.get(format)
+    if encoder_class is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid export format. Use one of: {', '.join(EXPORT_ENCODERS)}"
+        )
+    
+    encoder = encoder_class(start_date, end_date)
+    filename = f"receipts_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{format}"
+    # The session dependency stays open until the response body has been sent
+    return StreamingResponse(
+        stream_export(db, encoder),
+        media_type=encoder.media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
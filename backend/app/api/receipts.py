@@ -1,30 +1,47 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from typing import Dict, List, Optional
 import os
 import shutil
+import time
 from datetime import datetime
 import uuid
 
-from ..database import get_db
-from ..models.receipt import Receipt, ReceiptItem
-from ..schemas.receipt import ReceiptResponse, ReceiptCreate, ReceiptUpdate, ReceiptItemCreate
-from ..services.ocr_service import OCRService
-from ..services.categorization_service import CategorizationService
+from ..database import get_async_db
+from ..models.receipt import Receipt, ReceiptItem, utcnow
+from ..models.receipt_deletion import ReceiptDeletion
+from ..models.ingestion_job import IngestionJob
+from ..schemas.receipt import ReceiptResponse, ReceiptCreate, ReceiptUpdate, ReceiptItemCreate, ReceiptPage, IngestionJobResponse
+from ..services.ingestion_queue import ingestion_queue
+from ..services.ocr_cache import ocr_cache
+from ..services.ocr_executor import ocr_executor
+from ..services.receipt_pipeline import process_receipt_file
+from ..services.receipt_queries import RECEIPT_ORDER, InvalidCursor, after_cursor, encode_cursor, filter_receipts
+from ..services.receipt_store import create_receipt, replace_items
+from ..services.spending_rollups import refresh_receipt_rollups
+from ..services.data_version import bump_data_version
+from ..services.upload_storage import store_upload, UploadTooLarge
 
 router = APIRouter()
 
-# Initialize services
-ocr_service = OCRService()
-categorization_service = CategorizationService()
+# Default upload mode: "sync" processes the receipt in the request, "job" returns 202 and processes it in the background
+UPLOAD_MODE = os.getenv("UPLOAD_MODE", "sync")
 
-@router.post("/upload", response_model=ReceiptResponse)
+@router.post("/upload", response_model=ReceiptResponse, responses={202: {"model": IngestionJobResponse}})
 async def upload_receipt(
     file: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    mode: str = Query(UPLOAD_MODE, description="'sync' to process now, 'job' to process in the background"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Upload and process a receipt image"""
     
+    if mode not in ("sync", "job"):
+        raise HTTPException(status_code=400, detail="Invalid upload mode. Use 'sync' or 'job'.")
+    
     # Validate file type
     allowed_extensions = {'jpg', 'jpeg', 'png', 'pdf'}
     file_extension = file.filename.split('.')[-1].lower() if '.' in file.filename else ''
@@ -35,63 +52,49 @@ async def upload_receipt(
             detail=f"File type not supported. Allowed types: {', '.join(allowed_extensions)}"
         )
     
-    # Validate file size (10MB max)
-    max_size = 10 * 1024 * 1024  # 10MB
-    file_content = await file.read()
-    if len(file_content) > max_size:
+    # The request body was capped while it was received (see UploadSizeLimitMiddleware) and
+    # spooled by Starlette; copy it into the upload folder, hashing it and checking the 10MB limit
+    store_start = time.perf_counter()
+    try:
+        stored = await store_upload(file, file_extension)
+    except UploadTooLarge:
         raise HTTPException(status_code=400, detail="File too large. Maximum size is 10MB.")
+    file_path = stored.file_path
     
     try:
-        # Create uploads directory if it doesn't exist
-        upload_dir = "uploads"
-        os.makedirs(upload_dir, exist_ok=True)
-        
-        # Generate unique filename
-        file_extension = file.filename.split('.')[-1].lower()
-        unique_filename = f"{uuid.uuid4()}.{file_extension}"
-        file_path = os.path.join(upload_dir, unique_filename)
-        
-        # Save file
-        with open(file_path, "wb") as buffer:
-            buffer.write(file_content)
-        
-        # Process with OCR
-        receipt_data = ocr_service.extract_receipt_data(file_content)
-        
-        # Categorize items
-        categorized_data = categorization_service.categorize_receipt(receipt_data)
-        
-        # Create receipt record
-        db_receipt = Receipt(
-            filename=file.filename,
-            file_path=file_path,
-            total_amount=categorized_data.get("total_amount"),
-            merchant_name=categorized_data.get("merchant_name"),
-            purchase_date=datetime.fromisoformat(categorized_data.get("purchase_date")) if categorized_data.get("purchase_date") else None,
-            raw_text=categorized_data.get("raw_text")
-        )
-        
-        db.add(db_receipt)
-        db.commit()
-        db.refresh(db_receipt)
-        
-        # Create receipt items
-        for item_data in categorized_data.get("items", []):
-            db_item = ReceiptItem(
-                receipt_id=db_receipt.id,
-                item_name=item_data["item_name"],
-                quantity=item_data["quantity"],
-                unit_price=item_data["unit_price"],
-                total_price=item_data["total_price"],
-                category=item_data["category"],
-                description=item_data.get("description")
+        if mode == "job":
+            # Create a pending receipt and let the ingestion queue finish it
+            db_receipt = Receipt(
+                filename=file.filename,
+                file_path=file_path,
+                processing_status="pending"
+            )
+            job = IngestionJob(
+                id=uuid.uuid4().hex,
+                receipt=db_receipt,
+                status="pending",
+                content_hash=stored.content_hash,
+                stage_timings={"store": round((time.perf_counter() - store_start) * 1000, 2)}
             )
-            db.add(db_item)
+            db.add(job)
+            await db.run_sync(bump_data_version)
+            await db.commit()
+            await db.refresh(job)
+            
+            ingestion_queue.enqueue(job.id)
+            return JSONResponse(
+                status_code=202,
+                content=jsonable_encoder(IngestionJobResponse.model_validate(job))
+            )
+        
+        # Process with OCR (or reuse the cached result for this file) and categorize items
+        categorized_data = await process_receipt_file(db, file_path, stored.content_hash)
         
-        db.commit()
-        db.refresh(db_receipt)
+        # Write the receipt and all of its items in one transaction
+        response = await db.run_sync(save_processed_receipt, file.filename, file_path, categorized_data)
+        await db.commit()
         
-        return db_receipt
+        return response
         
     except Exception as e:
         # Clean up uploaded file if processing failed
@@ -103,19 +106,78 @@ async def upload_receipt(
 async def get_receipts(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    merchant: Optional[str] = None,
+    category: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get receipts with skip/limit pagination (compatibility mode; prefer /page for deep pages)"""
+    query = filter_receipts(select(Receipt), start_date, end_date, merchant, category)
+    # Load every page's items in one IN query rather than one query per receipt
+    receipts = await db.scalars(
+        query.options(selectinload(Receipt.items))
+        .order_by(*RECEIPT_ORDER)
+        .offset(skip)
+        .limit(limit)
+    )
+    return receipts.all()
+
+@router.get("/page", response_model=ReceiptPage)
+async def get_receipt_page(
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(50, ge=1, le=500),
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    merchant: Optional[str] = None,
+    category: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get receipts newest first with cursor pagination; cost does not grow with page depth"""
+    query = filter_receipts(select(Receipt), start_date, end_date, merchant, category)
+    if cursor:
+        try:
+            query = after_cursor(query, db, cursor)
+        except InvalidCursor as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    # Fetch one extra row to learn whether another page follows
+    receipts = (await db.scalars(
+        query.options(selectinload(Receipt.items))
+        .order_by(*RECEIPT_ORDER)
+        .limit(limit + 1)
+    )).all()
+    next_cursor = encode_cursor(receipts[limit - 1]) if len(receipts) > limit else None
+    return ReceiptPage(items=receipts[:limit], next_cursor=next_cursor)
+
+@router.get("/ocr-cache/stats")
+async def get_ocr_cache_stats(db: AsyncSession = Depends(get_async_db)):
+    """Get OCR cache size and hit/miss counters for this worker"""
+    return await db.run_sync(ocr_cache.stats)
+
+@router.get("/categorization-cache/stats")
+async def get_categorization_cache_stats():
+    """Get categorization cache size and hit/miss counters of an OCR worker process"""
+    return await ocr_executor.categorization_cache_info()
+
+@router.get("/jobs/{job_id}", response_model=IngestionJobResponse)
+async def get_ingestion_job(
+    job_id: str,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get all receipts with pagination"""
-    receipts = db.query(Receipt).offset(skip).limit(limit).all()
-    return receipts
+    """Get the status and stage timings of an ingestion job"""
+    job = await db.get(IngestionJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Ingestion job not found")
+    return job
 
 @router.get("/{receipt_id}", response_model=ReceiptResponse)
 async def get_receipt(
     receipt_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get a specific receipt by ID"""
-    receipt = db.query(Receipt).filter(Receipt.id == receipt_id).first()
+    receipt = await db.scalar(select(Receipt).options(selectinload(Receipt.items)).where(Receipt.id == receipt_id))
     if not receipt:
         raise HTTPException(status_code=404, detail="Receipt not found")
     return receipt
@@ -124,9 +186,46 @@ async def get_receipt(
 async def update_receipt(
     receipt_id: int,
     receipt_update: ReceiptUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update a receipt"""
+    response = await db.run_sync(apply_receipt_update, receipt_id, receipt_update)
+    await db.commit()
+    return response
+
+@router.delete("/{receipt_id}")
+async def delete_receipt(
+    receipt_id: int,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Delete a receipt and its associated file"""
+    await db.run_sync(remove_receipt, receipt_id)
+    await db.commit()
+    
+    return {"message": "Receipt deleted successfully"}
+
+# The writes below reuse the sync receipt services; the endpoints run them through
+# AsyncSession.run_sync, which drives the same session without blocking the event loop
+
+def save_processed_receipt(db: Session, filename: str, file_path: str, categorized_data: Dict) -> ReceiptResponse:
+    """Add a processed receipt and its items, and update the rollups, without committing"""
+    db_receipt = create_receipt(
+        db,
+        categorized_data.get("items", []),
+        filename=filename,
+        file_path=file_path,
+        total_amount=categorized_data.get("total_amount"),
+        merchant_name=categorized_data.get("merchant_name"),
+        purchase_date=datetime.fromisoformat(categorized_data.get("purchase_date")) if categorized_data.get("purchase_date") else None,
+        raw_text=categorized_data.get("raw_text")
+    )
+    refresh_receipt_rollups(db, [db_receipt])
+    bump_data_version(db)
+    # Serialize before committing; the commit would expire what RETURNING loaded
+    return ReceiptResponse.model_validate(db_receipt)
+
+def apply_receipt_update(db: Session, receipt_id: int, receipt_update: ReceiptUpdate) -> ReceiptResponse:
+    """Apply an update and its rollup refresh without committing"""
     receipt = db.query(Receipt).filter(Receipt.id == receipt_id).first()
     if not receipt:
         raise HTTPException(status_code=404, detail="Receipt not found")
@@ -139,34 +238,20 @@ async def update_receipt(
     if receipt_update.purchase_date is not None:
         receipt.purchase_date = receipt_update.purchase_date
     
-    # Update items if provided
+    # Replace items if provided, in the same transaction as the field changes
     if receipt_update.items is not None:
-        # Delete existing items
-        db.query(ReceiptItem).filter(ReceiptItem.receipt_id == receipt_id).delete()
-        
-        # Add new items
-        for item_data in receipt_update.items:
-            db_item = ReceiptItem(
-                receipt_id=receipt_id,
-                item_name=item_data.item_name,
-                quantity=item_data.quantity,
-                unit_price=item_data.unit_price,
-                total_price=item_data.total_price,
-                category=item_data.category,
-                description=item_data.description
-            )
-            db.add(db_item)
+        replace_items(db, receipt, receipt_update.items)
+    # Item-only edits leave the receipt row untouched; incremental exports still need to see them
+    receipt.updated_at = utcnow()
+    refresh_receipt_rollups(db, [receipt])
+    bump_data_version(db)
     
-    db.commit()
+    db.flush()
     db.refresh(receipt)
-    return receipt
+    return ReceiptResponse.model_validate(receipt)
 
-@router.delete("/{receipt_id}")
-async def delete_receipt(
-    receipt_id: int,
-    db: Session = Depends(get_db)
-):
-    """Delete a receipt and its associated file"""
+def remove_receipt(db: Session, receipt_id: int):
+    """Delete a receipt, its file and its rollup contribution without committing"""
     receipt = db.query(Receipt).filter(Receipt.id == receipt_id).first()
     if not receipt:
         raise HTTPException(status_code=404, detail="Receipt not found")
@@ -177,6 +262,7 @@ async def delete_receipt(
     
     # Delete from database (items will be deleted due to cascade)
     db.delete(receipt)
-    db.commit()
-    
-    return {"message": "Receipt deleted successfully"}
+    # Incremental exports emit a tombstone for it
+    db.add(ReceiptDeletion(receipt_id=receipt.id))
+    refresh_receipt_rollups(db, [receipt])
+    bump_data_version(db)
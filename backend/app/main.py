@@ -1,25 +1,41 @@
 from fastapi import FastAPI, HTTPException, Depends, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
 from sqlalchemy.orm import Session
 import os
+from contextlib import asynccontextmanager
 from typing import List
 import uvicorn
 
-from .database import get_db, engine
-from .models import Base, Receipt, ReceiptItem
+from .database import get_db, async_engine, async_pool_monitor, pool_monitor
+from .models import Receipt, ReceiptItem
 from .schemas import ReceiptResponse, ReceiptCreate, ReceiptItemResponse, AnalyticsResponse
 from .services.ocr_service import OCRService
 from .services.categorization_service import CategorizationService
-from .api import receipts, analytics
+from .services.ocr_executor import ocr_executor
+from .services.ingestion_queue import ingestion_queue
+from .services.upload_storage import MAX_FILE_SIZE
+from .api import receipts, analytics, export
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# The schema is managed by Alembic: run `alembic upgrade head` (or scripts/init_db.py) before starting
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Start OCR worker processes before serving and drain them on shutdown
+    ocr_executor.start()
+    await ingestion_queue.start()
+    yield
+    await ingestion_queue.shutdown()
+    ocr_executor.shutdown()
+    await async_engine.dispose()
 
 app = FastAPI(
     title="Scan&Track API",
     description="Receipt management and expense tracking API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -31,12 +47,58 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Allowance for multipart boundaries and headers on top of the file itself
+MULTIPART_OVERHEAD = 64 * 1024
+# Only receipt uploads are held to the file size limit
+UPLOAD_PATH = "/api/receipts/upload"
+UPLOAD_TOO_LARGE = "File too large. Maximum size is 10MB."
+
+class UploadSizeLimitMiddleware:
+    """Cap the request body of receipt uploads before Starlette spools it for the form parser
+
+    A declared Content-Length over the limit is refused before any of the body is read.
+    Bodies without one (chunked transfer encoding) are counted as they are received, and
+    the upload is refused as soon as the count passes the limit.
+    """
+
+    def __init__(self, app, max_body_size: int = MAX_FILE_SIZE + MULTIPART_OVERHEAD):
+        self.app = app
+        self.max_body_size = max_body_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] != UPLOAD_PATH:
+            await self.app(scope, receive, send)
+            return
+
+        content_length = Headers(scope=scope).get("content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > self.max_body_size:
+            response = JSONResponse(status_code=400, content={"detail": UPLOAD_TOO_LARGE})
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def receive_limited():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_size:
+                    # Passed through the body parser as-is and rendered by the exception handler
+                    raise HTTPException(status_code=400, detail=UPLOAD_TOO_LARGE)
+            return message
+
+        await self.app(scope, receive_limited, send)
+
+app.add_middleware(UploadSizeLimitMiddleware)
+
 # Mount static files for uploaded images
 app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
 
 # Include API routers
 app.include_router(receipts.router, prefix="/api/receipts", tags=["receipts"])
 app.include_router(analytics.router, prefix="/api/analytics", tags=["analytics"])
+app.include_router(export.router, prefix="/api/export", tags=["export"])
 
 @app.get("/")
 async def root():
@@ -46,5 +108,10 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/health/db")
+async def database_pool_stats():
+    """Connection pool usage: the async pool serves requests, the sync pool the ingestion workers"""
+    return {"async": async_pool_monitor.stats(), "sync": pool_monitor.stats()}
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,41 @@
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+from sqlalchemy.engine import Engine
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Schema that Base.metadata.create_all produced before the migration history existed
+BASELINE_REVISION = "0001"
+
+def alembic_config(connection=None) -> Config:
+    """Alembic config for backend/alembic, independent of the working directory
+
+    With a connection, migrations run on it instead of on DATABASE_URL.
+    """
+    config = Config(str(BACKEND_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BACKEND_DIR / "alembic"))
+    if connection is not None:
+        config.attributes["connection"] = connection
+    return config
+
+def upgrade_database(engine: Engine, revision: str = "head"):
+    """Apply migrations up to revision
+
+    Databases whose tables were made by create_all have no alembic_version table;
+    they are stamped at the baseline first, then get every later migration.
+    """
+    with engine.begin() as connection:
+        config = alembic_config(connection)
+        tables = inspect(connection).get_table_names()
+        if "receipts" in tables and "alembic_version" not in tables:
+            command.stamp(config, BASELINE_REVISION)
+        command.upgrade(config, revision)
+
+if __name__ == "__main__":
+    # `python -m app.migrations`: what `alembic upgrade head` does, plus stamping create_all databases
+    from .database import engine
+
+    upgrade_database(engine)
@@ -1,4 +1,15 @@
 from .base import Base
 from .receipt import Receipt, ReceiptItem
+from .ingestion_job import IngestionJob
+from .ocr_cache import OCRCacheEntry
+from .spending_rollup import DailySpendRollup, DailyCategoryRollup
+from .data_version import DataVersion
+from .analytics_cache import AnalyticsCacheEntry
+from .receipt_deletion import ReceiptDeletion
+from .export_watermark import ExportWatermark
 
-__all__ = ["Base", "Receipt", "ReceiptItem"]
+__all__ = [
+    "Base", "Receipt", "ReceiptItem", "IngestionJob", "OCRCacheEntry",
+    "DailySpendRollup", "DailyCategoryRollup", "DataVersion", "AnalyticsCacheEntry",
+    "ReceiptDeletion", "ExportWatermark"
+]
@@ -0,0 +1,9 @@
+from sqlalchemy import Column, String, DateTime, JSON
+from .base import Base
+
+class AnalyticsCacheEntry(Base):
+    __tablename__ = "analytics_cache"
+
+    cache_key = Column(String, primary_key=True)  # endpoint, parameters and data version
+    payload = Column(JSON, nullable=False)  # JSON-encoded response body
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
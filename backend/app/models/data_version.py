@@ -0,0 +1,9 @@
+from sqlalchemy import Column, Integer, String
+from .base import Base
+
+class DataVersion(Base):
+    __tablename__ = "data_versions"
+
+    # Counter bumped in the same transaction as every write to the named data set
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from .base import Base
+
+class ExportWatermark(Base):
+    __tablename__ = "export_watermarks"
+
+    # Where the named incremental export stopped: the last receipt by (updated_at, id)
+    # and the last deletion log id it emitted
+    name = Column(String, primary_key=True)
+    updated_at = Column(DateTime(timezone=True), nullable=True)
+    receipt_id = Column(Integer, nullable=False, default=0)
+    deletion_id = Column(Integer, nullable=False, default=0)
+    exported_at = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, JSON
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from .base import Base
+
+class IngestionJob(Base):
+    __tablename__ = "ingestion_jobs"
+
+    id = Column(String, primary_key=True)
+    receipt_id = Column(Integer, ForeignKey("receipts.id"), nullable=False)
+    status = Column(String, nullable=False, default="pending")  # pending, processing, completed, failed
+    content_hash = Column(String(64), nullable=True)  # SHA-256 of the stored upload
+    error = Column(Text, nullable=True)
+    stage_timings = Column(JSON, nullable=True)  # stage name -> milliseconds
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    
+    # Relationships
+    receipt = relationship("Receipt", back_populates="ingestion_jobs")
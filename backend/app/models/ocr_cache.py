@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, JSON
+from sqlalchemy.sql import func
+from .base import Base
+
+class OCRCacheEntry(Base):
+    __tablename__ = "ocr_cache"
+
+    content_hash = Column(String(64), primary_key=True)  # SHA-256 of the uploaded bytes
+    pipeline_version = Column(String, nullable=False)
+    raw_text = Column(Text, nullable=True)
+    result = Column(JSON, nullable=False)  # parsed receipt data without raw_text
+    hit_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_used_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
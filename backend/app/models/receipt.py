@@ -1,8 +1,12 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Float, Text, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
+from datetime import datetime, timezone
 from .base import Base
 
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
 class Receipt(Base):
     __tablename__ = "receipts"
 
@@ -10,14 +14,27 @@ class Receipt(Base):
     filename = Column(String, nullable=False)
     file_path = Column(String, nullable=False)
     total_amount = Column(Float, nullable=True)
-    merchant_name = Column(String, nullable=True)
-    purchase_date = Column(DateTime, nullable=True)
+    merchant_name = Column(String, nullable=True, index=True)
+    purchase_date = Column(DateTime, nullable=True, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Set from Python on insert and on every update, with microseconds, so incremental
+    # exports can resume strictly after the last (updated_at, id) they emitted
+    updated_at = Column(DateTime(timezone=True), default=utcnow, onupdate=utcnow)
     raw_text = Column(Text, nullable=True)
+    processing_status = Column(String, nullable=False, default="completed", server_default="completed")
     
     # Relationships
     items = relationship("ReceiptItem", back_populates="receipt", cascade="all, delete-orphan")
+    ingestion_jobs = relationship("IngestionJob", back_populates="receipt", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        # Keyset pagination order for the receipt list
+        Index("ix_receipts_created_at_id", "created_at", "id"),
+        # Spending totals over a created_at range, answered from the index alone
+        Index("ix_receipts_created_at_total_amount", "created_at", "total_amount"),
+        # Incremental exports read the receipts changed since their watermark
+        Index("ix_receipts_updated_at_id", "updated_at", "id"),
+    )
 
 class ReceiptItem(Base):
     __tablename__ = "receipt_items"
@@ -28,8 +45,14 @@ class ReceiptItem(Base):
     quantity = Column(Float, default=1.0)
     unit_price = Column(Float, nullable=False)
     total_price = Column(Float, nullable=False)
-    category = Column(String, nullable=True)
+    category = Column(String, nullable=True, index=True)
     description = Column(Text, nullable=True)
     
     # Relationships
     receipt = relationship("Receipt", back_populates="items")
+    
+    __table_args__ = (
+        # Item loading per receipt, the category filter on the receipt list and
+        # category sums joined from receipts, which never have to visit the table
+        Index("ix_receipt_items_receipt_id_category_total_price", "receipt_id", "category", "total_price"),
+    )
@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer, DateTime
+from .base import Base
+from .receipt import utcnow
+
+class ReceiptDeletion(Base):
+    __tablename__ = "receipt_deletions"
+
+    # One row per deleted receipt, read by incremental exports to emit tombstones
+    id = Column(Integer, primary_key=True)
+    receipt_id = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime(timezone=True), nullable=False, default=utcnow, index=True)
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, Date, Float
+from .base import Base
+
+class DailySpendRollup(Base):
+    __tablename__ = "daily_spend_rollups"
+
+    # Receipts with a total, by the date of created_at
+    day = Column(Date, primary_key=True)
+    receipt_count = Column(Integer, nullable=False)
+    total_amount = Column(Float, nullable=False)
+    min_amount = Column(Float, nullable=False)
+    max_amount = Column(Float, nullable=False)
+
+class DailyCategoryRollup(Base):
+    __tablename__ = "daily_category_rollups"
+
+    # Categorized receipt items, by the date of their receipt's created_at
+    day = Column(Date, primary_key=True)
+    category = Column(String, primary_key=True)
+    item_count = Column(Integer, nullable=False)
+    total_amount = Column(Float, nullable=False)
+    min_amount = Column(Float, nullable=False)
+    max_amount = Column(Float, nullable=False)
@@ -4,6 +4,8 @@ from .receipt import (
     ReceiptUpdate,
     ReceiptItemResponse, 
     ReceiptItemCreate,
+    ReceiptPage,
+    IngestionJobResponse,
     AnalyticsResponse
 )
 
@@ -13,5 +15,7 @@ __all__ = [
     "ReceiptUpdate",
     "ReceiptItemResponse", 
     "ReceiptItemCreate",
+    "ReceiptPage",
+    "IngestionJobResponse",
     "AnalyticsResponse"
 ]
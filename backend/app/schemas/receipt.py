@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 
 class ReceiptItemBase(BaseModel):
@@ -41,11 +41,29 @@ class ReceiptResponse(ReceiptBase):
     file_path: str
     created_at: datetime
     updated_at: Optional[datetime] = None
+    processing_status: str = "completed"
     items: List[ReceiptItemResponse] = []
     
     class Config:
         from_attributes = True
 
+class ReceiptPage(BaseModel):
+    items: List[ReceiptResponse]
+    next_cursor: Optional[str] = None
+
+class IngestionJobResponse(BaseModel):
+    id: str
+    receipt_id: int
+    status: str
+    error: Optional[str] = None
+    stage_timings: Optional[Dict[str, float]] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
 class AnalyticsResponse(BaseModel):
     total_expenses: float
     monthly_expenses: List[dict]
@@ -0,0 +1,188 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import urlencode
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..models.analytics_cache import AnalyticsCacheEntry
+from .data_version import RECEIPTS, get_data_version
+
+logger = logging.getLogger(__name__)
+
+# "memory" (per worker), "database" (shared by all workers) or "none"
+ANALYTICS_CACHE_BACKEND = os.getenv("ANALYTICS_CACHE_BACKEND", "memory")
+# Safety net for writes that do not bump the data version (manual SQL, other tools)
+ANALYTICS_CACHE_TTL = int(os.getenv("ANALYTICS_CACHE_TTL", "300"))
+ANALYTICS_CACHE_SIZE = int(os.getenv("ANALYTICS_CACHE_SIZE", "256"))
+
+# Expired database entries are purged after this many writes rather than on every write
+PURGE_EVERY = 100
+
+class MemoryCacheBackend:
+    """LRU of responses held by this worker"""
+
+    name = "memory"
+
+    def __init__(self, max_size: int = ANALYTICS_CACHE_SIZE, clock: Callable[[], float] = time.monotonic):
+        self.max_size = max_size
+        self._clock = clock
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, db: Session, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, db: Session, key: str, value: Any, ttl: int):
+        with self._lock:
+            self._entries[key] = (self._clock() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def size(self, db: Session) -> int:
+        with self._lock:
+            return len(self._entries)
+
+class DatabaseCacheBackend:
+    """Responses stored in the analytics_cache table, shared by every worker"""
+
+    name = "database"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sets = 0
+
+    @staticmethod
+    def _now() -> datetime:
+        return datetime.now(timezone.utc)
+
+    def get(self, db: Session, key: str) -> Optional[Any]:
+        return db.query(AnalyticsCacheEntry.payload).filter(
+            AnalyticsCacheEntry.cache_key == key,
+            AnalyticsCacheEntry.expires_at > self._now()
+        ).scalar()
+
+    def set(self, db: Session, key: str, value: Any, ttl: int):
+        db.query(AnalyticsCacheEntry).filter(AnalyticsCacheEntry.cache_key == key).delete(
+            synchronize_session=False
+        )
+        db.add(AnalyticsCacheEntry(cache_key=key, payload=value, expires_at=self._now() + timedelta(seconds=ttl)))
+        try:
+            db.commit()
+        except IntegrityError:
+            # Another worker stored the same response concurrently
+            db.rollback()
+            return
+
+        with self._lock:
+            self._sets += 1
+            should_purge = self._sets % PURGE_EVERY == 0
+        if should_purge:
+            self.purge(db)
+
+    def purge(self, db: Session) -> int:
+        """Drop expired entries, including those of older data versions once their TTL passes"""
+        removed = db.query(AnalyticsCacheEntry).filter(
+            AnalyticsCacheEntry.expires_at <= self._now()
+        ).delete(synchronize_session=False)
+        db.commit()
+        return removed
+
+    def size(self, db: Session) -> int:
+        return db.query(func.count(AnalyticsCacheEntry.cache_key)).scalar()
+
+def create_backend(name: str = ANALYTICS_CACHE_BACKEND, max_size: int = ANALYTICS_CACHE_SIZE):
+    """Build the backend named by ANALYTICS_CACHE_BACKEND; None disables caching"""
+    if name == "memory":
+        return MemoryCacheBackend(max_size)
+    if name == "database":
+        return DatabaseCacheBackend()
+    if name == "none":
+        return None
+    raise ValueError(f"Unknown analytics cache backend '{name}'. Use 'memory', 'database' or 'none'.")
+
+class AnalyticsCache:
+    """Response cache for the analytics endpoints
+
+    Keys include the receipts data version, which every receipt write bumps in its own
+    transaction, so a write makes all earlier responses unreachable at once.
+    """
+
+    def __init__(self, backend=None, ttl: int = ANALYTICS_CACHE_TTL, data_set: str = RECEIPTS):
+        self.backend = backend
+        self.ttl = ttl
+        self.data_set = data_set
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    def cache_key(self, endpoint: str, params: Dict, version: int) -> str:
+        return f"{endpoint}?{urlencode(sorted(params.items()))}#v{version}"
+
+    def get_or_compute(
+        self,
+        db: Session,
+        endpoint: str,
+        params: Dict,
+        compute: Callable[[], Any],
+        refresh: bool = False
+    ) -> Tuple[Any, str]:
+        """Return the JSON-ready response and how it was served: HIT, MISS, REFRESH or BYPASS
+
+        refresh recomputes and stores the response even when a cached one exists.
+        """
+        if self.backend is None:
+            return jsonable_encoder(compute()), "BYPASS"
+
+        key = self.cache_key(endpoint, params, get_data_version(db, self.data_set))
+        if not refresh:
+            cached = self.backend.get(db, key)
+            if cached is not None:
+                with self._lock:
+                    self.hits += 1
+                return cached, "HIT"
+
+        value = jsonable_encoder(compute())
+        self.backend.set(db, key, value, self.ttl)
+        with self._lock:
+            if refresh:
+                self.refreshes += 1
+            else:
+                self.misses += 1
+        return value, "REFRESH" if refresh else "MISS"
+
+    def stats(self, db: Session) -> Dict:
+        """Return hit/miss counters for this worker and the cache size"""
+        with self._lock:
+            hits, misses, refreshes = self.hits, self.misses, self.refreshes
+        lookups = hits + misses
+        return {
+            "backend": self.backend.name if self.backend is not None else "none",
+            "ttl_seconds": self.ttl,
+            "entries": self.backend.size(db) if self.backend is not None else 0,
+            "data_version": get_data_version(db, self.data_set),
+            "hits": hits,
+            "misses": misses,
+            "refreshes": refreshes,
+            "hit_ratio": hits / lookups if lookups else 0.0
+        }
+
+analytics_cache = AnalyticsCache(create_backend())
@@ -0,0 +1,109 @@
+from datetime import date, datetime, timedelta
+from typing import Dict, List
+
+from sqlalchemy import Integer, String, case, cast, extract, func, literal, null, select, tuple_, union_all
+from sqlalchemy.orm import Session, joinedload
+
+from ..models.receipt import Receipt
+from ..models.spending_rollup import DailyCategoryRollup, DailySpendRollup
+
+def window_start(months: int) -> datetime:
+    """Start of the analytics window covering the last `months` months"""
+    return datetime.now() - timedelta(days=months * 30)
+
+def _spend_parts(db: Session, start_day: date) -> List:
+    year = extract('year', DailySpendRollup.day)
+    month = extract('month', DailySpendRollup.day)
+    total = func.sum(DailySpendRollup.total_amount)
+    in_window = DailySpendRollup.day >= start_day
+
+    if db.get_bind().dialect.name == "postgresql":
+        # One pass over the window yields the per-month rows and the grand total row
+        return [
+            select(
+                case((func.grouping(year, month) == 3, literal("total")), else_=literal("month")),
+                year, month, cast(null(), String), total
+            ).where(in_window).group_by(func.grouping_sets(tuple_(year, month), tuple_()))
+        ]
+
+    # No GROUPING SETS elsewhere: the same rows from two branches of the one statement
+    return [
+        select(literal("total"), cast(null(), Integer), cast(null(), Integer), cast(null(), String), total)
+        .where(in_window),
+        select(literal("month"), year, month, cast(null(), String), total)
+        .where(in_window).group_by(year, month)
+    ]
+
+def expense_summary(db: Session, start_day: date) -> Dict:
+    """Total, monthly series and category breakdown from the rollups in a single statement"""
+    category_part = select(
+        literal("category"), cast(null(), Integer), cast(null(), Integer),
+        DailyCategoryRollup.category, func.sum(DailyCategoryRollup.total_amount)
+    ).where(DailyCategoryRollup.day >= start_day).group_by(DailyCategoryRollup.category)
+
+    total_expenses = 0.0
+    monthly_expenses = []
+    category_breakdown = []
+    for kind, year, month, category, total in db.execute(union_all(*_spend_parts(db, start_day), category_part)):
+        if kind == "total":
+            total_expenses = float(total or 0)
+        elif kind == "month":
+            monthly_expenses.append({"year": int(year), "month": int(month), "total": float(total or 0)})
+        else:
+            category_breakdown.append({"category": category, "total": float(total or 0)})
+
+    monthly_expenses.sort(key=lambda row: (row["year"], row["month"]))
+    return {
+        "total_expenses": total_expenses,
+        "monthly_expenses": monthly_expenses,
+        "category_breakdown": category_breakdown
+    }
+
+def recent_receipts(db: Session, start_date: datetime, limit: int = 10) -> List[Receipt]:
+    """Newest receipts in the window with their items, in one joined query"""
+    return db.query(Receipt).options(joinedload(Receipt.items)).filter(
+        Receipt.created_at >= start_date
+    ).order_by(Receipt.created_at.desc(), Receipt.id.desc()).limit(limit).all()
+
+def category_stats(db: Session, start_day: date) -> List[Dict]:
+    """Item count, total, average, minimum and maximum per category"""
+    rows = db.query(
+        DailyCategoryRollup.category,
+        func.sum(DailyCategoryRollup.item_count).label('item_count'),
+        func.sum(DailyCategoryRollup.total_amount).label('total_amount'),
+        func.min(DailyCategoryRollup.min_amount).label('min_amount'),
+        func.max(DailyCategoryRollup.max_amount).label('max_amount')
+    ).filter(
+        DailyCategoryRollup.day >= start_day
+    ).group_by(DailyCategoryRollup.category).all()
+
+    return [
+        {
+            "category": row.category,
+            "item_count": int(row.item_count),
+            "total_amount": float(row.total_amount or 0),
+            "avg_amount": float(row.total_amount or 0) / row.item_count if row.item_count else 0.0,
+            "min_amount": float(row.min_amount or 0),
+            "max_amount": float(row.max_amount or 0)
+        }
+        for row in rows
+    ]
+
+def monthly_category_trends(db: Session, start_day: date) -> Dict[str, Dict[str, float]]:
+    """Spending per category for each "YYYY-MM" month"""
+    year = extract('year', DailyCategoryRollup.day)
+    month = extract('month', DailyCategoryRollup.day)
+    rows = db.query(
+        year.label('year'),
+        month.label('month'),
+        DailyCategoryRollup.category,
+        func.sum(DailyCategoryRollup.total_amount).label('total')
+    ).filter(
+        DailyCategoryRollup.day >= start_day
+    ).group_by(year, month, DailyCategoryRollup.category).order_by('year', 'month').all()
+
+    monthly_trends = {}
+    for row in rows:
+        key = f"{int(row.year)}-{int(row.month):02d}"
+        monthly_trends.setdefault(key, {})[row.category] = float(row.total or 0)
+    return monthly_trends
@@ -1,11 +1,38 @@
-import re
-from typing import List, Dict, Optional
+from collections import OrderedDict
+from typing import List, Dict, Optional, Tuple
 import logging
+import os
+import threading
+
+from .keyword_automaton import KeywordAutomaton
+from .ml_categorizer import CATEGORY_MODEL_PATH, MLCategorizer
 
 logger = logging.getLogger(__name__)
 
+# Distinct (item, merchant) pairs remembered per service; 0 disables the cache
+CATEGORY_CACHE_SIZE = int(os.getenv("CATEGORY_CACHE_SIZE", "10000"))
+
 class CategorizationService:
-    def __init__(self):
+    def __init__(
+        self,
+        cache_size: int = CATEGORY_CACHE_SIZE,
+        model: Optional[MLCategorizer] = None,
+        model_path: Optional[str] = CATEGORY_MODEL_PATH
+    ):
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        # Bumped whenever rules or model change, so stale results are not cached
+        self._generation = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_evictions = 0
+        
+        # Classifies the items no rule matches; loaded once per service (and so per worker)
+        if model is None and model_path:
+            model = MLCategorizer.load(model_path)
+        self.model = model
+        
         # Define category keywords
         self.category_keywords = {
             "Food & Dining": [
@@ -42,47 +69,151 @@ class CategorizationService:
                 "reservation", "airbnb"
             ]
         }
+        
+        # Whole-word rules on the item name, tried when no keyword matches
+        self.category_patterns = {
+            "Food & Dining": [
+                "burger", "pizza", "sandwich", "salad", "soup", "pasta", "rice", "bread",
+                "meat", "chicken", "beef", "fish", "coffee", "tea", "juice", "soda", "water",
+                "beer", "wine", "alcohol", "fruit", "vegetable", "apple", "banana", "orange",
+                "tomato", "onion", "potato"
+            ],
+            "Transportation": [
+                "gas", "fuel", "petrol", "diesel", "uber", "lyft", "taxi", "bus", "train",
+                "metro", "parking", "toll", "highway", "road", "bridge", "tunnel"
+            ],
+            "Shopping": [
+                "shirt", "pants", "dress", "shoes", "hat", "jacket", "clothing", "apparel",
+                "phone", "computer", "laptop", "tablet", "electronics", "gadget", "book",
+                "magazine", "newspaper", "stationery", "pen", "pencil"
+            ],
+            "Healthcare": [
+                "medicine", "drug", "prescription", "vitamin", "supplement", "bandage",
+                "doctor", "medical", "health", "pharmacy", "clinic", "hospital"
+            ],
+            "Entertainment": [
+                "movie", "cinema", "theater", "netflix", "spotify", "music", "game", "gaming",
+                "sports", "gym", "fitness", "club", "bar", "party", "concert"
+            ],
+            "Utilities": [
+                "electric", "water", "gas", "internet", "phone", "cable", "utility", "power",
+                "heating", "cooling", "air conditioning", "ac", "heater"
+            ],
+            "Office & Business": [
+                "office", "supplies", "stationery", "pen", "pencil", "paper", "printer", "ink",
+                "meeting", "conference", "business", "professional", "work"
+            ],
+            "Travel": [
+                "hotel", "flight", "airline", "travel", "vacation", "trip", "booking",
+                "reservation", "airbnb", "hostel", "motel", "luggage", "suitcase"
+            ]
+        }
+        
+        self.reload_rules()
+    
+    def reload_rules(self):
+        """Compile category_keywords and category_patterns; call after changing either"""
+        automaton = KeywordAutomaton()
+        rank_categories = []
+        # Keyword rules outrank pattern rules, and earlier categories outrank later ones
+        for rules, whole_word in ((self.category_keywords, False), (self.category_patterns, True)):
+            for category, words in rules.items():
+                for word in words:
+                    automaton.add(word.lower(), len(rank_categories), whole_word=whole_word)
+                rank_categories.append(category)
+        automaton.build()
+        
+        with self._cache_lock:
+            self._automaton = automaton
+            self._rank_categories = rank_categories
+            # Cached categories were decided by the old rules
+            self._generation += 1
+            self._cache.clear()
+    
+    def set_model(self, model: Optional[MLCategorizer]):
+        """Swap the fallback model (None for rules only)"""
+        with self._cache_lock:
+            self.model = model
+            self._generation += 1
+            self._cache.clear()
+    
+    def cache_info(self) -> Dict:
+        """Return size and hit/miss/eviction counters of the categorization cache"""
+        with self._cache_lock:
+            size = len(self._cache)
+            hits, misses, evictions = self.cache_hits, self.cache_misses, self.cache_evictions
+        lookups = hits + misses
+        return {
+            "size": size,
+            "max_size": self.cache_size,
+            "hits": hits,
+            "misses": misses,
+            "evictions": evictions,
+            "hit_ratio": hits / lookups if lookups else 0.0
+        }
     
     def categorize_item(self, item_name: str, merchant_name: Optional[str] = None) -> str:
         """Categorize an item based on its name and merchant"""
-        text_to_analyze = f"{item_name} {merchant_name or ''}".lower()
+        return self.categorize_many([(item_name, merchant_name)])[0]
+    
+    def categorize_many(self, items: List[Tuple[str, Optional[str]]]) -> List[str]:
+        """Categorize (item_name, merchant_name) pairs, sending every item the rules
+        miss to the model in a single batch"""
+        # Matching is case-insensitive, so the lowercased pair decides the category
+        keys = [(item_name.lower(), (merchant_name or '').lower()) for item_name, merchant_name in items]
+        categories: List[Optional[str]] = [None] * len(keys)
         
-        # Check for exact keyword matches
-        for category, keywords in self.category_keywords.items():
-            for keyword in keywords:
-                if keyword.lower() in text_to_analyze:
-                    return category
+        with self._cache_lock:
+            for index, key in enumerate(keys):
+                category = self._cache.get(key)
+                if category is not None:
+                    self._cache.move_to_end(key)
+                    self.cache_hits += 1
+                    categories[index] = category
+                else:
+                    self.cache_misses += 1
+            generation = self._generation
+            automaton, rank_categories, model = self._automaton, self._rank_categories, self.model
         
-        # Use pattern matching for common item types
-        if self._is_food_item(item_name):
-            return "Food & Dining"
-        elif self._is_transportation_item(item_name):
-            return "Transportation"
-        elif self._is_shopping_item(item_name):
-            return "Shopping"
-        elif self._is_healthcare_item(item_name):
-            return "Healthcare"
-        elif self._is_entertainment_item(item_name):
-            return "Entertainment"
-        elif self._is_utility_item(item_name):
-            return "Utilities"
-        elif self._is_office_item(item_name):
-            return "Office & Business"
-        elif self._is_travel_item(item_name):
-            return "Travel"
+        unmatched = []
+        for index, (item_text, merchant_text) in enumerate(keys):
+            if categories[index] is not None:
+                continue
+            # Keywords may match anywhere in item and merchant, whole-word patterns only in the item
+            rank = automaton.best_rank(f"{item_text} {merchant_text}", word_end=len(item_text))
+            if rank is not None:
+                categories[index] = rank_categories[rank]
+            else:
+                categories[index] = "Other"
+                unmatched.append(index)
         
-        return "Other"
+        if unmatched and model is not None:
+            predictions = model.predict([keys[index] for index in unmatched])
+            for index, category in zip(unmatched, predictions):
+                categories[index] = category
+        
+        if self.cache_size > 0:
+            with self._cache_lock:
+                # Skip results computed with rules or a model that were replaced meanwhile
+                if generation == self._generation:
+                    for key, category in zip(keys, categories):
+                        self._cache[key] = category
+                        self._cache.move_to_end(key)
+                    while len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+                        self.cache_evictions += 1
+        return categories
     
     def categorize_receipt(self, receipt_data: Dict) -> Dict:
         """Categorize all items in a receipt"""
         merchant_name = receipt_data.get("merchant_name", "")
         items = receipt_data.get("items", [])
         
+        # One batch per receipt, so the model (if any) runs once
+        categories = self.categorize_many([(item.get("item_name", ""), merchant_name) for item in items])
+        
         categorized_items = []
-        for item in items:
-            item_name = item.get("item_name", "")
-            category = self.categorize_item(item_name, merchant_name)
-            
+        for item, category in zip(items, categories):
             categorized_item = item.copy()
             categorized_item["category"] = category
             categorized_items.append(categorized_item)
@@ -91,69 +222,3 @@ class CategorizationService:
             **receipt_data,
             "items": categorized_items
         }
-    
-    def _is_food_item(self, item_name: str) -> bool:
-        """Check if item is food-related"""
-        food_patterns = [
-            r'\b(burger|pizza|sandwich|salad|soup|pasta|rice|bread|meat|chicken|beef|fish)\b',
-            r'\b(coffee|tea|juice|soda|water|beer|wine|alcohol)\b',
-            r'\b(fruit|vegetable|apple|banana|orange|tomato|onion|potato)\b'
-        ]
-        return any(re.search(pattern, item_name.lower()) for pattern in food_patterns)
-    
-    def _is_transportation_item(self, item_name: str) -> bool:
-        """Check if item is transportation-related"""
-        transport_patterns = [
-            r'\b(gas|fuel|petrol|diesel|uber|lyft|taxi|bus|train|metro)\b',
-            r'\b(parking|toll|highway|road|bridge|tunnel)\b'
-        ]
-        return any(re.search(pattern, item_name.lower()) for pattern in transport_patterns)
-    
-    def _is_shopping_item(self, item_name: str) -> bool:
-        """Check if item is shopping-related"""
-        shopping_patterns = [
-            r'\b(shirt|pants|dress|shoes|hat|jacket|clothing|apparel)\b',
-            r'\b(phone|computer|laptop|tablet|electronics|gadget)\b',
-            r'\b(book|magazine|newspaper|stationery|pen|pencil)\b'
-        ]
-        return any(re.search(pattern, item_name.lower()) for pattern in shopping_patterns)
-    
-    def _is_healthcare_item(self, item_name: str) -> bool:
-        """Check if item is healthcare-related"""
-        health_patterns = [
-            r'\b(medicine|drug|prescription|vitamin|supplement|bandage)\b',
-            r'\b(doctor|medical|health|pharmacy|clinic|hospital)\b'
-        ]
-        return any(re.search(pattern, item_name.lower()) for pattern in health_patterns)
-    
-    def _is_entertainment_item(self, item_name: str) -> bool:
-        """Check if item is entertainment-related"""
-        entertainment_patterns = [
-            r'\b(movie|cinema|theater|netflix|spotify|music|game|gaming)\b',
-            r'\b(sports|gym|fitness|club|bar|party|concert)\b'
-        ]
-        return any(re.search(pattern, item_name.lower()) for pattern in entertainment_patterns)
-    
-    def _is_utility_item(self, item_name: str) -> bool:
-        """Check if item is utility-related"""
-        utility_patterns = [
-            r'\b(electric|water|gas|internet|phone|cable|utility|power)\b',
-            r'\b(heating|cooling|air conditioning|ac|heater)\b'
-        ]
-        return any(re.search(pattern, item_name.lower()) for pattern in utility_patterns)
-    
-    def _is_office_item(self, item_name: str) -> bool:
-        """Check if item is office-related"""
-        office_patterns = [
-            r'\b(office|supplies|stationery|pen|pencil|paper|printer|ink)\b',
-            r'\b(meeting|conference|business|professional|work)\b'
-        ]
-        return any(re.search(pattern, item_name.lower()) for pattern in office_patterns)
-    
-    def _is_travel_item(self, item_name: str) -> bool:
-        """Check if item is travel-related"""
-        travel_patterns = [
-            r'\b(hotel|flight|airline|travel|vacation|trip|booking)\b',
-            r'\b(reservation|airbnb|hostel|motel|luggage|suitcase)\b'
-        ]
-        return any(re.search(pattern, item_name.lower()) for pattern in travel_patterns)
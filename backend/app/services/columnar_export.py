@@ -0,0 +1,136 @@
+import os
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+from ..models.receipt import Receipt, ReceiptItem
+from .receipt_queries import RECEIPT_ORDER
+
+# Rows per Parquet row group / Arrow record batch, fetched from the database in one round trip
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "100000"))
+PARQUET_COMPRESSION = os.getenv("PARQUET_COMPRESSION", "zstd")
+
+# One row per item, as in the CSV export; receipts without items get one row with null item columns
+ITEM_ROW_COLUMNS = (
+    Receipt.id.label("receipt_id"), Receipt.filename, Receipt.merchant_name, Receipt.total_amount,
+    Receipt.purchase_date, Receipt.created_at, ReceiptItem.id.label("item_id"), ReceiptItem.item_name,
+    ReceiptItem.quantity.label("item_quantity"), ReceiptItem.unit_price.label("item_unit_price"),
+    ReceiptItem.total_price.label("item_total_price"), ReceiptItem.category.label("item_category")
+)
+
+# Columns with few distinct values, stored once per file and referenced by index
+DICTIONARY_COLUMNS = ("merchant_name", "item_category")
+
+def export_schema() -> "pa.Schema":
+    """Typed columns of the columnar export"""
+    text_dictionary = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema([
+        ("receipt_id", pa.int64()),
+        ("filename", pa.string()),
+        ("merchant_name", text_dictionary),
+        ("total_amount", pa.float64()),
+        ("purchase_date", pa.timestamp("us")),
+        ("created_at", pa.timestamp("us")),
+        ("item_id", pa.int64()),
+        ("item_name", pa.string()),
+        ("item_quantity", pa.float64()),
+        ("item_unit_price", pa.float64()),
+        ("item_total_price", pa.float64()),
+        ("item_category", text_dictionary),
+    ])
+
+def item_rows_statement(start_date: Optional[datetime] = None, end_date: Optional[datetime] = None):
+    """Receipts joined to their items in the database, filtered on the created_at index"""
+    statement = select(*ITEM_ROW_COLUMNS).outerjoin(ReceiptItem, ReceiptItem.receipt_id == Receipt.id)
+    if start_date:
+        statement = statement.where(Receipt.created_at >= start_date)
+    if end_date:
+        statement = statement.where(Receipt.created_at <= end_date)
+    return statement.order_by(*RECEIPT_ORDER, ReceiptItem.id)
+
+class GrowingDictionary:
+    """Dictionary encoding shared by every chunk of a column
+
+    Chunks only ever add values, so Arrow IPC files can carry them as dictionary deltas.
+    """
+
+    def __init__(self):
+        self.indices: Dict[str, int] = {}
+        self.values: List[str] = []
+
+    def encode(self, column: Sequence[Optional[str]]) -> "pa.DictionaryArray":
+        indices = []
+        for value in column:
+            if value is None:
+                indices.append(None)
+                continue
+            index = self.indices.get(value)
+            if index is None:
+                index = self.indices[value] = len(self.values)
+                self.values.append(value)
+            indices.append(index)
+        return pa.DictionaryArray.from_arrays(pa.array(indices, pa.int32()), pa.array(self.values, pa.string()))
+
+class ColumnarExporter:
+    """Writes the item-level export as Parquet or an Arrow IPC file, one chunk at a time
+
+    Rows are ordered by created_at, so each Parquet row group's min/max statistics cover a
+    narrow date range and readers can skip row groups, e.g.
+    pd.read_parquet(path, filters=[("created_at", ">=", start)]).
+    """
+
+    formats = ("parquet", "arrow")
+
+    def __init__(self, db: Session, chunk_rows: Optional[int] = None):
+        if not PYARROW_AVAILABLE:
+            raise RuntimeError("Parquet and Arrow export require pyarrow to be installed")
+        self.db = db
+        self.chunk_rows = chunk_rows or EXPORT_CHUNK_ROWS
+        self.schema = export_schema()
+        self.rows = 0
+
+    def _batches(self, start_date: Optional[datetime], end_date: Optional[datetime]):
+        dictionaries = {name: GrowingDictionary() for name in DICTIONARY_COLUMNS}
+        statement = item_rows_statement(start_date, end_date).execution_options(yield_per=self.chunk_rows)
+        for partition in self.db.execute(statement).partitions():
+            columns = list(zip(*partition))
+            arrays = [
+                dictionaries[field.name].encode(column) if field.name in dictionaries
+                else pa.array(column, field.type)
+                for field, column in zip(self.schema, columns)
+            ]
+            self.rows += len(partition)
+            yield pa.record_batch(arrays, schema=self.schema)
+
+    def write(
+        self,
+        output_file: str,
+        format: str = "parquet",
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> int:
+        """Write the export and return the number of rows"""
+        if format not in self.formats:
+            raise ValueError(f"Unknown columnar format '{format}'. Use 'parquet' or 'arrow'.")
+        self.rows = 0
+
+        if format == "parquet":
+            with pq.ParquetWriter(output_file, self.schema, compression=PARQUET_COMPRESSION) as writer:
+                for batch in self._batches(start_date, end_date):
+                    writer.write_batch(batch, row_group_size=self.chunk_rows)
+        else:
+            options = pa_ipc.IpcWriteOptions(emit_dictionary_deltas=True)
+            with pa_ipc.new_file(output_file, self.schema, options=options) as writer:
+                for batch in self._batches(start_date, end_date):
+                    writer.write_batch(batch)
+        return self.rows
@@ -0,0 +1,23 @@
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+
+from ..models.data_version import DataVersion
+
+# Everything derived from receipts and their items (analytics responses)
+RECEIPTS = "receipts"
+
+def get_data_version(db: Session, name: str = RECEIPTS) -> int:
+    return db.scalar(select(DataVersion.version).where(DataVersion.name == name)) or 0
+
+def bump_data_version(db: Session, name: str = RECEIPTS):
+    """Increment a data set's version without committing; call in the writing transaction
+
+    Readers only see the new version once the write commits, so nothing computed from
+    the old data can be stored under it.
+    """
+    result = db.execute(
+        update(DataVersion).where(DataVersion.name == name).values(version=DataVersion.version + 1)
+    )
+    if result.rowcount == 0:
+        # The migration creates the row; databases made by create_all start without it
+        db.execute(insert(DataVersion).values(name=name, version=1))
@@ -0,0 +1,140 @@
+from PIL import Image, ImageChops, ImageFilter, ImageOps
+import logging
+import os
+import time
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Step toggles and parameters shared by every profile unless overridden
+DEFAULT_OPTIONS = {
+    "downscale": False,
+    "grayscale": False,
+    "crop_margins": False,
+    "binarize": False,
+    "target_width": 1200,  # roughly 300 DPI for an 80mm receipt roll
+    "margin_threshold": 40,  # darkness (0-255) a pixel needs to count as content
+    "margin_padding": 10,
+    "binarize_radius": 15,
+    "binarize_offset": 10,
+}
+
+PREPROCESSING_PROFILES = {
+    # Hand the image to Tesseract as-is
+    "none": {},
+    # Cheap steps only: shrink and drop colour
+    "fast": {"downscale": True, "grayscale": True},
+    # Everything, tuned for phone photos of receipts
+    "default": {"downscale": True, "grayscale": True, "crop_margins": True, "binarize": True},
+    # Keep more resolution for small print
+    "accurate": {
+        "downscale": True, "grayscale": True, "crop_margins": True, "binarize": True,
+        "target_width": 1800
+    },
+}
+
+# Preprocessing is opt-in until a profile is benchmarked as more accurate on real receipts
+# (see benchmarks/preprocessing_profiles.py)
+OCR_PREPROCESSING_PROFILE = os.getenv("OCR_PREPROCESSING_PROFILE", "none")
+
+class ImagePreprocessor:
+    """Prepares receipt images for Tesseract with a configurable set of steps"""
+
+    def __init__(self, profile: str = OCR_PREPROCESSING_PROFILE, **overrides):
+        if profile not in PREPROCESSING_PROFILES:
+            raise ValueError(f"Unknown preprocessing profile '{profile}'. "
+                             f"Available: {', '.join(PREPROCESSING_PROFILES)}")
+        self.profile = profile
+        self.options = {**DEFAULT_OPTIONS, **PREPROCESSING_PROFILES[profile], **overrides}
+
+    @property
+    def signature(self) -> str:
+        """Describe the enabled steps and their parameters, for cache versioning"""
+        enabled = [step for step in ("downscale", "grayscale", "crop_margins", "binarize") if self.options[step]]
+        if not enabled:
+            return "none"
+        params = ",".join(f"{key}={value}" for key, value in sorted(self.options.items())
+                          if not isinstance(value, bool))
+        return f"{'+'.join(enabled)}({params})"
+
+    def process(self, image: Image.Image) -> Tuple[Image.Image, Dict[str, float]]:
+        """Run the enabled steps and return the image with per-step timings in ms"""
+        timings = {}
+
+        def timed(step, func, img):
+            start = time.perf_counter()
+            result = func(img)
+            timings[step] = round((time.perf_counter() - start) * 1000, 2)
+            return result
+
+        if self.options["downscale"]:
+            self._request_draft(image)
+
+        start = time.perf_counter()
+        image.load()
+        timings["decode"] = round((time.perf_counter() - start) * 1000, 2)
+
+        # Grayscale first so the resize only has to filter a single channel
+        if self.options["grayscale"]:
+            image = timed("grayscale", self._grayscale, image)
+        elif image.mode != 'RGB':
+            image = image.convert('RGB')
+
+        if self.options["downscale"]:
+            image = timed("downscale", self._downscale, image)
+
+        if self.options["crop_margins"]:
+            image = timed("crop_margins", self._crop_margins, image)
+
+        if self.options["binarize"]:
+            image = timed("binarize", self._binarize, image)
+
+        return image, timings
+
+    def _target_size(self, image: Image.Image) -> Optional[Tuple[int, int]]:
+        target_width = self.options["target_width"]
+        if image.width <= target_width:
+            return None
+        return target_width, round(image.height * target_width / image.width)
+
+    def _request_draft(self, image: Image.Image):
+        """Let the JPEG decoder skip detail (and colour) we're about to throw away"""
+        size = self._target_size(image)
+        if size is not None and image.format == "JPEG":
+            image.draft('L' if self.options["grayscale"] else image.mode, size)
+
+    def _downscale(self, image: Image.Image) -> Image.Image:
+        """Shrink wide images to the target width, keeping the aspect ratio"""
+        size = self._target_size(image)
+        if size is None:
+            return image
+        return image.resize(size, Image.LANCZOS, reducing_gap=3.0)
+
+    def _grayscale(self, image: Image.Image) -> Image.Image:
+        return image if image.mode == 'L' else image.convert('L')
+
+    def _crop_margins(self, image: Image.Image) -> Image.Image:
+        """Crop away empty borders around the printed content"""
+        gray = self._grayscale(image)
+        threshold = 255 - self.options["margin_threshold"]
+        content = gray.point(lambda value: 255 if value < threshold else 0)
+        bbox = content.getbbox()
+        if bbox is None:
+            return image
+
+        padding = self.options["margin_padding"]
+        left, top, right, bottom = bbox
+        return image.crop((
+            max(left - padding, 0),
+            max(top - padding, 0),
+            min(right + padding, image.width),
+            min(bottom + padding, image.height)
+        ))
+
+    def _binarize(self, image: Image.Image) -> Image.Image:
+        """Adaptive threshold: a pixel is ink when it is darker than its local mean"""
+        gray = self._grayscale(image)
+        local_mean = gray.filter(ImageFilter.BoxBlur(self.options["binarize_radius"]))
+        darkness = ImageChops.subtract(local_mean, gray)
+        offset = self.options["binarize_offset"]
+        return ImageOps.invert(darkness.point(lambda value: 255 if value > offset else 0))
@@ -0,0 +1,98 @@
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, TextIO
+
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import Session
+
+from ..models.export_watermark import ExportWatermark
+from ..models.receipt import Receipt, utcnow
+from ..models.receipt_deletion import ReceiptDeletion
+from .receipt_export import EXPORT_BATCH_SIZE, RECEIPT_COLUMNS, ExportEncoder, iter_export_batches
+
+# Changes newer than this many seconds wait for the next run: a transaction that is still
+# open may yet commit an earlier updated_at than the rows already visible
+INCREMENTAL_EXPORT_LAG = int(os.getenv("INCREMENTAL_EXPORT_LAG", "60"))
+
+# Formats that can carry tombstones next to receipts
+INCREMENTAL_FORMATS = ("jsonl", "json")
+
+def as_utc(value: datetime) -> datetime:
+    """Convert an aware datetime to UTC; naive ones (as SQLite returns them) are stored in UTC"""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+def changed_receipts_statement(watermark: ExportWatermark, cutoff: datetime):
+    """Receipts created or updated after the watermark and before the cutoff, oldest change first"""
+    statement = select(*RECEIPT_COLUMNS).where(Receipt.updated_at < cutoff)
+    if watermark.updated_at is not None:
+        # Equivalent to (updated_at, id) > watermark, which the ix_receipts_updated_at_id index serves
+        statement = statement.where(or_(
+            Receipt.updated_at > watermark.updated_at,
+            and_(Receipt.updated_at == watermark.updated_at, Receipt.id > watermark.receipt_id)
+        ))
+    return statement.order_by(Receipt.updated_at, Receipt.id)
+
+def run_incremental_export(
+    db: Session,
+    name: str,
+    encoder: ExportEncoder,
+    output: TextIO,
+    cutoff: Optional[datetime] = None
+) -> Dict:
+    """Write receipts changed since the named watermark, then tombstones for deleted receipts
+
+    The watermark is advanced but not committed; commit once the output is safely written,
+    so a failed run is repeated in full next time.
+    """
+    watermark = db.get(ExportWatermark, name)
+    if watermark is None:
+        watermark = ExportWatermark(name=name, updated_at=None, receipt_id=0, deletion_id=0)
+        db.add(watermark)
+    if cutoff is None:
+        cutoff = utcnow() - timedelta(seconds=INCREMENTAL_EXPORT_LAG)
+
+    output.write(encoder.begin())
+    changed = 0
+    for records in iter_export_batches(db, statement=changed_receipts_statement(watermark, cutoff)):
+        for record in records:
+            record['deleted'] = False
+        output.write(encoder.encode(records))
+        changed += len(records)
+        last = records[-1]
+        watermark.updated_at = datetime.fromisoformat(last['updated_at'])
+        watermark.receipt_id = last['id']
+
+    deletions = db.execute(
+        select(ReceiptDeletion.id, ReceiptDeletion.receipt_id, ReceiptDeletion.deleted_at)
+        .where(ReceiptDeletion.id > watermark.deletion_id)
+        .order_by(ReceiptDeletion.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    deleted = 0
+    cutoff_utc = as_utc(cutoff)
+    for partition in deletions.partitions():
+        tombstones = []
+        for deletion_id, receipt_id, deleted_at in partition:
+            if as_utc(deleted_at) >= cutoff_utc:
+                # Later deletions wait for the next run, keeping the log id order intact
+                break
+            tombstones.append({'id': receipt_id, 'deleted': True, 'deleted_at': deleted_at.isoformat()})
+            watermark.deletion_id = deletion_id
+        output.write(encoder.encode(tombstones))
+        deleted += len(tombstones)
+        if len(tombstones) < len(partition):
+            break
+    output.write(encoder.end())
+
+    watermark.exported_at = utcnow()
+    return {
+        'receipts': changed,
+        'deletions': deleted,
+        'watermark': {
+            'updated_at': watermark.updated_at.isoformat() if watermark.updated_at else None,
+            'receipt_id': watermark.receipt_id,
+            'deletion_id': watermark.deletion_id
+        }
+    }
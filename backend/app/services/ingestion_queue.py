@@ -0,0 +1,180 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.orm import Session
+
+from ..database import AsyncSessionLocal
+from ..models.ingestion_job import IngestionJob
+from .receipt_pipeline import process_receipt_file
+from .data_version import bump_data_version
+from .receipt_store import add_items
+from .spending_rollups import refresh_receipt_rollups
+from .upload_storage import hash_file
+
+logger = logging.getLogger(__name__)
+
+# Number of concurrent ingestion jobs; OCR itself is bounded by the OCR executor
+INGESTION_WORKERS = int(os.getenv("INGESTION_WORKERS", str(max(os.cpu_count() or 1, 1))))
+# Seconds after which a job still marked processing is assumed abandoned by a crashed worker
+INGESTION_JOB_TIMEOUT = int(os.getenv("INGESTION_JOB_TIMEOUT", "600"))
+
+class IngestionQueue:
+    """In-process queue that finishes receipts uploaded in job mode"""
+
+    def __init__(self, num_workers: Optional[int] = None, session_factory=AsyncSessionLocal):
+        self.num_workers = INGESTION_WORKERS if num_workers is None else num_workers
+        self.session_factory = session_factory
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def running(self) -> bool:
+        return self._queue is not None
+
+    async def start(self):
+        """Start the worker tasks and re-queue jobs left unfinished by a previous run"""
+        if self._queue is not None:
+            return
+
+        self._queue = asyncio.Queue()
+        self._tasks = [
+            asyncio.create_task(self._worker()) for _ in range(max(self.num_workers, 1))
+        ]
+
+        async with self.session_factory() as db:
+            unfinished = (await db.scalars(
+                select(IngestionJob.id).where(claimable(datetime.now(timezone.utc)))
+                .order_by(IngestionJob.created_at)
+            )).all()
+
+        for job_id in unfinished:
+            self._queue.put_nowait(job_id)
+        if unfinished:
+            logger.info(f"Re-queued {len(unfinished)} unfinished ingestion jobs")
+
+    async def shutdown(self):
+        """Stop the worker tasks; unfinished jobs stay pending until the next start"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+
+    def enqueue(self, job_id: str):
+        """Schedule a job for processing"""
+        if self._queue is None:
+            logger.warning(f"Ingestion queue not running, job {job_id} stays pending")
+            return
+        self._queue.put_nowait(job_id)
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self.process_job(job_id)
+            except Exception as e:
+                logger.error(f"Ingestion job {job_id} crashed: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    async def process_job(self, job_id: str):
+        """Run OCR and categorization for a job and finalize its receipt"""
+        async with self.session_factory() as db:
+            claimed = await db.run_sync(claim_job, job_id)
+            if claimed is None:
+                return
+            await db.commit()
+
+            file_path, content_hash, timings = claimed
+            try:
+                stage_start = time.perf_counter()
+                content_hash = content_hash or await asyncio.to_thread(hash_file, file_path)
+                categorized_data = await process_receipt_file(db, file_path, content_hash)
+                timings["ocr"] = round((time.perf_counter() - stage_start) * 1000, 2)
+                await db.run_sync(complete_job, job_id, categorized_data, timings)
+            except Exception as e:
+                await db.rollback()
+                logger.error(f"Ingestion job {job_id} failed: {str(e)}")
+                if not await db.run_sync(fail_job, job_id, str(e), timings):
+                    return
+            await db.commit()
+
+# The database work of a job, run through AsyncSession.run_sync so it never blocks the event loop
+
+def claimable(now: datetime):
+    """Jobs that are pending, or processing for longer than the job timeout"""
+    stale_before = now - timedelta(seconds=INGESTION_JOB_TIMEOUT)
+    return or_(
+        IngestionJob.status == "pending",
+        (IngestionJob.status == "processing") & (
+            IngestionJob.started_at.is_(None) | (IngestionJob.started_at < stale_before)
+        ),
+    )
+
+def claim_job(db: Session, job_id: str) -> Optional[Tuple[str, Optional[str], Dict]]:
+    """Mark a job and its receipt as processing; returns its file path, content hash and timings
+
+    The status check and update are one statement, so when several processes race for the
+    same job only the one whose update matched a row gets it.
+    """
+    started_at = datetime.now(timezone.utc)
+    result = db.execute(
+        update(IngestionJob)
+        .where(IngestionJob.id == job_id, claimable(started_at))
+        .values(status="processing", started_at=started_at)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        return None
+
+    job = db.get(IngestionJob, job_id, populate_existing=True)
+    timings = dict(job.stage_timings or {})
+    created_at = job.created_at
+    if created_at is not None:
+        if created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=timezone.utc)
+        timings["queued"] = round((started_at - created_at).total_seconds() * 1000, 2)
+
+    job.receipt.processing_status = "processing"
+    return job.receipt.file_path, job.content_hash, timings
+
+def complete_job(db: Session, job_id: str, categorized_data: Dict, timings: Dict):
+    """Store the extracted data on the job's receipt without committing"""
+    stage_start = time.perf_counter()
+    job = db.get(IngestionJob, job_id)
+    receipt = job.receipt
+    receipt.total_amount = categorized_data.get("total_amount")
+    receipt.merchant_name = categorized_data.get("merchant_name")
+    receipt.purchase_date = datetime.fromisoformat(categorized_data.get("purchase_date")) if categorized_data.get("purchase_date") else None
+    receipt.raw_text = categorized_data.get("raw_text")
+    add_items(db, receipt, categorized_data.get("items", []))
+    refresh_receipt_rollups(db, [receipt])
+    receipt.processing_status = "completed"
+    job.status = "completed"
+    db.flush()
+    timings["persist"] = round((time.perf_counter() - stage_start) * 1000, 2)
+    _finish(db, job, timings)
+
+def fail_job(db: Session, job_id: str, error: str, timings: Dict) -> bool:
+    """Mark a job and its receipt as failed without committing; False if the job is gone"""
+    job = db.get(IngestionJob, job_id)
+    if job is None:
+        return False
+    job.receipt.processing_status = "failed"
+    job.status = "failed"
+    job.error = error
+    _finish(db, job, timings)
+    return True
+
+def _finish(db: Session, job: IngestionJob, timings: Dict):
+    job.stage_timings = timings
+    job.finished_at = datetime.now(timezone.utc)
+    # The receipt now counts in analytics (or is marked failed in recent receipts)
+    bump_data_version(db)
+
+ingestion_queue = IngestionQueue()
@@ -0,0 +1,107 @@
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+def _is_word_char(char: str) -> bool:
+    # Same definition as \w in str regexes
+    return char.isalnum() or char == '_'
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton that finds every rule occurring in a text in one pass
+
+    Each rule has a rank; lookups return the lowest rank that matched. Substring rules
+    match anywhere, whole-word rules only between word boundaries (like \\bword\\b).
+    """
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Lowest rank of substring rules ending at each state, including via suffixes
+        self._substring_rank: List[Optional[int]] = [None]
+        # (length, rank) of whole-word rules ending at each state, including via suffixes
+        self._word_rules: List[Tuple[Tuple[int, int], ...]] = [()]
+        self._built = True
+
+    def __len__(self) -> int:
+        return len(self._goto)
+
+    def add(self, keyword: str, rank: int, whole_word: bool = False):
+        """Add a rule; call build() once all rules are added"""
+        if not keyword:
+            raise ValueError("Keyword rules must not be empty")
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._substring_rank.append(None)
+                self._word_rules.append(())
+            state = next_state
+
+        if whole_word:
+            self._word_rules[state] += ((len(keyword), rank),)
+        elif self._substring_rank[state] is None or rank < self._substring_rank[state]:
+            self._substring_rank[state] = rank
+        self._built = False
+
+    def build(self):
+        """Compute failure links and merge each state's matches with its longest suffix's"""
+        queue = deque(self._goto[0].values())
+        for state in queue:
+            self._fail[state] = 0
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(char, 0)
+                self._fail[next_state] = fail
+
+                # The suffix state is shallower, so its matches are already merged
+                suffix_rank = self._substring_rank[fail]
+                own_rank = self._substring_rank[next_state]
+                if suffix_rank is not None and (own_rank is None or suffix_rank < own_rank):
+                    self._substring_rank[next_state] = suffix_rank
+                self._word_rules[next_state] += self._word_rules[fail]
+                queue.append(next_state)
+        self._built = True
+
+    def best_rank(self, text: str, word_end: Optional[int] = None) -> Optional[int]:
+        """Lowest rank matching in text; whole-word rules only count if they end by word_end"""
+        if not self._built:
+            self.build()
+        if word_end is None:
+            word_end = len(text)
+
+        goto, fail = self._goto, self._fail
+        substring_rank, word_rules = self._substring_rank, self._word_rules
+        best = None
+        state = 0
+        for end, char in enumerate(text, 1):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if not state:
+                continue
+
+            rank = substring_rank[state]
+            if rank is not None and (best is None or rank < best):
+                best = rank
+                if best == 0:
+                    break
+
+            if end > word_end:
+                continue
+            for length, rank in word_rules[state]:
+                if best is not None and rank >= best:
+                    continue
+                start = end - length
+                if start > 0 and _is_word_char(text[start - 1]):
+                    continue
+                if end < len(text) and _is_word_char(text[end]):
+                    continue
+                best = rank
+        return best
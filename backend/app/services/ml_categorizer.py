@@ -0,0 +1,115 @@
+import logging
+import os
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+from ..models.receipt import Receipt, ReceiptItem
+
+logger = logging.getLogger(__name__)
+
+# Where the trained model is written and loaded from
+CATEGORY_MODEL_PATH = os.getenv("CATEGORY_MODEL_PATH", "data/category_model.joblib")
+
+# Bump when the features change so older model files are ignored
+MODEL_FORMAT_VERSION = 1
+
+ItemPair = Tuple[str, Optional[str]]
+
+def _item_text(item_name: str, merchant_name: Optional[str]) -> str:
+    return f"{item_name} | {merchant_name or ''}".lower()
+
+def _build_pipeline():
+    # scikit-learn is only imported once a model is trained or loaded, so workers using
+    # the keyword rules alone don't pay for it
+    from sklearn.feature_extraction.text import HashingVectorizer
+    from sklearn.linear_model import SGDClassifier
+    from sklearn.pipeline import make_pipeline
+
+    # Character n-grams hold up to OCR typos; hashing keeps the model a fixed size
+    # and needs no vocabulary to be fitted or stored
+    return make_pipeline(
+        HashingVectorizer(analyzer="char_wb", ngram_range=(2, 4), n_features=2 ** 18, alternate_sign=False),
+        SGDClassifier(loss="log_loss", alpha=1e-5, max_iter=50, tol=1e-4, random_state=0)
+    )
+
+def load_training_samples(db: Session, exclude_other: bool = True) -> Tuple[List[ItemPair], List[str]]:
+    """Read (item_name, merchant_name) pairs and their categories from receipt_items"""
+    query = (
+        db.query(ReceiptItem.item_name, Receipt.merchant_name, ReceiptItem.category)
+        .join(Receipt, ReceiptItem.receipt_id == Receipt.id)
+        .filter(ReceiptItem.category.isnot(None))
+    )
+    if exclude_other:
+        query = query.filter(ReceiptItem.category != "Other")
+
+    items, categories = [], []
+    for item_name, merchant_name, category in query:
+        items.append((item_name, merchant_name))
+        categories.append(category)
+    return items, categories
+
+class MLCategorizer:
+    """Hashing-vectorizer + linear model predicting item categories in batches"""
+
+    def __init__(self, pipeline=None):
+        self.pipeline = pipeline
+
+    @property
+    def categories(self) -> List[str]:
+        return [str(category) for category in self.pipeline.classes_] if self.pipeline is not None else []
+
+    def train(self, items: Sequence[ItemPair], categories: Sequence[str], test_size: float = 0.2) -> Dict:
+        """Fit on labelled items and return held-out accuracy"""
+        if len(set(categories)) < 2:
+            raise ValueError("Training needs items from at least two categories")
+
+        texts = [_item_text(item_name, merchant_name) for item_name, merchant_name in items]
+        accuracy = None
+        if test_size and len(texts) >= 10:
+            from sklearn.model_selection import train_test_split
+
+            train_texts, test_texts, train_labels, test_labels = train_test_split(
+                texts, list(categories), test_size=test_size, random_state=0
+            )
+            pipeline = _build_pipeline().fit(train_texts, train_labels)
+            accuracy = float(pipeline.score(test_texts, test_labels))
+
+        # The saved model is fitted on everything
+        self.pipeline = _build_pipeline().fit(texts, list(categories))
+        return {"samples": len(texts), "categories": self.categories, "accuracy": accuracy}
+
+    def predict(self, items: Iterable[ItemPair]) -> List[str]:
+        """Predict categories for all items with one vectorized call"""
+        texts = [_item_text(item_name, merchant_name) for item_name, merchant_name in items]
+        if not texts:
+            return []
+        return [str(category) for category in self.pipeline.predict(texts)]
+
+    def save(self, path: str = CATEGORY_MODEL_PATH):
+        import joblib
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        joblib.dump({"version": MODEL_FORMAT_VERSION, "pipeline": self.pipeline}, path)
+        logger.info(f"Saved category model to {path}")
+
+    @classmethod
+    def load(cls, path: str = CATEGORY_MODEL_PATH) -> Optional["MLCategorizer"]:
+        """Load a saved model, or return None when there is no usable model file"""
+        if not os.path.exists(path):
+            return None
+        # Unpickling the model imports the scikit-learn modules it needs
+        import joblib
+
+        try:
+            saved = joblib.load(path)
+        except Exception as e:
+            logger.warning(f"Could not load category model from {path}: {str(e)}")
+            return None
+        if saved.get("version") != MODEL_FORMAT_VERSION:
+            logger.warning(f"Ignoring category model {path} with an outdated format")
+            return None
+        logger.info(f"Loaded category model from {path}")
+        return cls(saved["pipeline"])
@@ -0,0 +1,158 @@
+import hashlib
+import logging
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..models.ocr_cache import OCRCacheEntry
+from .ocr_service import ocr_pipeline_version
+
+logger = logging.getLogger(__name__)
+
+OCR_CACHE_ENABLED = os.getenv("OCR_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+OCR_CACHE_MAX_ENTRIES = int(os.getenv("OCR_CACHE_MAX_ENTRIES", "50000"))
+OCR_CACHE_MAX_AGE_DAYS = int(os.getenv("OCR_CACHE_MAX_AGE_DAYS", "90"))
+
+# Eviction runs after this many inserts rather than on every write
+EVICT_EVERY = 100
+
+class OCRCache:
+    """Database-backed cache of OCR results keyed by the SHA-256 of the uploaded file
+
+    The cache writes through the caller's session inside a SAVEPOINT and never commits or
+    rolls back the outer transaction, which belongs to the upload or ingestion job.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = OCR_CACHE_MAX_ENTRIES,
+        max_age_days: int = OCR_CACHE_MAX_AGE_DAYS,
+        enabled: bool = OCR_CACHE_ENABLED,
+        pipeline_version: Optional[str] = None
+    ):
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        self.enabled = enabled
+        self._pipeline_version = pipeline_version
+        self._lock = threading.Lock()
+        self._puts = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def pipeline_version(self) -> str:
+        if self._pipeline_version is None:
+            self._pipeline_version = ocr_pipeline_version()
+        return self._pipeline_version
+
+    @staticmethod
+    def content_hash(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    def _cutoff(self) -> datetime:
+        return datetime.now(timezone.utc) - timedelta(days=self.max_age_days)
+
+    def get(self, db: Session, content_hash: str) -> Optional[Dict]:
+        """Return cached receipt data for a file hash, or None on a miss"""
+        if not self.enabled:
+            return None
+
+        entry = db.query(OCRCacheEntry).filter(
+            OCRCacheEntry.content_hash == content_hash,
+            OCRCacheEntry.pipeline_version == self.pipeline_version,
+            OCRCacheEntry.created_at >= self._cutoff()
+        ).first()
+
+        if entry is None:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with db.begin_nested():
+            db.query(OCRCacheEntry).filter(OCRCacheEntry.content_hash == content_hash).update(
+                {
+                    OCRCacheEntry.hit_count: OCRCacheEntry.hit_count + 1,
+                    OCRCacheEntry.last_used_at: func.now()
+                },
+                synchronize_session=False
+            )
+
+        with self._lock:
+            self.hits += 1
+        return {**entry.result, "raw_text": entry.raw_text}
+
+    def put(self, db: Session, content_hash: str, receipt_data: Dict):
+        """Store receipt data for a file hash, replacing stale entries"""
+        if not self.enabled:
+            return
+
+        result = {key: value for key, value in receipt_data.items() if key != "raw_text"}
+        try:
+            with db.begin_nested():
+                db.query(OCRCacheEntry).filter(OCRCacheEntry.content_hash == content_hash).delete(
+                    synchronize_session=False
+                )
+                db.add(OCRCacheEntry(
+                    content_hash=content_hash,
+                    pipeline_version=self.pipeline_version,
+                    raw_text=receipt_data.get("raw_text"),
+                    result=result,
+                    hit_count=0
+                ))
+        except IntegrityError:
+            # Another worker cached the same file concurrently; only the savepoint is rolled back
+            return
+
+        with self._lock:
+            self._puts += 1
+            should_evict = self._puts % EVICT_EVERY == 0
+        if should_evict:
+            self.evict(db)
+
+    def evict(self, db: Session) -> int:
+        """Drop expired and outdated entries, then the least recently used beyond max_entries"""
+        with db.begin_nested():
+            removed = db.query(OCRCacheEntry).filter(
+                (OCRCacheEntry.created_at < self._cutoff()) |
+                (OCRCacheEntry.pipeline_version != self.pipeline_version)
+            ).delete(synchronize_session=False)
+
+            overflow = db.query(func.count(OCRCacheEntry.content_hash)).scalar() - self.max_entries
+            if overflow > 0:
+                oldest = db.query(OCRCacheEntry.content_hash).order_by(
+                    OCRCacheEntry.last_used_at
+                ).limit(overflow).subquery()
+                removed += db.query(OCRCacheEntry).filter(
+                    OCRCacheEntry.content_hash.in_(oldest.select())
+                ).delete(synchronize_session=False)
+
+        with self._lock:
+            self.evictions += removed
+        if removed:
+            logger.info(f"Evicted {removed} OCR cache entries")
+        return removed
+
+    def stats(self, db: Session) -> Dict:
+        """Return hit/miss counters for this process and the cache size"""
+        with self._lock:
+            hits, misses, evictions = self.hits, self.misses, self.evictions
+        lookups = hits + misses
+        return {
+            "enabled": self.enabled,
+            "pipeline_version": self.pipeline_version,
+            "entries": db.query(func.count(OCRCacheEntry.content_hash)).scalar(),
+            "max_entries": self.max_entries,
+            "max_age_days": self.max_age_days,
+            "hits": hits,
+            "misses": misses,
+            "evictions": evictions,
+            "hit_ratio": hits / lookups if lookups else 0.0
+        }
+
+ocr_cache = OCRCache()
@@ -0,0 +1,121 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Union
+
+from .ocr_service import OCR_THREADS, OCRService
+from .categorization_service import CategorizationService
+
+logger = logging.getLogger(__name__)
+
+# Number of OCR worker processes; 0 runs OCR in the default thread pool instead
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", str(os.cpu_count() or 1)))
+
+# Services owned by the current worker process, created once by the pool initializer
+_worker_ocr_service: Optional[OCRService] = None
+_worker_categorization_service: Optional[CategorizationService] = None
+# Without worker processes several threads may create the services at once
+_worker_lock = threading.Lock()
+
+def init_worker_process():
+    """Process pool initializer: limit Tesseract's threads in this worker, then load the services"""
+    # Tesseract reads the OpenMP thread limit from the environment when it loads
+    os.environ["OMP_THREAD_LIMIT"] = str(OCR_THREADS)
+    _init_worker()
+
+def _init_worker():
+    """Create warm OCR and categorization services for this worker process"""
+    global _worker_ocr_service, _worker_categorization_service
+    if _worker_ocr_service is not None:
+        return
+    with _worker_lock:
+        if _worker_ocr_service is None:
+            _worker_categorization_service = CategorizationService()
+            _worker_ocr_service = OCRService()
+
+def _warm_up() -> int:
+    """No-op task used to force worker processes to start eagerly"""
+    _init_worker()
+    return os.getpid()
+
+def extract_receipt_data(image_data: Union[bytes, str]) -> Dict:
+    """Run OCR and parsing for a single receipt in the current worker"""
+    _init_worker()
+    return _worker_ocr_service.extract_receipt_data(image_data)
+
+def categorize_receipt(receipt_data: Dict) -> Dict:
+    """Categorize extracted receipt data in the current worker, where the ML model is loaded"""
+    _init_worker()
+    return _worker_categorization_service.categorize_receipt(receipt_data)
+
+def categorization_cache_info() -> Dict:
+    """Categorization cache counters of the current worker"""
+    _init_worker()
+    return _worker_categorization_service.cache_info()
+
+def process_receipt(image_data: Union[bytes, str]) -> Dict:
+    """Run OCR and categorization for a single receipt in the current worker"""
+    _init_worker()
+    receipt_data = _worker_ocr_service.extract_receipt_data(image_data)
+    return _worker_categorization_service.categorize_receipt(receipt_data)
+
+class OCRExecutor:
+    """Runs receipt OCR off the event loop in a pool of worker processes"""
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = OCR_WORKERS if max_workers is None else max_workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def running(self) -> bool:
+        return self._pool is not None
+
+    def start(self):
+        """Start the worker processes and warm up their services"""
+        if self._pool is not None or self.max_workers <= 0:
+            return
+
+        # Spawn rather than fork so workers don't inherit the server's sockets and DB connections
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_worker_process
+        )
+        for _ in range(self.max_workers):
+            self._pool.submit(_warm_up)
+        logger.info(f"Started OCR executor with {self.max_workers} worker processes")
+
+    def shutdown(self, wait: bool = True):
+        """Stop the worker processes once every submitted receipt, queued or running, is processed"""
+        if self._pool is None:
+            return
+        # Queued receipts are not cancelled: a sync upload awaiting one would never get its result
+        self._pool.shutdown(wait=wait)
+        self._pool = None
+        logger.info("OCR executor shut down")
+
+    async def extract_receipt_data(self, image_data: Union[bytes, str]) -> Dict:
+        """Extract receipt data (without categories) without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, extract_receipt_data, image_data)
+
+    async def categorize_receipt(self, receipt_data: Dict) -> Dict:
+        """Categorize extracted receipt data without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, categorize_receipt, receipt_data)
+
+    async def categorization_cache_info(self) -> Dict:
+        """Categorization cache counters of whichever worker picks up the request"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, categorization_cache_info)
+
+    async def process_receipt(self, image_data: Union[bytes, str]) -> Dict:
+        """Extract and categorize receipt data without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        # Without a process pool (not started, or OCR_WORKERS=0) fall back to the default thread pool
+        return await loop.run_in_executor(self._pool, process_receipt, image_data)
+
+ocr_executor = OCRExecutor()
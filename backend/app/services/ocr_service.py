@@ -1,146 +1,241 @@
 import pytesseract
 from PIL import Image
 import io
-import re
-from typing import Dict, List, Optional
+import os
+import queue
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Type, Union
 import logging
 
+from .image_preprocessing import ImagePreprocessor, OCR_PREPROCESSING_PROFILE
+from .pdf_extraction import PDF_RENDER_DPI, PDFTextExtractor, is_pdf
+from .receipt_parser import parse_receipt_text
+
+try:
+    import tesserocr
+    TESSEROCR_AVAILABLE = True
+except ImportError:
+    TESSEROCR_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# Bump whenever text parsing changes so cached OCR results are invalidated
+PARSER_VERSION = "1"
+
+# "auto" uses the persistent tesserocr engine when installed, otherwise pytesseract
+OCR_BACKEND = os.getenv("OCR_BACKEND", "auto")
+# Threads Tesseract may use per call; keep at 1 when several OCR workers share the CPUs.
+# Applied through OMP_THREAD_LIMIT by the OCR worker process initializer.
+OCR_THREADS = int(os.getenv("OCR_THREADS", os.getenv("OMP_THREAD_LIMIT", "1")))
+OCR_LANGUAGE = os.getenv("OCR_LANGUAGE", "eng")
+
+# Page segmentation mode 6: assume a single uniform block of text
+PAGE_SEGMENTATION_MODE = 6
+
+def ocr_config(language: str = OCR_LANGUAGE) -> str:
+    return f"--psm {PAGE_SEGMENTATION_MODE} -l {language}"
+
+class OCRBackend(ABC):
+    """Turns a preprocessed image into text"""
+    
+    name = "base"
+    # Whether one instance may serve several threads at once
+    thread_safe = False
+    
+    def __init__(self, language: str = OCR_LANGUAGE):
+        self.language = language
+    
+    @property
+    def config(self) -> str:
+        return ocr_config(self.language)
+    
+    @classmethod
+    @abstractmethod
+    def engine_version(cls) -> str:
+        """Version of the OCR engine, read without loading a model"""
+    
+    @property
+    def version(self) -> str:
+        return self.engine_version()
+    
+    @abstractmethod
+    def image_to_string(self, image: Image.Image) -> str:
+        """OCR a preprocessed image"""
+    
+    def clone(self) -> "OCRBackend":
+        """Create another backend with the same settings, for use on another thread"""
+        return type(self)(language=self.language)
+    
+    def close(self):
+        pass
+
+class PytesseractBackend(OCRBackend):
+    """Runs the tesseract CLI through pytesseract, one subprocess per call"""
+    
+    name = "pytesseract"
+    thread_safe = True
+    
+    @classmethod
+    def engine_version(cls) -> str:
+        try:
+            return str(pytesseract.get_tesseract_version())
+        except Exception:
+            return "unknown"
+    
+    def image_to_string(self, image: Image.Image) -> str:
+        return pytesseract.image_to_string(image, config=self.config)
+
+class TesserocrBackend(OCRBackend):
+    """Keeps one Tesseract API handle loaded for the lifetime of the worker"""
+    
+    name = "tesserocr"
+    
+    def __init__(self, language: str = OCR_LANGUAGE):
+        super().__init__(language)
+        self._api = tesserocr.PyTessBaseAPI(lang=language, psm=PAGE_SEGMENTATION_MODE)
+    
+    @classmethod
+    def engine_version(cls) -> str:
+        return tesserocr.tesseract_version().split()[1]
+    
+    def image_to_string(self, image: Image.Image) -> str:
+        # The image is handed over in memory; the language model stays loaded between calls
+        self._api.SetImage(image)
+        return self._api.GetUTF8Text()
+    
+    def close(self):
+        self._api.End()
+
+def ocr_backend_class(name: str = OCR_BACKEND) -> Type[OCRBackend]:
+    """The configured OCR backend class, falling back to pytesseract"""
+    if name not in ("auto", "tesserocr", "pytesseract"):
+        raise ValueError(f"Unknown OCR backend '{name}'. Use 'auto', 'tesserocr' or 'pytesseract'.")
+    if name in ("auto", "tesserocr") and TESSEROCR_AVAILABLE:
+        return TesserocrBackend
+    if name == "tesserocr":
+        logger.warning("tesserocr is not installed, falling back to pytesseract")
+    return PytesseractBackend
+
+def create_ocr_backend(name: str = OCR_BACKEND, **kwargs) -> OCRBackend:
+    """Create the configured OCR backend, falling back to pytesseract"""
+    return ocr_backend_class(name)(**kwargs)
+
+def ocr_pipeline_version(
+    preprocessing_profile: str = OCR_PREPROCESSING_PROFILE,
+    backend_class: Optional[Type[OCRBackend]] = None,
+    language: str = OCR_LANGUAGE
+) -> str:
+    """Pipeline version of an OCRService with these settings, without loading the OCR engine"""
+    return _pipeline_version(
+        (backend_class or ocr_backend_class()).engine_version(), ocr_config(language),
+        ImagePreprocessor(preprocessing_profile).signature, PDF_RENDER_DPI
+    )
+
+def _pipeline_version(engine_version: str, config: str, preprocessing: str, pdf_dpi: int) -> str:
+    return f"tesseract-{engine_version}|{config}|pre-{preprocessing}|pdf-{pdf_dpi}dpi|parser-{PARSER_VERSION}"
+
 class OCRService:
-    def __init__(self):
+    def __init__(
+        self,
+        preprocessing_profile: str = OCR_PREPROCESSING_PROFILE,
+        backend: Optional[OCRBackend] = None
+    ):
         # Configure tesseract path if needed (uncomment and adjust for your system)
         # pytesseract.pytesseract.tesseract_cmd = r'/usr/local/bin/tesseract'
-        pass
+        self.backend = backend or create_ocr_backend()
+        self.preprocessor = ImagePreprocessor(preprocessing_profile)
+        # PDF pages are rendered at a fixed DPI, so they skip the downscale step
+        self.page_preprocessor = ImagePreprocessor(preprocessing_profile, downscale=False)
+        self.pdf_extractor = PDFTextExtractor(self._ocr_page)
+        # Backends not in use by a thread; one that is not thread-safe is never shared
+        self._idle_backends = queue.SimpleQueue()
+        if not self.backend.thread_safe:
+            self._idle_backends.put(self.backend)
+        self._local = threading.local()
+        self._pipeline_version = None
+    
+    @property
+    def last_timings(self) -> Dict[str, float]:
+        """Stage timings in ms of the calling thread's last extraction"""
+        return getattr(self._local, "timings", {})
     
-    def extract_text(self, image_data: bytes) -> str:
-        """Extract text from image using OCR"""
+    @last_timings.setter
+    def last_timings(self, timings: Dict[str, float]):
+        self._local.timings = timings
+    
+    @property
+    def pipeline_version(self) -> str:
+        """Identify the OCR engine, its configuration, the preprocessing steps and the parser version"""
+        if self._pipeline_version is None:
+            self._pipeline_version = _pipeline_version(
+                self.backend.version, self.backend.config, self.preprocessor.signature, self.pdf_extractor.dpi
+            )
+        return self._pipeline_version
+    
+    @contextmanager
+    def _borrow_backend(self) -> Iterator[OCRBackend]:
+        """The shared backend if it is thread-safe, otherwise one no other thread is using"""
+        if self.backend.thread_safe:
+            yield self.backend
+            return
+        try:
+            backend = self._idle_backends.get_nowait()
+        except queue.Empty:
+            backend = self.backend.clone()
         try:
-            # Open image from bytes
-            image = Image.open(io.BytesIO(image_data))
+            yield backend
+        finally:
+            self._idle_backends.put(backend)
+    
+    def extract_text(self, image_data: Union[bytes, str]) -> str:
+        """Extract text from image or PDF bytes, or a file path, using OCR"""
+        try:
+            if is_pdf(image_data):
+                # Embedded text layer where available, page-parallel OCR for scanned pages
+                text, timings = self.pdf_extractor.extract_text(image_data)
+                self.last_timings = timings
+                logger.debug(f"PDF timings (ms): {timings}")
+                return text.strip()
+            
+            # Open image from bytes, or lazily from disk when given a path
+            image = Image.open(io.BytesIO(image_data) if isinstance(image_data, bytes) else image_data)
             
-            # Convert to RGB if necessary
-            if image.mode != 'RGB':
-                image = image.convert('RGB')
+            # Downscale, grayscale, crop and binarize according to the preprocessing profile
+            image, timings = self.preprocessor.process(image)
             
             # Extract text using tesseract
-            text = pytesseract.image_to_string(image, config='--psm 6')
+            start = time.perf_counter()
+            with self._borrow_backend() as backend:
+                text = backend.image_to_string(image)
+            timings["ocr"] = round((time.perf_counter() - start) * 1000, 2)
             
+            self.last_timings = timings
+            logger.debug(f"OCR timings (ms): {timings}")
             return text.strip()
         except Exception as e:
             logger.error(f"OCR extraction failed: {str(e)}")
             raise Exception(f"Failed to extract text from image: {str(e)}")
     
-    def extract_receipt_data(self, image_data: bytes) -> Dict:
+    def _ocr_page(self, image: Image.Image) -> str:
+        """OCR one rendered PDF page; called from the PDF extractor's threads"""
+        image, _ = self.page_preprocessor.process(image)
+        with self._borrow_backend() as backend:
+            return backend.image_to_string(image)
+    
+    def extract_receipt_data(self, image_data: Union[bytes, str]) -> Dict:
         """Extract structured data from receipt image"""
         try:
             raw_text = self.extract_text(image_data)
             
-            # Extract merchant name (usually at the top)
-            merchant_name = self._extract_merchant_name(raw_text)
-            
-            # Extract total amount
-            total_amount = self._extract_total_amount(raw_text)
-            
-            # Extract purchase date
-            purchase_date = self._extract_purchase_date(raw_text)
+            # Merchant, total, date and items in a single pass over the text
+            start = time.perf_counter()
+            receipt_data = parse_receipt_text(raw_text)
+            self.last_timings["parse"] = round((time.perf_counter() - start) * 1000, 2)
             
-            # Extract items (simplified - in real app, this would be more sophisticated)
-            items = self._extract_items(raw_text)
-            
-            return {
-                "raw_text": raw_text,
-                "merchant_name": merchant_name,
-                "total_amount": total_amount,
-                "purchase_date": purchase_date,
-                "items": items
-            }
+            return {"raw_text": raw_text, **receipt_data}
         except Exception as e:
             logger.error(f"Receipt data extraction failed: {str(e)}")
             raise Exception(f"Failed to extract receipt data: {str(e)}")
-    
-    def _extract_merchant_name(self, text: str) -> Optional[str]:
-        """Extract merchant name from receipt text"""
-        lines = text.split('\n')
-        # Usually the first non-empty line is the merchant name
-        for line in lines[:5]:  # Check first 5 lines
-            line = line.strip()
-            if line and not re.match(r'^\d+$', line):  # Not just numbers
-                return line
-        return None
-    
-    def _extract_total_amount(self, text: str) -> Optional[float]:
-        """Extract total amount from receipt text"""
-        # Look for patterns like "Total: $123.45" or "TOTAL $123.45"
-        patterns = [
-            r'total[:\s]*\$?(\d+\.?\d*)',
-            r'TOTAL[:\s]*\$?(\d+\.?\d*)',
-            r'amount[:\s]*\$?(\d+\.?\d*)',
-            r'AMOUNT[:\s]*\$?(\d+\.?\d*)'
-        ]
-        
-        for pattern in patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            if matches:
-                try:
-                    return float(matches[-1])  # Take the last match (usually the total)
-                except ValueError:
-                    continue
-        
-        # Look for currency patterns at the end of lines
-        currency_pattern = r'\$(\d+\.?\d*)'
-        matches = re.findall(currency_pattern, text)
-        if matches:
-            try:
-                return float(matches[-1])
-            except ValueError:
-                pass
-        
-        return None
-    
-    def _extract_purchase_date(self, text: str) -> Optional[str]:
-        """Extract purchase date from receipt text"""
-        # Look for date patterns
-        date_patterns = [
-            r'\d{1,2}/\d{1,2}/\d{4}',
-            r'\d{1,2}-\d{1,2}-\d{4}',
-            r'\d{4}-\d{1,2}-\d{1,2}',
-            r'\d{1,2}\s+\w+\s+\d{4}'
-        ]
-        
-        for pattern in date_patterns:
-            matches = re.findall(pattern, text)
-            if matches:
-                return matches[0]
-        
-        return None
-    
-    def _extract_items(self, text: str) -> List[Dict]:
-        """Extract items from receipt text (simplified implementation)"""
-        items = []
-        lines = text.split('\n')
-        
-        for line in lines:
-            line = line.strip()
-            # Look for lines that might contain item information
-            # This is a simplified approach - in production, you'd use more sophisticated NLP
-            if re.search(r'\$?\d+\.?\d*', line) and len(line) > 5:
-                # Try to extract price from the line
-                price_match = re.search(r'\$?(\d+\.?\d*)', line)
-                if price_match:
-                    try:
-                        price = float(price_match.group(1))
-                        # Extract item name (everything before the price)
-                        item_name = line[:price_match.start()].strip()
-                        if item_name and price > 0:
-                            items.append({
-                                "item_name": item_name,
-                                "quantity": 1.0,
-                                "unit_price": price,
-                                "total_price": price,
-                                "category": None
-                            })
-                    except ValueError:
-                        continue
-        
-        return items
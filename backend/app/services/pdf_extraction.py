@@ -0,0 +1,104 @@
+from PIL import Image
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Dict, Tuple, Union
+import logging
+import os
+import time
+
+try:
+    import pypdfium2 as pdfium
+    PDFIUM_AVAILABLE = True
+except ImportError:
+    PDFIUM_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "50"))
+PDF_RENDER_DPI = int(os.getenv("PDF_RENDER_DPI", "200"))
+PDF_OCR_THREADS = int(os.getenv("PDF_OCR_THREADS", "2"))
+
+# Pages whose text layer has fewer characters than this are treated as scanned
+MIN_TEXT_LAYER_CHARS = 10
+
+def is_pdf(source: Union[bytes, str]) -> bool:
+    """Check the PDF magic bytes of in-memory data or a file on disk"""
+    if isinstance(source, bytes):
+        return source[:5] == b"%PDF-"
+    with open(source, "rb") as f:
+        return f.read(5) == b"%PDF-"
+
+class PDFTextExtractor:
+    """Extracts text from PDFs, using the text layer where present and OCR otherwise"""
+
+    def __init__(
+        self,
+        ocr_page: Callable[[Image.Image], str],
+        max_pages: int = PDF_MAX_PAGES,
+        dpi: int = PDF_RENDER_DPI,
+        threads: int = PDF_OCR_THREADS
+    ):
+        self.ocr_page = ocr_page
+        self.max_pages = max_pages
+        self.dpi = dpi
+        self.threads = max(threads, 1)
+
+    def extract_text(self, source: Union[bytes, str]) -> Tuple[str, Dict[str, float]]:
+        """Return the text of every page, merged in page order, plus timings in ms"""
+        if not PDFIUM_AVAILABLE:
+            raise RuntimeError("PDF support requires pypdfium2 to be installed")
+
+        timings = {"pdf_text_layer": 0.0, "pdf_render": 0.0}
+        pdf = pdfium.PdfDocument(source)
+        try:
+            page_count = len(pdf)
+            if page_count > self.max_pages:
+                logger.warning(f"PDF has {page_count} pages, only the first {self.max_pages} are processed")
+            page_count = min(page_count, self.max_pages)
+
+            page_texts = [""] * page_count
+            scanned_pages = 0
+            with ThreadPoolExecutor(max_workers=self.threads) as pool:
+                pending = {}
+                for index in range(page_count):
+                    page = pdf[index]
+                    try:
+                        start = time.perf_counter()
+                        text = self._text_layer(page)
+                        timings["pdf_text_layer"] += (time.perf_counter() - start) * 1000
+                        if len(text.strip()) >= MIN_TEXT_LAYER_CHARS:
+                            page_texts[index] = text
+                            continue
+
+                        # Render lazily so only `threads` page bitmaps are alive at once
+                        while len(pending) >= self.threads:
+                            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                            for future in done:
+                                page_texts[pending.pop(future)] = future.result()
+
+                        start = time.perf_counter()
+                        bitmap = page.render(scale=self.dpi / 72, grayscale=True)
+                        # Copy out of pdfium's buffer so the bitmap can be freed on this thread
+                        image = bitmap.to_pil().copy()
+                        bitmap.close()
+                        timings["pdf_render"] += (time.perf_counter() - start) * 1000
+                    finally:
+                        page.close()
+
+                    scanned_pages += 1
+                    pending[pool.submit(self.ocr_page, image)] = index
+
+                for future in pending:
+                    page_texts[pending[future]] = future.result()
+        finally:
+            pdf.close()
+
+        logger.debug(f"PDF with {page_count} pages, {scanned_pages} needed OCR")
+        timings = {step: round(ms, 2) for step, ms in timings.items()}
+        return "\n".join(text.strip() for text in page_texts), timings
+
+    def _text_layer(self, page) -> str:
+        textpage = page.get_textpage()
+        try:
+            return textpage.get_text_range().replace("\r\n", "\n")
+        finally:
+            textpage.close()
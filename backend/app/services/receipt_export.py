@@ -0,0 +1,244 @@
+import csv
+import io
+import json
+import os
+from datetime import datetime
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Sequence, TextIO
+
+from sqlalchemy import Select, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..models.receipt import Receipt, ReceiptItem
+from .receipt_queries import RECEIPT_ORDER
+
+# Receipts fetched per round trip; their items are loaded with one IN query per batch
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+RECEIPT_COLUMNS = (
+    Receipt.id, Receipt.filename, Receipt.file_path, Receipt.merchant_name, Receipt.total_amount,
+    Receipt.purchase_date, Receipt.created_at, Receipt.updated_at, Receipt.raw_text
+)
+ITEM_COLUMNS = (
+    ReceiptItem.receipt_id, ReceiptItem.id, ReceiptItem.item_name, ReceiptItem.quantity,
+    ReceiptItem.unit_price, ReceiptItem.total_price, ReceiptItem.category, ReceiptItem.description
+)
+
+def _isoformat(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+def receipts_statement(start_date: Optional[datetime] = None, end_date: Optional[datetime] = None):
+    """Receipt columns in the created_at range, newest first"""
+    return _in_range(select(*RECEIPT_COLUMNS), start_date, end_date).order_by(*RECEIPT_ORDER)
+
+def _in_range(statement, start_date: Optional[datetime], end_date: Optional[datetime]):
+    if start_date:
+        statement = statement.where(Receipt.created_at >= start_date)
+    if end_date:
+        statement = statement.where(Receipt.created_at <= end_date)
+    return statement
+
+def items_statement(receipt_ids: Sequence[int]):
+    return select(*ITEM_COLUMNS).where(ReceiptItem.receipt_id.in_(receipt_ids)).order_by(
+        ReceiptItem.receipt_id, ReceiptItem.id
+    )
+
+def build_records(receipt_rows: Sequence, item_rows: Sequence) -> List[Dict]:
+    """Export records for a batch of receipts, each with its items"""
+    items_by_receipt: Dict[int, List[Dict]] = {}
+    # Rows unpack in RECEIPT_COLUMNS / ITEM_COLUMNS order, which is faster than attribute access
+    for receipt_id, item_id, item_name, quantity, unit_price, total_price, category, description in item_rows:
+        items_by_receipt.setdefault(receipt_id, []).append({
+            'id': item_id,
+            'item_name': item_name,
+            'quantity': quantity,
+            'unit_price': unit_price,
+            'total_price': total_price,
+            'category': category,
+            'description': description
+        })
+    return [{
+        'id': receipt_id,
+        'filename': filename,
+        'file_path': file_path,
+        'merchant_name': merchant_name,
+        'total_amount': total_amount,
+        'purchase_date': _isoformat(purchase_date),
+        'created_at': _isoformat(created_at),
+        'updated_at': _isoformat(updated_at),
+        'raw_text': raw_text,
+        'items': items_by_receipt.get(receipt_id, [])
+    } for receipt_id, filename, file_path, merchant_name, total_amount, purchase_date, created_at, updated_at, raw_text
+        in receipt_rows]
+
+def export_summary(db: Session, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None) -> Dict:
+    """Receipt count, total amount and per-category item totals, aggregated in the database"""
+    total_receipts, total_amount = db.execute(_in_range(
+        select(func.count(Receipt.id), func.coalesce(func.sum(Receipt.total_amount), 0.0)), start_date, end_date
+    )).one()
+
+    category = func.coalesce(ReceiptItem.category, 'Uncategorized')
+    total = func.sum(ReceiptItem.total_price)
+    categories = db.execute(_in_range(
+        select(category, func.count(ReceiptItem.id), total).join(Receipt, ReceiptItem.receipt_id == Receipt.id),
+        start_date, end_date
+    ).group_by(category).order_by(total.desc())).all()
+
+    return {
+        'total_receipts': total_receipts,
+        'total_amount': float(total_amount),
+        'categories': [{'category': name, 'count': count, 'total': float(amount)} for name, count, amount in categories]
+    }
+
+def iter_export_batches(
+    db: Session,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    batch_size: Optional[int] = None,
+    statement: Optional[Select] = None
+) -> Iterator[List[Dict]]:
+    """Yield export records batch by batch from a server-side cursor
+
+    statement replaces the created_at range query; it must select RECEIPT_COLUMNS.
+    """
+    if statement is None:
+        statement = receipts_statement(start_date, end_date)
+    result = db.execute(statement.execution_options(yield_per=batch_size or EXPORT_BATCH_SIZE))
+    for partition in result.partitions():
+        items = db.execute(items_statement([row.id for row in partition])).all()
+        yield build_records(partition, items)
+
+async def aiter_export_batches(
+    db: AsyncSession,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    batch_size: Optional[int] = None
+) -> AsyncIterator[List[Dict]]:
+    """Async counterpart of iter_export_batches"""
+    statement = receipts_statement(start_date, end_date).execution_options(yield_per=batch_size or EXPORT_BATCH_SIZE)
+    result = await db.stream(statement)
+    async for partition in result.partitions():
+        items = (await db.execute(items_statement([row.id for row in partition]))).all()
+        yield build_records(partition, items)
+
+class ExportEncoder:
+    """Turns batches of export records into text; only one batch is held at a time"""
+
+    format = ""
+    media_type = "text/plain"
+
+    def __init__(self, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None):
+        self.start_date = start_date
+        self.end_date = end_date
+        self.receipts = 0
+        self.rows = 0
+
+    def begin(self) -> str:
+        return ""
+
+    def encode(self, records: List[Dict]) -> str:
+        raise NotImplementedError
+
+    def end(self) -> str:
+        return ""
+
+class CsvEncoder(ExportEncoder):
+    """One row per item; receipts without items get one row with empty item columns"""
+
+    format = "csv"
+    media_type = "text/csv"
+    fieldnames = [
+        'receipt_id', 'filename', 'merchant_name', 'total_amount',
+        'purchase_date', 'created_at', 'item_name', 'item_quantity',
+        'item_unit_price', 'item_total_price', 'item_category'
+    ]
+
+    def _write(self, rows) -> str:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue()
+
+    def begin(self) -> str:
+        return self._write([self.fieldnames])
+
+    def encode(self, records: List[Dict]) -> str:
+        rows = []
+        for record in records:
+            receipt = [
+                record['id'], record['filename'], record['merchant_name'] or '', record['total_amount'] or 0,
+                record['purchase_date'] or '', record['created_at']
+            ]
+            for item in record['items']:
+                rows.append(receipt + [
+                    item['item_name'], item['quantity'], item['unit_price'], item['total_price'], item['category'] or ''
+                ])
+            if not record['items']:
+                rows.append(receipt + ['', '', '', '', ''])
+        self.receipts += len(records)
+        self.rows += len(rows)
+        return self._write(rows)
+
+class JsonLinesEncoder(ExportEncoder):
+    """One receipt, with its items, per line"""
+
+    format = "jsonl"
+    media_type = "application/x-ndjson"
+
+    def encode(self, records: List[Dict]) -> str:
+        self.receipts += len(records)
+        self.rows += len(records)
+        return "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+
+class JsonEncoder(ExportEncoder):
+    """A single JSON document; export_info follows the receipts so their count is known"""
+
+    format = "json"
+    media_type = "application/json"
+
+    def begin(self) -> str:
+        return '{"receipts": [\n'
+
+    def encode(self, records: List[Dict]) -> str:
+        if not records:
+            return ""
+        text = ",\n".join(json.dumps(record, ensure_ascii=False) for record in records)
+        if self.receipts:
+            text = ",\n" + text
+        self.receipts += len(records)
+        self.rows += len(records)
+        return text
+
+    def end(self) -> str:
+        export_info = {
+            'exported_at': datetime.now().isoformat(),
+            'total_receipts': self.receipts,
+            'start_date': _isoformat(self.start_date),
+            'end_date': _isoformat(self.end_date)
+        }
+        return f'\n], "export_info": {json.dumps(export_info)}}}\n'
+
+EXPORT_ENCODERS = {encoder.format: encoder for encoder in (CsvEncoder, JsonLinesEncoder, JsonEncoder)}
+
+def write_export(
+    db: Session,
+    encoder: ExportEncoder,
+    output: TextIO,
+    batch_size: Optional[int] = None
+) -> ExportEncoder:
+    """Write a whole export to an open text file, one batch at a time"""
+    output.write(encoder.begin())
+    for records in iter_export_batches(db, encoder.start_date, encoder.end_date, batch_size):
+        output.write(encoder.encode(records))
+    output.write(encoder.end())
+    return encoder
+
+async def stream_export(
+    db: AsyncSession,
+    encoder: ExportEncoder,
+    batch_size: Optional[int] = None
+) -> AsyncIterator[str]:
+    """Yield a whole export as text chunks, one batch at a time"""
+    yield encoder.begin()
+    async for records in aiter_export_batches(db, encoder.start_date, encoder.end_date, batch_size):
+        yield encoder.encode(records)
+    yield encoder.end()
@@ -0,0 +1,120 @@
+import re
+from typing import Dict, List, Optional
+
+# Merchant name is looked for in the first few lines only
+MERCHANT_LINES = 5
+
+NUMBER_ONLY_RE = re.compile(r'\d+$')
+# "Total: $12.45" / "AMOUNT 8.50"; the empty alternative catches a keyword whose
+# amount sits on a following line, since [:\s]* may span line breaks
+KEYWORD_AMOUNT_RE = re.compile(r'(total|amount)[:\s]*(?:\$?(\d+\.?\d*)|$)', re.IGNORECASE)
+CONTINUED_AMOUNT_RE = re.compile(r'[:\s]*\$?(\d+\.?\d*)')
+SEPARATORS_ONLY_RE = re.compile(r'[:\s]*')
+DOLLAR_AMOUNT_RE = re.compile(r'\$(\d+\.?\d*)')
+PRICE_RE = re.compile(r'\$?(\d+\.?\d*)')
+# In order of preference
+SLASH_DATE_RE = re.compile(r'\d{1,2}/\d{1,2}/\d{4}')
+DASH_DATE_RE = re.compile(r'\d{1,2}-\d{1,2}-\d{4}')
+ISO_DATE_RE = re.compile(r'\d{4}-\d{1,2}-\d{1,2}')
+WORD_DATE_RE = re.compile(r'\d{1,2}\s+\w+\s+\d{4}')
+
+def parse_receipt_text(text: str) -> Dict:
+    """Extract merchant, total, date and items from OCR text in one pass over its lines"""
+    merchant_name = None
+    keyword_amounts = {"total": None, "amount": None}
+    pending_keyword = None
+    dates = [None, None, None]
+    items = []
+
+    lines = text.split('\n')
+    for index, line in enumerate(lines):
+        stripped = line.strip()
+
+        if merchant_name is None and index < MERCHANT_LINES:
+            if stripped and not NUMBER_ONLY_RE.match(stripped):
+                merchant_name = stripped
+
+        # Amount for a keyword left hanging at the end of an earlier line
+        if pending_keyword is not None:
+            match = CONTINUED_AMOUNT_RE.match(line)
+            if match:
+                keyword_amounts[pending_keyword] = match.group(1)
+                pending_keyword = None
+            elif not SEPARATORS_ONLY_RE.fullmatch(line):
+                pending_keyword = None
+
+        lowered = line.lower()
+        if 'total' in lowered or 'amount' in lowered:
+            for match in KEYWORD_AMOUNT_RE.finditer(line):
+                keyword = match.group(1).lower()
+                if match.group(2) is None:
+                    pending_keyword = keyword
+                else:
+                    keyword_amounts[keyword] = match.group(2)
+
+        price_match = PRICE_RE.search(stripped)
+        if price_match is None:
+            # Everything below needs a digit
+            continue
+
+        if dates[0] is None:
+            if '/' in line:
+                match = SLASH_DATE_RE.search(line)
+                if match:
+                    dates[0] = match.group()
+            if '-' in line:
+                if dates[1] is None:
+                    match = DASH_DATE_RE.search(line)
+                    if match:
+                        dates[1] = match.group()
+                if dates[2] is None:
+                    match = ISO_DATE_RE.search(line)
+                    if match:
+                        dates[2] = match.group()
+
+        if len(stripped) > 5:
+            price = float(price_match.group(1))
+            item_name = stripped[:price_match.start()].strip()
+            if item_name and price > 0:
+                items.append({
+                    "item_name": item_name,
+                    "quantity": 1.0,
+                    "unit_price": price,
+                    "total_price": price,
+                    "category": None
+                })
+
+    return {
+        "merchant_name": merchant_name,
+        "total_amount": _total_amount(keyword_amounts, lines),
+        "purchase_date": _purchase_date(text, dates),
+        "items": items
+    }
+
+def _total_amount(keyword_amounts: Dict[str, Optional[str]], lines: List[str]) -> Optional[float]:
+    # The last "total" wins over the last "amount", which wins over the last dollar figure
+    for value in (keyword_amounts["total"], keyword_amounts["amount"]):
+        if value is not None:
+            return float(value)
+    dollar_amount = _last_dollar_amount(lines)
+    return float(dollar_amount) if dollar_amount is not None else None
+
+def _last_dollar_amount(lines: List[str]) -> Optional[str]:
+    """Last "$12.34" in the text, found by walking back from the end"""
+    for line in reversed(lines):
+        position = line.rfind('$')
+        while position >= 0:
+            match = DOLLAR_AMOUNT_RE.match(line, position)
+            if match:
+                return match.group(1)
+            position = line.rfind('$', 0, position)
+    return None
+
+def _purchase_date(text: str, dates: List[Optional[str]]) -> Optional[str]:
+    for date in dates:
+        if date is not None:
+            return date
+    # "15 January 2024" may wrap across lines, so it is searched on the whole text,
+    # and only when no numeric date was found
+    match = WORD_DATE_RE.search(text)
+    return match.group() if match else None
@@ -0,0 +1,23 @@
+from typing import Callable, Dict, Union
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from .ocr_cache import ocr_cache
+from .ocr_executor import ocr_executor
+
+async def run_with_session(db: Union[Session, AsyncSession], fn: Callable, *args):
+    """Call fn(session, *args) with a sync session, going through run_sync for an AsyncSession"""
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args)
+    return fn(db, *args)
+
+async def process_receipt_file(db: Union[Session, AsyncSession], file_path: str, content_hash: str) -> Dict:
+    """Extract and categorize a stored receipt file, reusing cached OCR results for identical files"""
+    receipt_data = await run_with_session(db, ocr_cache.get, content_hash)
+    if receipt_data is None:
+        # Workers open the file themselves, so the image bytes never cross the process boundary
+        receipt_data = await ocr_executor.extract_receipt_data(file_path)
+        await run_with_session(db, ocr_cache.put, content_hash, receipt_data)
+    # Cached results are stored uncategorized; categories (and the ML model) come from the workers
+    return await ocr_executor.categorize_receipt(receipt_data)
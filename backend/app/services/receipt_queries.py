@@ -0,0 +1,72 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple, TypeVar, Union
+
+from sqlalchemy import Select, String, and_, literal, or_, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query, Session
+
+from ..models.receipt import Receipt, ReceiptItem
+
+# Newest first; id breaks ties between receipts created in the same instant.
+# Matches the ix_receipts_created_at_id index.
+RECEIPT_ORDER = (Receipt.created_at.desc(), Receipt.id.desc())
+
+# A legacy Query or a select() statement; both are narrowed with .filter()
+ReceiptQuery = TypeVar("ReceiptQuery", Query, Select)
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+def filter_receipts(
+    query: ReceiptQuery,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    merchant: Optional[str] = None,
+    category: Optional[str] = None
+) -> ReceiptQuery:
+    """Apply the receipt list filters: created_at range, merchant name and item category"""
+    if start_date is not None:
+        query = query.filter(Receipt.created_at >= start_date)
+    if end_date is not None:
+        query = query.filter(Receipt.created_at <= end_date)
+    if merchant:
+        query = query.filter(Receipt.merchant_name.ilike(f"%{merchant}%"))
+    if category:
+        query = query.filter(Receipt.items.any(ReceiptItem.category == category))
+    return query
+
+def encode_cursor(receipt: Receipt) -> str:
+    """Opaque cursor pointing just past the given receipt"""
+    payload = json.dumps([receipt.created_at.isoformat(), receipt.id])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, receipt_id = json.loads(payload)
+        return datetime.fromisoformat(created_at), int(receipt_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor("Invalid pagination cursor") from e
+
+def after_cursor(query: ReceiptQuery, db: Union[Session, AsyncSession], cursor: str) -> ReceiptQuery:
+    """Restrict an ordered receipt query to rows that come after the cursor"""
+    created_at, receipt_id = decode_cursor(cursor)
+    if db.get_bind().dialect.name != "sqlite":
+        # A row-value comparison lets the database seek straight into the composite index
+        return query.filter(
+            tuple_(Receipt.created_at, Receipt.id) < tuple_(literal(created_at, Receipt.created_at.type), receipt_id)
+        )
+
+    # SQLite stores timestamps as text: CURRENT_TIMESTAMP writes "YYYY-MM-DD HH:MM:SS" while
+    # SQLAlchemy writes six fractional digits, so compare against the stored text forms
+    text = created_at.strftime("%Y-%m-%d %H:%M:%S")
+    if created_at.microsecond:
+        return query.filter(
+            tuple_(Receipt.created_at, Receipt.id) < tuple_(literal(f"{text}.{created_at.microsecond:06d}", String), receipt_id)
+        )
+    return query.filter(or_(
+        tuple_(Receipt.created_at, Receipt.id) < tuple_(literal(text, String), receipt_id),
+        and_(Receipt.created_at == literal(f"{text}.000000", String), Receipt.id < receipt_id)
+    ))
@@ -0,0 +1,53 @@
+from typing import Any, Dict, Iterable, List
+
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from ..models.receipt import Receipt, ReceiptItem
+
+# Every row carries the same keys so all items go out in one multi-row INSERT
+ITEM_FIELDS = ("item_name", "quantity", "unit_price", "total_price", "category", "description")
+
+def item_rows(receipt_id: int, items: Iterable[Any]) -> List[Dict]:
+    """Turn item dicts or ReceiptItemCreate models into receipt_items rows"""
+    rows = []
+    for item in items:
+        if not isinstance(item, dict):
+            item = item.model_dump()
+        row = {field: item.get(field) for field in ITEM_FIELDS}
+        if row["quantity"] is None:
+            row["quantity"] = 1.0
+        row["receipt_id"] = receipt_id
+        rows.append(row)
+    return rows
+
+def create_receipt(db: Session, items: Iterable[Any] = (), **fields) -> Receipt:
+    """Insert a receipt and its items without committing
+
+    The receipt comes back through RETURNING, so it needs no refresh, and its items
+    are written with a single bulk INSERT. The caller commits both in one transaction.
+    """
+    receipt = db.scalars(insert(Receipt).returning(Receipt), [fields]).one()
+    add_items(db, receipt, items)
+    return receipt
+
+def add_items(db: Session, receipt: Receipt, items: Iterable[Any]) -> List[ReceiptItem]:
+    """Bulk insert items for a receipt and attach them to receipt.items"""
+    rows = item_rows(receipt.id, items)
+    created = []
+    if rows:
+        created = db.scalars(
+            insert(ReceiptItem).returning(ReceiptItem),
+            rows,
+            # Send NULLs explicitly; otherwise rows are batched by which columns are set
+            execution_options={"render_nulls": True}
+        ).all()
+        created.sort(key=lambda item: item.id)
+    set_committed_value(receipt, "items", created)
+    return created
+
+def replace_items(db: Session, receipt: Receipt, items: Iterable[Any]) -> List[ReceiptItem]:
+    """Swap all of a receipt's items for new ones without committing"""
+    db.execute(delete(ReceiptItem).where(ReceiptItem.receipt_id == receipt.id))
+    return add_items(db, receipt, items)
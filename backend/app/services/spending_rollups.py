@@ -0,0 +1,123 @@
+import math
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import Date, delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from ..models.receipt import Receipt, ReceiptItem
+from ..models.spending_rollup import DailyCategoryRollup, DailySpendRollup
+
+# First key of the PostgreSQL advisory locks that serialize refreshes of the same day
+ROLLUP_LOCK_NAMESPACE = 5271
+
+SPEND_COLUMNS = ("day", "receipt_count", "total_amount", "min_amount", "max_amount")
+CATEGORY_COLUMNS = ("day", "category", "item_count", "total_amount", "min_amount", "max_amount")
+
+def _receipt_day():
+    return func.date(Receipt.created_at, type_=Date)
+
+def _restrict_to_days(query, days: Optional[List[date]]):
+    if days is None:
+        return query
+    # The created_at range (a day wider on each side, for time zones and SQLite's text
+    # timestamps) lets the index narrow the rows; the day match decides exactly
+    return query.where(
+        Receipt.created_at >= datetime.combine(min(days) - timedelta(days=1), time()),
+        Receipt.created_at < datetime.combine(max(days) + timedelta(days=2), time()),
+        _receipt_day().in_(days)
+    )
+
+def spend_aggregate(days: Optional[List[date]] = None):
+    """Daily receipt totals computed from receipts, in SPEND_COLUMNS order"""
+    day = _receipt_day()
+    query = select(
+        day,
+        func.count(Receipt.total_amount),
+        func.sum(Receipt.total_amount),
+        func.min(Receipt.total_amount),
+        func.max(Receipt.total_amount)
+    ).where(Receipt.total_amount.isnot(None)).group_by(day)
+    return _restrict_to_days(query, days)
+
+def category_aggregate(days: Optional[List[date]] = None):
+    """Daily per-category item totals computed from receipt_items, in CATEGORY_COLUMNS order"""
+    day = _receipt_day()
+    query = select(
+        day,
+        ReceiptItem.category,
+        func.count(ReceiptItem.id),
+        func.sum(ReceiptItem.total_price),
+        func.min(ReceiptItem.total_price),
+        func.max(ReceiptItem.total_price)
+    ).join(Receipt, ReceiptItem.receipt_id == Receipt.id).where(
+        ReceiptItem.category.isnot(None)
+    ).group_by(day, ReceiptItem.category)
+    return _restrict_to_days(query, days)
+
+def _lock_days(db: Session, days: List[date]):
+    # Concurrent writers recomputing the same day would both insert its rows; on
+    # PostgreSQL the second waits here until the first commits. SQLite allows one writer.
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    for day in days:
+        db.execute(select(func.pg_advisory_xact_lock(ROLLUP_LOCK_NAMESPACE, day.toordinal())))
+
+def refresh_days(db: Session, days: Iterable[date]):
+    """Recompute the rollups of the given days from receipts without committing
+
+    Each day costs one aggregate over that day's rows, however long the history is.
+    """
+    days = sorted(set(days))
+    if not days:
+        return
+    db.flush()
+    _lock_days(db, days)
+    no_sync = {"synchronize_session": False}
+    db.execute(delete(DailySpendRollup).where(DailySpendRollup.day.in_(days)), execution_options=no_sync)
+    db.execute(delete(DailyCategoryRollup).where(DailyCategoryRollup.day.in_(days)), execution_options=no_sync)
+    db.execute(insert(DailySpendRollup).from_select(SPEND_COLUMNS, spend_aggregate(days)))
+    db.execute(insert(DailyCategoryRollup).from_select(CATEGORY_COLUMNS, category_aggregate(days)))
+
+def refresh_receipt_rollups(db: Session, receipts: Iterable[Receipt]):
+    """Recompute the days of receipts that were added or changed; call before committing"""
+    refresh_days(db, [receipt.created_at.date() for receipt in receipts if receipt.created_at is not None])
+
+def rebuild_rollups(db: Session) -> Dict[str, int]:
+    """Replace all rollup rows with a fresh aggregation of receipts, without committing"""
+    db.flush()
+    db.execute(delete(DailySpendRollup), execution_options={"synchronize_session": False})
+    db.execute(delete(DailyCategoryRollup), execution_options={"synchronize_session": False})
+    db.execute(insert(DailySpendRollup).from_select(SPEND_COLUMNS, spend_aggregate()))
+    db.execute(insert(DailyCategoryRollup).from_select(CATEGORY_COLUMNS, category_aggregate()))
+    return {
+        "days": db.scalar(select(func.count()).select_from(DailySpendRollup)),
+        "category_days": db.scalar(select(func.count()).select_from(DailyCategoryRollup))
+    }
+
+def _compare(table: str, key_size: int, expected_rows, actual_rows, columns) -> List[Dict]:
+    expected = {tuple(row[:key_size]): tuple(row[key_size:]) for row in expected_rows}
+    actual = {tuple(row[:key_size]): tuple(row[key_size:]) for row in actual_rows}
+    mismatches = []
+    for key in sorted(expected.keys() | actual.keys(), key=str):
+        want, got = expected.get(key), actual.get(key)
+        if want is not None and got is not None and all(
+            math.isclose(w, g, rel_tol=1e-9, abs_tol=1e-6) for w, g in zip(want, got)
+        ):
+            continue
+        mismatches.append({
+            "table": table,
+            "key": dict(zip(columns[:key_size], key)),
+            "expected": dict(zip(columns[key_size:], want)) if want is not None else None,
+            "actual": dict(zip(columns[key_size:], got)) if got is not None else None
+        })
+    return mismatches
+
+def find_rollup_mismatches(db: Session) -> List[Dict]:
+    """Compare every rollup row with the raw aggregation; an empty list means consistent"""
+    spend_rows = db.execute(select(*(getattr(DailySpendRollup, c) for c in SPEND_COLUMNS))).all()
+    category_rows = db.execute(select(*(getattr(DailyCategoryRollup, c) for c in CATEGORY_COLUMNS))).all()
+    return (
+        _compare("daily_spend_rollups", 1, db.execute(spend_aggregate()).all(), spend_rows, SPEND_COLUMNS)
+        + _compare("daily_category_rollups", 2, db.execute(category_aggregate()).all(), category_rows, CATEGORY_COLUMNS)
+    )
@@ -0,0 +1,65 @@
+import asyncio
+import hashlib
+import os
+import uuid
+from typing import NamedTuple
+
+from fastapi import UploadFile
+
+UPLOAD_DIR = os.getenv("UPLOAD_FOLDER", "uploads")
+MAX_FILE_SIZE = int(os.getenv("MAX_FILE_SIZE", str(10 * 1024 * 1024)))  # 10MB
+
+# Bytes read from the upload and written to disk per step
+CHUNK_SIZE = 1024 * 1024
+
+class UploadTooLarge(Exception):
+    """Raised when an upload exceeds the configured size limit"""
+
+class StoredUpload(NamedTuple):
+    file_path: str
+    size: int
+    content_hash: str
+
+async def store_upload(
+    upload: UploadFile,
+    file_extension: str,
+    max_size: int = MAX_FILE_SIZE,
+    upload_dir: str = UPLOAD_DIR
+) -> StoredUpload:
+    """Copy a spooled upload to disk in chunks, hashing it and enforcing the size limit as it goes"""
+    os.makedirs(upload_dir, exist_ok=True)
+    file_path = os.path.join(upload_dir, f"{uuid.uuid4()}.{file_extension}")
+    temp_path = f"{file_path}.part"
+
+    hasher = hashlib.sha256()
+    size = 0
+    try:
+        with open(temp_path, "wb") as buffer:
+            while True:
+                chunk = await upload.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadTooLarge(f"Upload exceeds {max_size} bytes")
+                # Hashing and writing a chunk run in a thread so the event loop keeps serving
+                await asyncio.to_thread(_hash_and_write, hasher, buffer, chunk)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    return StoredUpload(file_path=file_path, size=size, content_hash=hasher.hexdigest())
+
+def _hash_and_write(hasher, buffer, chunk: bytes):
+    hasher.update(chunk)
+    buffer.write(chunk)
+
+def hash_file(file_path: str) -> str:
+    """Compute the SHA-256 of a file on disk without loading it into memory"""
+    hasher = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Categorization Cache Benchmark for Scan&Track
+Replays a Zipfian stream of (item, merchant) pairs, the way line items repeat
+across real receipts, through CategorizationService with and without its LRU
+cache, for a few cache sizes
+
+Usage:
+    python benchmarks/categorization_cache.py --lookups 200000 --distinct 50000 --skew 1.1
+"""
+
+import argparse
+import bisect
+import itertools
+import os
+import random
+import string
+import sys
+import time
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.categorization_service import CategorizationService
+
+COMMON_ITEMS = ["COFFEE", "GAS", "PARKING", "Sandwich", "Milk", "Bread", "Uber Trip", "Latte"]
+MERCHANTS = ["STARBUCKS", "SHELL", "City Parking", "Corner Deli", "WALMART", None]
+
+def make_catalogue(distinct, rng):
+    """Distinct (item, merchant) pairs, most popular first"""
+    catalogue = [(item, merchant) for item in COMMON_ITEMS for merchant in MERCHANTS]
+    while len(catalogue) < distinct:
+        name = ' '.join(''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 9)))
+                        for _ in range(rng.randint(1, 3)))
+        # OCR output varies in case, which the cache key normalizes away
+        catalogue.append((rng.choice([name, name.upper(), name.title()]), rng.choice(MERCHANTS)))
+    return catalogue[:distinct]
+
+def zipf_stream(catalogue, lookups, skew, rng):
+    """Draw lookups with probability proportional to 1 / rank ** skew"""
+    cumulative = list(itertools.accumulate(1 / rank ** skew for rank in range(1, len(catalogue) + 1)))
+    total = cumulative[-1]
+    return [catalogue[bisect.bisect(cumulative, rng.random() * total)] for _ in range(lookups)]
+
+def run(cache_size, stream):
+    service = CategorizationService(cache_size=cache_size)
+    start = time.perf_counter()
+    for item_name, merchant_name in stream:
+        service.categorize_item(item_name, merchant_name)
+    return time.perf_counter() - start, service.cache_info()
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Benchmark the categorization LRU cache')
+    parser.add_argument('--lookups', type=int, default=200000, help='Items to categorize')
+    parser.add_argument('--distinct', type=int, default=50000, help='Distinct item/merchant pairs')
+    parser.add_argument('--skew', type=float, default=1.1, help='Zipf exponent')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000],
+                        help='Cache sizes to compare')
+    parser.add_argument('--seed', type=int, default=7, help='Random seed')
+
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+    stream = zipf_stream(make_catalogue(args.distinct, rng), args.lookups, args.skew, rng)
+
+    baseline, _ = run(0, stream)
+    print(f"🔍 {args.lookups} lookups over {args.distinct} distinct pairs (zipf s={args.skew})\n")
+    print(f"{'Cache size':>10} {'seconds':>8} {'hit ratio':>10} {'evictions':>10} {'speedup':>8}")
+    print("-" * 52)
+    print(f"{'off':>10} {baseline:>8.2f} {'-':>10} {'-':>10} {'1.00x':>8}")
+    for size in args.sizes:
+        seconds, info = run(size, stream)
+        print(f"{size:>10} {seconds:>8.2f} {info['hit_ratio']:>10.1%} {info['evictions']:>10} "
+              f"{baseline / seconds:>7.2f}x")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Categorization Rules Benchmark for Scan&Track
+Compares the keyword automaton in CategorizationService with the previous
+keyword-by-keyword scan as the rule set grows, and checks both pick the same
+categories
+
+Usage:
+    python benchmarks/categorization_rules.py --rules 10000 --items 100000
+"""
+
+import argparse
+import os
+import random
+import re
+import string
+import sys
+import time
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.categorization_service import CategorizationService
+
+def legacy_categorize(service, item_name, merchant_name=None):
+    """The previous approach: one substring test per keyword, then one regex per category"""
+    text_to_analyze = f"{item_name} {merchant_name or ''}".lower()
+    for category, keywords in service.category_keywords.items():
+        for keyword in keywords:
+            if keyword.lower() in text_to_analyze:
+                return category
+    for category, words in service.category_patterns.items():
+        pattern = r'\b(' + '|'.join(re.escape(word) for word in words) + r')\b'
+        if re.search(pattern, item_name.lower()):
+            return category
+    return "Other"
+
+def random_word(rng):
+    return ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 10)))
+
+def grow_rules(service, total_rules, rng):
+    """Pad the built-in rules with synthetic keywords and patterns, split over the categories"""
+    categories = list(service.category_keywords)
+    existing = sum(len(words) for words in service.category_keywords.values())
+    existing += sum(len(words) for words in service.category_patterns.values())
+    for index in range(max(total_rules - existing, 0)):
+        rules = service.category_keywords if index % 2 else service.category_patterns
+        rules[categories[index % len(categories)]].append(random_word(rng))
+    service.reload_rules()
+
+def make_items(service, count, rng):
+    """Item and merchant names, some containing rule words and most not"""
+    rule_words = [word for words in service.category_patterns.values() for word in words]
+    merchants = ["Corner Store", "ACME", None, "Harbour Deli", "QuickMart"]
+    items = []
+    for _ in range(count):
+        words = [random_word(rng) for _ in range(rng.randint(1, 3))]
+        if rng.random() < 0.3:
+            words.insert(rng.randrange(len(words) + 1), rng.choice(rule_words))
+        items.append((' '.join(words).title(), rng.choice(merchants)))
+    return items
+
+def time_run(categorize, items):
+    start = time.perf_counter()
+    results = [categorize(item_name, merchant_name) for item_name, merchant_name in items]
+    return time.perf_counter() - start, results
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Benchmark rule-based categorization')
+    parser.add_argument('--rules', type=int, default=10000, help='Total keyword and pattern rules')
+    parser.add_argument('--items', type=int, default=100000, help='Items to categorize')
+    parser.add_argument('--legacy-items', type=int, default=2000,
+                        help='Items timed with the previous scan (it is extrapolated from these)')
+    parser.add_argument('--seed', type=int, default=7, help='Random seed')
+
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    service = CategorizationService()
+    start = time.perf_counter()
+    grow_rules(service, args.rules, rng)
+    print(f"🔧 Compiled {args.rules} rules into {len(service._automaton)} automaton states "
+          f"in {time.perf_counter() - start:.2f}s")
+
+    items = make_items(service, args.items, rng)
+    automaton_seconds, results = time_run(service.categorize_item, items)
+
+    sample = items[:args.legacy_items]
+    legacy_seconds, legacy_results = time_run(lambda item, merchant: legacy_categorize(service, item, merchant), sample)
+    if legacy_results != results[:len(sample)]:
+        print("❌ Automaton and previous scan disagree")
+        return 1
+    legacy_estimate = legacy_seconds / len(sample) * len(items)
+
+    print(f"\n{'Method':<16} {'total s':>9} {'µs/item':>9}")
+    print("-" * 36)
+    print(f"{'automaton':<16} {automaton_seconds:>9.2f} {automaton_seconds / len(items) * 1e6:>9.1f}")
+    print(f"{'previous scan':<16} {legacy_estimate:>9.2f} {legacy_seconds / len(sample) * 1e6:>9.1f}"
+          f"  (extrapolated from {len(sample)} items)")
+    print(f"\n🚀 Speedup: {legacy_estimate / automaton_seconds:.1f}x, "
+          f"{sum(result != 'Other' for result in results)} of {len(items)} items categorized")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
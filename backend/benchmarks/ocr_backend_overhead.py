@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+OCR Backend Overhead Benchmark for Scan&Track
+Compares per-call latency of the pytesseract (subprocess per call) and
+tesserocr (persistent engine) backends on small images, where process
+startup and model loading dominate
+
+Usage:
+    python benchmarks/ocr_backend_overhead.py --calls 50
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+from PIL import Image, ImageDraw
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.ocr_service import PytesseractBackend, TesserocrBackend, TESSEROCR_AVAILABLE
+
+def make_line_image(width):
+    """Render a single receipt line onto a white grayscale image"""
+    image = Image.new('L', (width, 40), 255)
+    ImageDraw.Draw(image).text((5, 12), "COFFEE LATTE 4.50", fill=0)
+    return image
+
+def time_calls(backend, image, calls):
+    """Return per-call latencies in ms, after one warm-up call"""
+    backend.image_to_string(image)
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        backend.image_to_string(image)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Measure per-call OCR backend overhead')
+    parser.add_argument('--calls', type=int, default=50, help='Calls per backend and size')
+    parser.add_argument('--widths', type=int, nargs='+', default=[100, 200, 400, 800],
+                        help='Image widths in pixels')
+    parser.add_argument('--threads', type=int, default=1, help='Tesseract threads per call')
+
+    args = parser.parse_args()
+    # Read by Tesseract when it loads, as in the OCR worker processes
+    os.environ["OMP_THREAD_LIMIT"] = str(args.threads)
+
+    backends = [PytesseractBackend()]
+    if TESSEROCR_AVAILABLE:
+        backends.append(TesserocrBackend())
+    else:
+        print("⚠️  tesserocr not installed, only measuring pytesseract")
+
+    print(f"🚀 {args.calls} calls per backend and image size\n")
+    print(f"{'Backend':<12} {'Width':>6} {'p50 ms':>8} {'mean ms':>8}")
+    print("-" * 38)
+
+    medians = {}
+    for width in args.widths:
+        image = make_line_image(width)
+        for backend in backends:
+            latencies = time_calls(backend, image, args.calls)
+            medians[(backend.name, width)] = statistics.median(latencies)
+            print(f"{backend.name:<12} {width:>6} {statistics.median(latencies):>8.1f} "
+                  f"{statistics.mean(latencies):>8.1f}")
+
+    if TESSEROCR_AVAILABLE:
+        print("\n📉 Per-call overhead removed by the persistent engine (p50)")
+        for width in args.widths:
+            saved = medians[("pytesseract", width)] - medians[("tesserocr", width)]
+            print(f"  {width:>4}px: {saved:.1f} ms")
+
+    for backend in backends:
+        backend.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Preprocessing Profile Benchmark for Scan&Track
+Runs OCR over a folder of sample receipts with each preprocessing profile and
+reports seconds per receipt, per-step cost and extracted-total accuracy
+
+Expected totals are read from a CSV with `filename,total` columns:
+    python benchmarks/preprocessing_profiles.py samples/ --truth samples/totals.csv
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.image_preprocessing import PREPROCESSING_PROFILES
+from app.services.ocr_service import OCRService
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.tiff'}
+
+def load_truth(truth_file):
+    """Load expected totals keyed by filename"""
+    if not truth_file:
+        return {}
+    with open(truth_file, newline='', encoding='utf-8') as f:
+        return {row['filename']: float(row['total']) for row in csv.DictReader(f)}
+
+def benchmark_profile(profile, image_files, truth):
+    """OCR every image with one profile and collect timings and accuracy"""
+    ocr_service = OCRService(preprocessing_profile=profile)
+    step_totals = defaultdict(float)
+    correct = 0
+    scored = 0
+    failures = 0
+
+    start = time.perf_counter()
+    for image_file in image_files:
+        try:
+            receipt_data = ocr_service.extract_receipt_data(str(image_file))
+        except Exception:
+            failures += 1
+            continue
+
+        for step, ms in ocr_service.last_timings.items():
+            step_totals[step] += ms
+
+        expected = truth.get(image_file.name)
+        if expected is not None:
+            scored += 1
+            total = receipt_data.get('total_amount')
+            if total is not None and abs(total - expected) < 0.01:
+                correct += 1
+    elapsed = time.perf_counter() - start
+
+    processed = len(image_files) - failures
+    return {
+        'profile': profile,
+        'seconds_per_receipt': elapsed / len(image_files),
+        'accuracy': correct / scored if scored else None,
+        'failures': failures,
+        'steps': {step: total / max(processed, 1) for step, total in step_totals.items()}
+    }
+
+def print_report(results):
+    """Print one row per profile plus the per-step breakdown"""
+    print(f"\n{'Profile':<10} {'s/receipt':>10} {'total acc.':>11} {'failed':>7}")
+    print("-" * 42)
+    for result in results:
+        accuracy = f"{result['accuracy']:.1%}" if result['accuracy'] is not None else "n/a"
+        print(f"{result['profile']:<10} {result['seconds_per_receipt']:>10.3f} {accuracy:>11} {result['failures']:>7}")
+
+    print("\n⏱️  Average step cost (ms per receipt)")
+    for result in results:
+        steps = ", ".join(f"{step} {ms:.1f}" for step, ms in result['steps'].items())
+        print(f"  {result['profile']:<10} {steps}")
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Benchmark OCR preprocessing profiles')
+    parser.add_argument('input_dir', help='Directory containing sample receipt images')
+    parser.add_argument('--truth', help='CSV file with filename,total columns')
+    parser.add_argument('--profiles', nargs='+', default=list(PREPROCESSING_PROFILES),
+                        choices=list(PREPROCESSING_PROFILES), help='Profiles to compare')
+
+    args = parser.parse_args()
+
+    image_files = sorted(
+        path for path in Path(args.input_dir).iterdir()
+        if path.suffix.lower() in IMAGE_EXTENSIONS
+    )
+    if not image_files:
+        print(f"❌ No image files found in '{args.input_dir}'")
+        return 1
+
+    truth = load_truth(args.truth)
+    print(f"🔍 Benchmarking {len(args.profiles)} profiles over {len(image_files)} receipts")
+
+    results = [benchmark_profile(profile, image_files, truth) for profile in args.profiles]
+    print_report(results)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
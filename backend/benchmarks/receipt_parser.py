@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Receipt Parser Benchmark for Scan&Track
+Compares the single-pass receipt parser with the previous approach of one
+regex scan per field on large synthetic receipts (long invoices), and checks
+that both produce the same result
+
+Usage:
+    python benchmarks/receipt_parser.py --lines 1000 5000 20000
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.receipt_parser import parse_receipt_text
+
+ITEM_NAMES = ["Coffee", "Sandwich", "Milk 2%", "Bread", "USB Cable", "Notebook", "Shampoo",
+              "Bananas", "Printer Paper", "Batteries AA", "Chicken Breast", "Orange Juice"]
+
+def legacy_parse(text):
+    """The previous parser: every field rescans the whole text"""
+    merchant_name = None
+    for line in text.split('\n')[:5]:
+        line = line.strip()
+        if line and not re.match(r'^\d+$', line):
+            merchant_name = line
+            break
+
+    total_amount = None
+    for pattern in [r'total[:\s]*\$?(\d+\.?\d*)', r'TOTAL[:\s]*\$?(\d+\.?\d*)',
+                    r'amount[:\s]*\$?(\d+\.?\d*)', r'AMOUNT[:\s]*\$?(\d+\.?\d*)']:
+        matches = re.findall(pattern, text, re.IGNORECASE)
+        if matches:
+            total_amount = float(matches[-1])
+            break
+    if total_amount is None:
+        matches = re.findall(r'\$(\d+\.?\d*)', text)
+        if matches:
+            total_amount = float(matches[-1])
+
+    purchase_date = None
+    for pattern in [r'\d{1,2}/\d{1,2}/\d{4}', r'\d{1,2}-\d{1,2}-\d{4}',
+                    r'\d{4}-\d{1,2}-\d{1,2}', r'\d{1,2}\s+\w+\s+\d{4}']:
+        matches = re.findall(pattern, text)
+        if matches:
+            purchase_date = matches[0]
+            break
+
+    items = []
+    for line in text.split('\n'):
+        line = line.strip()
+        if re.search(r'\$?\d+\.?\d*', line) and len(line) > 5:
+            price_match = re.search(r'\$?(\d+\.?\d*)', line)
+            if price_match:
+                price = float(price_match.group(1))
+                item_name = line[:price_match.start()].strip()
+                if item_name and price > 0:
+                    items.append({"item_name": item_name, "quantity": 1.0, "unit_price": price,
+                                  "total_price": price, "category": None})
+
+    return {"merchant_name": merchant_name, "total_amount": total_amount,
+            "purchase_date": purchase_date, "items": items}
+
+def make_receipt(lines, rng):
+    """Build a long receipt: header, item lines with prices, subtotal/tax/total footer"""
+    body = ["WHOLESALE SUPPLY CO", "42 Harbour Road", "Invoice #88231", "Date: 2024-03-07", ""]
+    for _ in range(lines):
+        body.append(f"  {rng.choice(ITEM_NAMES)} x{rng.randint(1, 9)}   ${rng.uniform(0.5, 99):.2f}")
+    body += ["", f"Subtotal: ${rng.uniform(1000, 9000):.2f}", "Tax 8%", "  $312.40",
+             "TOTAL", f"${rng.uniform(1000, 9999):.2f}", "Thank you!"]
+    return "\n".join(body)
+
+def time_parser(parser, text, repeat):
+    """Best-of-N wall time in ms"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parser(text)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Benchmark the single-pass receipt parser')
+    parser.add_argument('--lines', type=int, nargs='+', default=[100, 1000, 5000, 20000],
+                        help='Item lines per synthetic receipt')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per parser, best is kept')
+    parser.add_argument('--seed', type=int, default=7, help='Random seed')
+
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    print(f"{'Lines':>7} {'legacy ms':>10} {'single-pass ms':>15} {'speedup':>8}")
+    print("-" * 44)
+    for lines in args.lines:
+        text = make_receipt(lines, rng)
+        if parse_receipt_text(text) != legacy_parse(text):
+            print(f"❌ Parsers disagree on the {lines}-line receipt")
+            return 1
+        legacy_ms = time_parser(legacy_parse, text, args.repeat)
+        new_ms = time_parser(parse_receipt_text, text, args.repeat)
+        print(f"{lines:>7} {legacy_ms:>10.2f} {new_ms:>15.2f} {legacy_ms / new_ms:>7.2f}x")
+
+    print("\n✅ Both parsers produced identical results")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
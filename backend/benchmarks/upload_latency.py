@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Upload Latency Benchmark for Scan&Track
+Measures GET /api/receipts latency while receipt uploads are being processed
+
+Start the API first (e.g. `OCR_WORKERS=4 uvicorn app.main:app`), then run:
+    python benchmarks/upload_latency.py sample_receipt.jpg --uploads 8
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+import httpx
+
+async def probe_receipts(client, stop_event, interval):
+    """Repeatedly fetch the receipt list and record each latency in ms"""
+    latencies = []
+    while not stop_event.is_set():
+        start = time.perf_counter()
+        response = await client.get("/api/receipts/", params={"limit": 20})
+        latencies.append((time.perf_counter() - start) * 1000)
+        response.raise_for_status()
+        await asyncio.sleep(interval)
+    return latencies
+
+async def upload_receipt(client, filename, image_data):
+    """Upload a single receipt and return the elapsed time in seconds"""
+    start = time.perf_counter()
+    response = await client.post(
+        "/api/receipts/upload",
+        files={"file": (filename, image_data, "application/octet-stream")}
+    )
+    response.raise_for_status()
+    return time.perf_counter() - start
+
+async def run_scenario(base_url, filename, image_data, uploads, probe_seconds, interval):
+    """Probe list latency while `uploads` receipts are processed concurrently"""
+    async with httpx.AsyncClient(base_url=base_url, timeout=300) as client:
+        stop_event = asyncio.Event()
+        prober = asyncio.create_task(probe_receipts(client, stop_event, interval))
+
+        if uploads:
+            upload_times = await asyncio.gather(
+                *(upload_receipt(client, filename, image_data) for _ in range(uploads))
+            )
+        else:
+            upload_times = []
+            await asyncio.sleep(probe_seconds)
+
+        stop_event.set()
+        latencies = await prober
+
+    return latencies, upload_times
+
+def percentile(values, pct):
+    """Return the pct-th percentile of values"""
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100, method="inclusive")[pct - 1]
+
+def print_report(label, latencies, upload_times):
+    """Print latency percentiles for one scenario"""
+    print(f"\n📊 {label}")
+    print("=" * 50)
+    print(f"List requests:     {len(latencies)}")
+    print(f"List p50 latency:  {percentile(latencies, 50):.1f} ms")
+    print(f"List p99 latency:  {percentile(latencies, 99):.1f} ms")
+    print(f"List max latency:  {max(latencies):.1f} ms")
+    if upload_times:
+        print(f"Uploads completed: {len(upload_times)}")
+        print(f"Upload wall time:  {max(upload_times):.2f} s")
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Measure list latency under upload load')
+    parser.add_argument('image_path', help='Receipt image to upload')
+    parser.add_argument('--base-url', default='http://localhost:8000', help='API base URL')
+    parser.add_argument('--uploads', '-n', type=int, default=8, help='Concurrent uploads')
+    parser.add_argument('--baseline-seconds', type=float, default=5.0,
+                        help='Duration of the idle baseline run')
+    parser.add_argument('--interval', type=float, default=0.05,
+                        help='Delay between list probes in seconds')
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.image_path):
+        print(f"❌ Image file '{args.image_path}' not found")
+        return 1
+
+    with open(args.image_path, 'rb') as f:
+        image_data = f.read()
+    filename = os.path.basename(args.image_path)
+
+    print(f"🚀 Benchmarking {args.base_url} with {args.uploads} concurrent uploads")
+
+    latencies, _ = asyncio.run(run_scenario(
+        args.base_url, filename, image_data, 0, args.baseline_seconds, args.interval
+    ))
+    print_report("Idle baseline", latencies, [])
+
+    latencies, upload_times = asyncio.run(run_scenario(
+        args.base_url, filename, image_data, args.uploads, 0, args.interval
+    ))
+    print_report(f"Under load ({args.uploads} uploads)", latencies, upload_times)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
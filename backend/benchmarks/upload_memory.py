@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Upload Memory Benchmark for Scan&Track
+Compares tracemalloc peak memory of whole-file and streaming upload handling
+
+Usage:
+    python benchmarks/upload_memory.py --uploads 50 --size-mb 10
+"""
+
+import argparse
+import asyncio
+import io
+import os
+import sys
+import tempfile
+import tracemalloc
+
+from fastapi import UploadFile
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.upload_storage import store_upload
+
+def make_upload(size):
+    """Build an UploadFile spooled to disk, like Starlette hands to the endpoint"""
+    spooled = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    chunk = os.urandom(1024 * 1024)
+    remaining = size
+    while remaining > 0:
+        spooled.write(chunk[:min(remaining, len(chunk))])
+        remaining -= len(chunk)
+    spooled.seek(0)
+    return UploadFile(file=spooled, filename="receipt.jpg")
+
+async def whole_file_upload(upload, upload_dir, ocr_seconds):
+    """Previous behaviour: read everything, write it, then hand OCR a BytesIO copy"""
+    file_content = await upload.read()
+    file_path = os.path.join(upload_dir, f"{id(upload)}.jpg")
+    with open(file_path, "wb") as buffer:
+        buffer.write(file_content)
+    image_stream = io.BytesIO(file_content)
+    await asyncio.sleep(ocr_seconds)  # buffers stay alive while OCR runs
+    image_stream.close()
+
+async def streaming_upload(upload, upload_dir, ocr_seconds):
+    """Current behaviour: stream chunks to disk and hand OCR the file path"""
+    stored = await store_upload(upload, "jpg", max_size=upload.size or 2 ** 40, upload_dir=upload_dir)
+    await asyncio.sleep(ocr_seconds)  # only the path is held while OCR runs
+    return stored.file_path
+
+async def run_concurrently(handler, uploads, upload_dir, ocr_seconds):
+    await asyncio.gather(*(handler(upload, upload_dir, ocr_seconds) for upload in uploads))
+
+def measure(label, handler, count, size, ocr_seconds):
+    """Return the tracemalloc peak in MB for `count` concurrent uploads"""
+    uploads = [make_upload(size) for _ in range(count)]
+    with tempfile.TemporaryDirectory() as upload_dir:
+        tracemalloc.start()
+        asyncio.run(run_concurrently(handler, uploads, upload_dir, ocr_seconds))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    for upload in uploads:
+        upload.file.close()
+
+    peak_mb = peak / (1024 * 1024)
+    print(f"{label:<12} peak traced memory: {peak_mb:8.1f} MB")
+    return peak_mb
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Measure peak memory of concurrent uploads')
+    parser.add_argument('--uploads', '-n', type=int, default=50, help='Concurrent uploads')
+    parser.add_argument('--size-mb', type=float, default=10, help='Size of each upload in MB')
+    parser.add_argument('--ocr-seconds', type=float, default=0.2,
+                        help='Simulated OCR time during which buffers are held')
+
+    args = parser.parse_args()
+    size = int(args.size_mb * 1024 * 1024)
+
+    print(f"🚀 {args.uploads} concurrent uploads of {args.size_mb:g} MB\n")
+    before = measure("whole-file", whole_file_upload, args.uploads, size, args.ocr_seconds)
+    after = measure("streaming", streaming_upload, args.uploads, size, args.ocr_seconds)
+    print(f"\n📉 Peak memory reduced {before / max(after, 0.001):.0f}x")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,143 +1,377 @@
 #!/usr/bin/env python3
 """
 Batch Receipt Processor for Scan&Track
-Processes multiple receipt images in a directory
+Processes multiple receipt images in a directory, optionally in a pool of worker
+processes, writing one JSON Lines result per receipt as it completes.
+A manifest next to the output records every processed file, so a rerun skips
+unchanged files that already succeeded and resumes where a crashed run stopped.
+
+Usage:
+    python examples/batch_processor.py receipts/ -o results.jsonl
+    python examples/batch_processor.py receipts/ -o results.jsonl --workers 8 --ordered --recursive
+    python examples/batch_processor.py receipts/ -o results.jsonl --retry-failed
 """
 
 import os
 import sys
 import json
+import time
+import hashlib
+import sqlite3
 import argparse
+import multiprocessing
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
 from pathlib import Path
 from datetime import datetime
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app.services.ocr_service import OCRService
-from app.services.categorization_service import CategorizationService
+from app.services.ocr_executor import init_worker_process, process_receipt
+
+# Supported image extensions
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.tiff'}
+
+class BatchSummary:
+    """Running totals, updated as each result is written instead of rebuilt from all results"""
+
+    def __init__(self):
+        self.processed = 0
+        self.successful = 0
+        self.failed = 0
+        self.total_amount = 0.0
+        self.categories = Counter()
+
+    def add(self, result):
+        self.processed += 1
+        if result['status'] != 'success':
+            self.failed += 1
+            return
+        self.successful += 1
+        self.total_amount += result.get('total_amount') or 0
+        for item in result.get('items', []):
+            self.categories[item.get('category') or 'Uncategorized'] += 1
+
+def file_hash(path):
+    """SHA-256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def process_file(path):
+    """Worker task: stat, read and hash a file once, then OCR and categorize those same bytes
+
+    Returns the file's size, mtime and SHA-256 with either the extracted data or the error.
+    """
+    outcome = {'size': None, 'mtime_ns': None, 'sha256': None}
+    try:
+        # Stat before reading: a file changed in between looks changed on the next run too
+        stat = os.stat(path)
+        with open(path, 'rb') as f:
+            image_data = f.read()
+        outcome.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns, sha256=hashlib.sha256(image_data).hexdigest())
+        outcome['data'] = process_receipt(image_data)
+    except Exception as e:
+        outcome['error'] = str(e)
+    return outcome
+
+class BatchManifest:
+    """SQLite record of each input file's size, mtime, content hash, status and result line
+
+    result_offset is the byte offset of the file's latest line in the JSON Lines output;
+    lines written for a file before it was re-processed are superseded.
+    """
+
+    def __init__(self, manifest_file):
+        self.connection = sqlite3.connect(manifest_file)
+        # WAL without a sync per commit keeps recording one row per receipt cheap
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                sha256 TEXT NOT NULL,
+                status TEXT NOT NULL,
+                result_offset INTEGER NOT NULL,
+                processed_at TEXT NOT NULL
+            )
+        """)
+        self.files = {
+            path: (size, mtime_ns, sha256, status)
+            for path, size, mtime_ns, sha256, status
+            in self.connection.execute("SELECT path, size, mtime_ns, sha256, status FROM files")
+        }
+
+    def select(self, entries, retry_failed=False):
+        """Files to process: new, changed or failed ones, or only failed ones with retry_failed"""
+        selected = []
+        for entry in entries:
+            known = self.files.get(os.path.abspath(entry.path))
+            if known is None or known[3] != 'success':
+                if known is not None or not retry_failed:
+                    selected.append(entry)
+                continue
+            if retry_failed:
+                continue
+
+            stat = entry.stat()
+            if (stat.st_size, stat.st_mtime_ns) == known[:2]:
+                continue
+            # Touched or copied but identical content still counts as done
+            if file_hash(entry.path) == known[2]:
+                self._update_stat(entry, stat)
+            else:
+                selected.append(entry)
+        return selected
+
+    def matches_output(self, output_file):
+        """Whether the output still holds every recorded line: it exists and reaches past the last offset"""
+        last_offset = self.connection.execute("SELECT MAX(result_offset) FROM files").fetchone()[0]
+        if last_offset is None:
+            return True
+        try:
+            return os.path.getsize(output_file) > last_offset
+        except OSError:
+            return False
+
+    def reset(self):
+        """Forget every recorded file, so all of them are processed into a new output"""
+        self.connection.execute("DELETE FROM files")
+        self.connection.commit()
+        self.files = {}
+
+    def _update_stat(self, entry, stat):
+        path = os.path.abspath(entry.path)
+        self.connection.execute("UPDATE files SET size = ?, mtime_ns = ? WHERE path = ?",
+                                (stat.st_size, stat.st_mtime_ns, path))
+        self.connection.commit()
+        self.files[path] = (stat.st_size, stat.st_mtime_ns) + self.files[path][2:]
+
+    def record(self, entry, outcome, result, result_offset):
+        """Record a file once its result line is in the output, as the worker saw it"""
+        if outcome.get('sha256') is None:
+            # Unreadable or gone: nothing to compare against, so the next run tries it again
+            return
+        path = os.path.abspath(entry.path)
+        self.connection.execute(
+            "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (path, outcome['size'], outcome['mtime_ns'], outcome['sha256'], result['status'], result_offset,
+             result['processed_at'])
+        )
+        self.connection.commit()
+        self.files[path] = (outcome['size'], outcome['mtime_ns'], outcome['sha256'], result['status'])
+
+    def close(self):
+        self.connection.close()
 
 class BatchProcessor:
     """Process multiple receipt images in batch"""
-    
-    def __init__(self):
-        self.ocr_service = OCRService()
-        self.categorization_service = CategorizationService()
-        self.results = []
-    
-    def process_directory(self, input_dir, output_file=None):
-        """Process all images in a directory"""
-        input_path = Path(input_dir)
-        
-        if not input_path.exists():
+
+    def __init__(self, workers=0, ordered=False, max_in_flight=None, verbose=False):
+        # 0 workers processes receipts one at a time in this process
+        self.workers = workers
+        self.ordered = ordered
+        # Bounds both the queued work and, with ordered output, the results held back for order
+        self.max_in_flight = max_in_flight or max(workers, 1) * 2
+        self.verbose = verbose
+        self.summary = BatchSummary()
+
+    def find_images(self, input_dir, recursive=False):
+        """Image files in input_dir, and its subdirectories when recursive, from one scandir walk"""
+        if not Path(input_dir).is_dir():
             raise FileNotFoundError(f"Directory '{input_dir}' not found")
-        
-        # Supported image extensions
-        image_extensions = {'.jpg', '.jpeg', '.png', '.bmp', '.tiff'}
-        
-        # Find all image files
+
         image_files = []
-        for ext in image_extensions:
-            image_files.extend(input_path.glob(f"*{ext}"))
-            image_files.extend(input_path.glob(f"*{ext.upper()}"))
-        
+        directories = [input_dir]
+        while directories:
+            with os.scandir(directories.pop()) as entries:
+                for entry in entries:
+                    if entry.is_file() and os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS:
+                        image_files.append(entry)
+                    elif recursive and entry.is_dir(follow_symlinks=False):
+                        directories.append(entry.path)
+        return sorted(image_files, key=lambda entry: entry.path)
+
+    def process_directory(self, input_dir, output_file=None, recursive=False, retry_failed=False):
+        """Process all images in a directory, writing each result as soon as it is ready"""
+        if retry_failed and not output_file:
+            raise ValueError("--retry-failed needs the --output file of the earlier run")
+        image_files = self.find_images(input_dir, recursive)
+
         if not image_files:
             print(f"❌ No image files found in '{input_dir}'")
-            return
-        
-        print(f"🔍 Found {len(image_files)} image files to process")
-        
-        # Process each image
-        for i, image_file in enumerate(image_files, 1):
-            print(f"\n📄 Processing {i}/{len(image_files)}: {image_file.name}")
-            
+            return self.summary
+
+        manifest = BatchManifest(f"{output_file}.manifest.sqlite") if output_file else None
+        try:
+            if manifest and manifest.files and not manifest.matches_output(output_file):
+                # Skipped files would point at results that are no longer there
+                print(f"⚠️  '{output_file}' is missing or shorter than its manifest records, processing everything again")
+                manifest.reset()
+                retry_failed = False
+            # Earlier results stay in the output of a resumed run; a new manifest starts a new output
+            resuming = bool(manifest and manifest.files)
+            if manifest:
+                found = len(image_files)
+                image_files = manifest.select(image_files, retry_failed)
+                if found > len(image_files):
+                    print(f"⏭️  Skipping {found - len(image_files)} of {found} files already processed")
+
+            mode = f"{self.workers} worker processes" if self.workers > 0 else "this process"
+            print(f"🔍 Found {len(image_files)} image files to process in {mode}")
+
+            self.summary = BatchSummary()
+            output = open(output_file, 'ab' if resuming else 'wb') if output_file else None
+            start = time.perf_counter()
             try:
-                # Read image
-                with open(image_file, 'rb') as f:
-                    image_data = f.read()
-                
-                # Extract data
-                receipt_data = self.ocr_service.extract_receipt_data(image_data)
-                categorized_data = self.categorization_service.categorize_receipt(receipt_data)
-                
-                # Add metadata
-                result = {
-                    'filename': image_file.name,
-                    'filepath': str(image_file),
-                    'processed_at': datetime.now().isoformat(),
-                    'merchant_name': categorized_data.get('merchant_name'),
-                    'total_amount': categorized_data.get('total_amount'),
-                    'purchase_date': categorized_data.get('purchase_date'),
-                    'raw_text': categorized_data.get('raw_text'),
-                    'items': categorized_data.get('items', []),
-                    'status': 'success'
-                }
-                
-                self.results.append(result)
-                print(f"✅ Successfully processed: {image_file.name}")
-                
-            except Exception as e:
-                error_result = {
-                    'filename': image_file.name,
-                    'filepath': str(image_file),
-                    'processed_at': datetime.now().isoformat(),
-                    'error': str(e),
-                    'status': 'error'
-                }
-                self.results.append(error_result)
-                print(f"❌ Error processing {image_file.name}: {str(e)}")
-        
-        # Save results
+                for image_file, outcome in self._outcomes(image_files):
+                    result = self._result(image_file, outcome)
+                    self.summary.add(result)
+                    if output:
+                        offset = output.tell()
+                        output.write((json.dumps(result, ensure_ascii=False, default=str) + "\n").encode('utf-8'))
+                        # The line must reach the file before the manifest marks it processed
+                        output.flush()
+                        manifest.record(image_file, outcome, result, offset)
+                    self._report(result, len(image_files), start)
+            finally:
+                if output:
+                    output.close()
+        finally:
+            if manifest:
+                manifest.close()
+
         if output_file:
-            self.save_results(output_file)
-        
-        # Print summary
+            print(f"\n💾 Results saved to: {output_file}")
         self.print_summary()
-    
-    def save_results(self, output_file):
-        """Save results to JSON file"""
-        with open(output_file, 'w') as f:
-            json.dump(self.results, f, indent=2)
-        print(f"\n💾 Results saved to: {output_file}")
-    
+        return self.summary
+
+    def _outcomes(self, image_files):
+        """Yield (image file, process_file outcome)"""
+        if self.workers <= 0:
+            for image_file in image_files:
+                yield image_file, process_file(image_file.path)
+            return
+
+        # Spawned workers start clean, as in the API's OCR executor; they read images from disk themselves
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=init_worker_process) as pool:
+            if self.ordered:
+                yield from self._ordered(pool, image_files)
+            else:
+                yield from self._as_completed(pool, image_files)
+
+    def _ordered(self, pool, image_files):
+        pending = deque()
+        for image_file in image_files:
+            pending.append((image_file, pool.submit(process_file, image_file.path)))
+            if len(pending) >= self.max_in_flight:
+                yield self._outcome(*pending.popleft())
+        while pending:
+            yield self._outcome(*pending.popleft())
+
+    def _as_completed(self, pool, image_files):
+        pending = {}
+        for image_file in image_files:
+            pending[pool.submit(process_file, image_file.path)] = image_file
+            if len(pending) >= self.max_in_flight:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield self._outcome(pending.pop(future), future)
+        for future in as_completed(list(pending)):
+            yield self._outcome(pending.pop(future), future)
+
+    @staticmethod
+    def _outcome(image_file, future):
+        try:
+            return image_file, future.result()
+        except Exception as e:
+            # The worker itself died, e.g. a broken process pool
+            return image_file, {'error': str(e)}
+
+    @staticmethod
+    def _result(image_file, outcome):
+        if 'error' in outcome:
+            return {
+                'filename': image_file.name,
+                'filepath': image_file.path,
+                'processed_at': datetime.now().isoformat(),
+                'error': outcome['error'],
+                'status': 'error'
+            }
+        data = outcome['data']
+        return {
+            'filename': image_file.name,
+            'filepath': image_file.path,
+            'processed_at': datetime.now().isoformat(),
+            'merchant_name': data.get('merchant_name'),
+            'total_amount': data.get('total_amount'),
+            'purchase_date': data.get('purchase_date'),
+            'raw_text': data.get('raw_text'),
+            'items': data.get('items', []),
+            'status': 'success'
+        }
+
+    def _report(self, result, total, start):
+        """Per-file lines with --verbose, otherwise a progress line with throughput and ETA"""
+        done = self.summary.processed
+        if self.verbose:
+            if result['status'] == 'success':
+                print(f"✅ {done}/{total} {result['filename']}")
+            else:
+                print(f"❌ {done}/{total} {result['filename']}: {result['error']}")
+            return
+
+        # Rewrite one line on a terminal; print every 1% when redirected to a log
+        interactive = sys.stdout.isatty()
+        if not interactive and done != total and done % max(total // 100, 1):
+            return
+        elapsed = time.perf_counter() - start
+        rate = done / elapsed if elapsed else 0.0
+        eta = (total - done) / rate if rate else 0.0
+        line = (f"📄 {done}/{total} ({done / total:.0%}) {rate:.1f} receipts/s, "
+                f"{self.summary.failed} failed, ETA {eta / 60:.1f} min")
+        print(f"\r{line}" if interactive else line, end="\n" if done == total or not interactive else "", flush=True)
+
     def print_summary(self):
         """Print processing summary"""
-        successful = len([r for r in self.results if r['status'] == 'success'])
-        failed = len([r for r in self.results if r['status'] == 'error'])
-        total_amount = sum(r.get('total_amount', 0) for r in self.results if r['status'] == 'success')
-        
+        summary = self.summary
+
         print(f"\n📊 BATCH PROCESSING SUMMARY")
         print("=" * 40)
-        print(f"Total files processed: {len(self.results)}")
-        print(f"Successful: {successful}")
-        print(f"Failed: {failed}")
-        print(f"Total amount extracted: ${total_amount:.2f}")
-        
-        if successful > 0:
-            # Category breakdown
-            categories = {}
-            for result in self.results:
-                if result['status'] == 'success':
-                    for item in result.get('items', []):
-                        category = item.get('category', 'Uncategorized')
-                        categories[category] = categories.get(category, 0) + 1
-            
+        print(f"Total files processed: {summary.processed}")
+        print(f"Successful: {summary.successful}")
+        print(f"Failed: {summary.failed}")
+        print(f"Total amount extracted: ${summary.total_amount:.2f}")
+
+        if summary.categories:
             print(f"\n📈 Category Breakdown:")
-            for category, count in sorted(categories.items(), key=lambda x: x[1], reverse=True):
+            for category, count in summary.categories.most_common():
                 print(f"  {category}: {count} items")
 
 def main():
     """Main function"""
     parser = argparse.ArgumentParser(description='Batch Receipt Processor')
     parser.add_argument('input_dir', help='Directory containing receipt images')
-    parser.add_argument('--output', '-o', help='Output JSON file for results')
+    parser.add_argument('--output', '-o', help='Output JSON Lines file, one result per receipt')
+    parser.add_argument('--workers', '-w', type=int, default=0,
+                        help='Worker processes for OCR (default: 0, process in this process)')
+    parser.add_argument('--ordered', action='store_true', help='Write results in input order instead of as they complete')
+    parser.add_argument('--max-in-flight', type=int, help='Receipts queued or held for ordering at once (default: 2 per worker)')
+    parser.add_argument('--recursive', '-r', action='store_true', help='Also process images in subdirectories')
+    parser.add_argument('--retry-failed', action='store_true', help='Only re-process files that failed in earlier runs')
     parser.add_argument('--verbose', '-v', action='store_true', help='Verbose output')
-    
+
     args = parser.parse_args()
-    
+
     try:
-        processor = BatchProcessor()
-        processor.process_directory(args.input_dir, args.output)
+        processor = BatchProcessor(args.workers, args.ordered, args.max_in_flight, args.verbose)
+        processor.process_directory(args.input_dir, args.output, args.recursive, args.retry_failed)
         return 0
     except Exception as e:
         print(f"❌ Error: {str(e)}")
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """
 Database initialization script
-Creates tables and optionally seeds with sample data
+Applies the Alembic migrations and optionally seeds with sample data
 """
 
 import os
@@ -12,16 +12,19 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
 
 from app.database import engine, SessionLocal
+from app.migrations import upgrade_database
 from app.models.receipt import Receipt, ReceiptItem
+from app.services.receipt_store import create_receipt
+from app.services.spending_rollups import refresh_receipt_rollups
+from app.services.data_version import bump_data_version
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime, timedelta
 import random
 
 def create_tables():
-    """Create all database tables"""
-    from app.models.receipt import Base
-    Base.metadata.create_all(bind=engine)
-    print("✅ Database tables created successfully")
+    """Create or upgrade all database tables"""
+    upgrade_database(engine)
+    print("✅ Database schema is up to date")
 
 def seed_sample_data():
     """Add sample data for testing"""
@@ -86,26 +89,14 @@ def seed_sample_data():
         }
 
         # Create sample receipts
+        receipts = []
         for i in range(20):
             merchant = random.choice(merchants)
             purchase_date = datetime.now() - timedelta(days=random.randint(1, 90))
             
-            # Create receipt
-            receipt = Receipt(
-                filename=f"receipt_{i+1}.jpg",
-                file_path=f"uploads/sample_receipt_{i+1}.jpg",
-                merchant_name=merchant,
-                purchase_date=purchase_date,
-                raw_text=f"Sample receipt text for {merchant} on {purchase_date.strftime('%Y-%m-%d')}",
-                total_amount=0.0  # Will be calculated from items
-            )
-            
-            db.add(receipt)
-            db.flush()  # Get the receipt ID
-            
-            # Add items to receipt
+            # Build items first so the receipt total is known when it is inserted
             num_items = random.randint(1, 5)
-            total_amount = 0.0
+            items = []
             
             for j in range(num_items):
                 category = random.choice(list(sample_items.keys()))
@@ -113,24 +104,29 @@ def seed_sample_data():
                 
                 quantity = random.randint(1, 3)
                 unit_price = round(random.uniform(*item_template["price_range"]), 2)
-                total_price = round(unit_price * quantity, 2)
-                total_amount += total_price
-                
-                item = ReceiptItem(
-                    receipt_id=receipt.id,
-                    item_name=item_template["name"],
-                    quantity=quantity,
-                    unit_price=unit_price,
-                    total_price=total_price,
-                    category=category,
-                    description=f"Sample {category.lower()} item"
-                )
-                
-                db.add(item)
+                items.append({
+                    "item_name": item_template["name"],
+                    "quantity": quantity,
+                    "unit_price": unit_price,
+                    "total_price": round(unit_price * quantity, 2),
+                    "category": category,
+                    "description": f"Sample {category.lower()} item"
+                })
             
-            # Update receipt total
-            receipt.total_amount = round(total_amount, 2)
+            # Create receipt and its items with one bulk insert
+            receipts.append(create_receipt(
+                db,
+                items,
+                filename=f"receipt_{i+1}.jpg",
+                file_path=f"uploads/sample_receipt_{i+1}.jpg",
+                merchant_name=merchant,
+                purchase_date=purchase_date,
+                raw_text=f"Sample receipt text for {merchant} on {purchase_date.strftime('%Y-%m-%d')}",
+                total_amount=round(sum(item["total_price"] for item in items), 2)
+            ))
         
+        refresh_receipt_rollups(db, receipts)
+        bump_data_version(db)
         db.commit()
         print("✅ Sample data created successfully")
         
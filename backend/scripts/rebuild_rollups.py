@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Spending rollup maintenance script
+Rebuilds (backfills) the daily rollup tables the analytics endpoints read from,
+or with --check compares them against a fresh aggregation of receipts
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add the parent directory to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.database import SessionLocal
+from app.services.data_version import bump_data_version
+from app.services.spending_rollups import find_rollup_mismatches, rebuild_rollups
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Rebuild or verify the daily spending rollups')
+    parser.add_argument('--check', action='store_true', help='Only report rollups that differ from the receipts')
+    parser.add_argument('--show', type=int, default=20, help='Mismatches to print with --check')
+
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.check:
+            mismatches = find_rollup_mismatches(db)
+            if not mismatches:
+                print("✅ Rollups match the receipts")
+                return 0
+            print(f"❌ {len(mismatches)} rollup rows differ from the receipts")
+            for mismatch in mismatches[:args.show]:
+                key = " ".join(f"{name}={value}" for name, value in mismatch['key'].items())
+                print(f"   {mismatch['table']} {key}: expected {mismatch['expected']}, found {mismatch['actual']}")
+            print("   Run without --check to rebuild them")
+            return 1
+
+        counts = rebuild_rollups(db)
+        # Cached analytics were computed from the old rollups
+        bump_data_version(db)
+        db.commit()
+        print(f"✅ Rebuilt rollups for {counts['days']} days ({counts['category_days']} day/category rows)")
+        return 0
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Category model training script
+Fits the ML categorizer on the categorized items in receipt_items and saves it
+where the API and OCR workers load it from (CATEGORY_MODEL_PATH)
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add the parent directory to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.database import SessionLocal
+from app.services.ml_categorizer import CATEGORY_MODEL_PATH, MLCategorizer, load_training_samples
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Train the receipt item category model')
+    parser.add_argument('--output', default=CATEGORY_MODEL_PATH, help='Where to save the model')
+    parser.add_argument('--test-size', type=float, default=0.2, help='Share of items held out for accuracy')
+    parser.add_argument('--include-other', action='store_true', help='Also learn the "Other" category')
+
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        items, categories = load_training_samples(db, exclude_other=not args.include_other)
+    finally:
+        db.close()
+
+    print(f"📚 Loaded {len(items)} categorized items in {len(set(categories))} categories")
+    categorizer = MLCategorizer()
+    try:
+        metrics = categorizer.train(items, categories, test_size=args.test_size)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    if metrics['accuracy'] is not None:
+        print(f"🎯 Held-out accuracy: {metrics['accuracy']:.1%}")
+    categorizer.save(args.output)
+    print(f"✅ Model saved to {args.output}; restart the API to load it")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
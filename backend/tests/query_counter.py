@@ -0,0 +1,52 @@
+"""
+Query Counting Helpers for Scan&Track Tests
+Count the SQL statements an engine executes, to catch N+1 query regressions
+"""
+
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+class QueryCounter:
+    """Records every statement sent to the database while active"""
+
+    def __init__(self):
+        self.statements = []
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+@contextmanager
+def count_queries(engine):
+    """Count statements executed on engine inside the with block"""
+    counter = QueryCounter()
+    event.listen(engine, "before_cursor_execute", counter)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, "before_cursor_execute", counter)
+
+class QueryBudgetMixin:
+    """unittest mixin: assertQueryBudget fails when a block runs more statements than allowed,
+    assertLatencyBudget when it takes longer than allowed"""
+
+    @contextmanager
+    def assertQueryBudget(self, engine, budget):
+        with count_queries(engine) as counter:
+            yield counter
+        if counter.count > budget:
+            listing = "\n".join(f"  {statement}" for statement in counter.statements)
+            self.fail(f"Expected at most {budget} queries, got {counter.count}:\n{listing}")
+
+    @contextmanager
+    def assertLatencyBudget(self, budget_ms):
+        start = time.perf_counter()
+        yield
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if elapsed_ms > budget_ms:
+            self.fail(f"Expected at most {budget_ms} ms, took {elapsed_ms:.1f} ms")
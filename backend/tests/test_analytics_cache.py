@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Analytics Cache Tests for Scan&Track
+Tests for the write-invalidated analytics response cache
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+from datetime import datetime
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.main import app
+from app.api import analytics
+from app.database import async_session_override, get_async_db
+from app.models import Base
+from app.services.analytics_cache import AnalyticsCache, DatabaseCacheBackend, MemoryCacheBackend
+from app.services.data_version import bump_data_version
+from app.services.receipt_store import create_receipt
+from app.services.spending_rollups import refresh_receipt_rollups
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class TestAnalyticsCache(unittest.TestCase):
+    """Test cases for the analytics response cache"""
+
+    def setUp(self):
+        """Set up an isolated database and a fresh in-memory cache"""
+        self.db_dir = tempfile.TemporaryDirectory()
+        self.engine = create_engine(f"sqlite:///{os.path.join(self.db_dir.name, 'test.db')}")
+        Base.metadata.create_all(bind=self.engine)
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+
+        self.async_engine, override_get_async_db = async_session_override(str(self.engine.url))
+        app.dependency_overrides[get_async_db] = override_get_async_db
+        self.clock = FakeClock()
+        self.cache = AnalyticsCache(MemoryCacheBackend(max_size=8, clock=self.clock), ttl=60)
+        self.patch = patch.object(analytics, 'analytics_cache', self.cache)
+        self.patch.start()
+        self.client = TestClient(app)
+
+        db = self.SessionLocal()
+        try:
+            receipt = create_receipt(
+                db, [{"item_name": "Coffee", "unit_price": 4.0, "total_price": 4.0, "category": "Food & Dining"}],
+                filename="r.jpg", file_path="uploads/missing.jpg", total_amount=4.0, created_at=datetime.now()
+            )
+            refresh_receipt_rollups(db, [receipt])
+            db.commit()
+            self.receipt_id = receipt.id
+        finally:
+            db.close()
+
+    def tearDown(self):
+        """Tear down fixtures"""
+        self.patch.stop()
+        app.dependency_overrides.clear()
+        self.engine.dispose()
+        self.db_dir.cleanup()
+
+    def get_expenses(self, **headers):
+        response = self.client.get("/api/analytics/expenses?months=1", headers=headers)
+        self.assertEqual(response.status_code, 200)
+        return response.headers["X-Cache"], response.json()
+
+    def test_hit_until_a_receipt_write(self):
+        """Test that responses are reused until a write bumps the data version"""
+        self.assertEqual(self.get_expenses()[0], "MISS")
+        status, body = self.get_expenses()
+        self.assertEqual(status, "HIT")
+        self.assertEqual(body["total_expenses"], 4.0)
+        self.assertEqual(self.client.get("/api/analytics/expenses?months=2").headers["X-Cache"], "MISS")
+
+        response = self.client.put(f"/api/receipts/{self.receipt_id}", json={"total_amount": 9.0})
+        self.assertEqual(response.status_code, 200)
+
+        status, body = self.get_expenses()
+        self.assertEqual(status, "MISS")
+        self.assertEqual(body["total_expenses"], 9.0)
+
+    def test_no_cache_header_and_ttl(self):
+        """Test that Cache-Control: no-cache recomputes and entries expire after the TTL"""
+        self.get_expenses()
+        self.assertEqual(self.get_expenses(**{"Cache-Control": "no-cache"})[0], "REFRESH")
+        self.assertEqual(self.get_expenses()[0], "HIT")
+
+        self.clock.now += 61
+        self.assertEqual(self.get_expenses()[0], "MISS")
+
+        stats = self.client.get("/api/analytics/cache/stats").json()
+        self.assertEqual((stats["backend"], stats["hits"], stats["misses"], stats["refreshes"]), ("memory", 1, 2, 1))
+
+    def test_database_backend_is_shared(self):
+        """Test that workers sharing the database backend see each other's entries"""
+        worker_a = AnalyticsCache(DatabaseCacheBackend(), ttl=60)
+        worker_b = AnalyticsCache(DatabaseCacheBackend(), ttl=60)
+        db = self.SessionLocal()
+        try:
+            self.assertEqual(worker_a.get_or_compute(db, "totals", {"months": 1}, lambda: {"total": 4.0}),
+                             ({"total": 4.0}, "MISS"))
+            self.assertEqual(worker_b.get_or_compute(db, "totals", {"months": 1}, lambda: {"total": 0.0}),
+                             ({"total": 4.0}, "HIT"))
+
+            bump_data_version(db)
+            db.commit()
+            self.assertEqual(worker_b.get_or_compute(db, "totals", {"months": 1}, lambda: {"total": 5.0}),
+                             ({"total": 5.0}, "MISS"))
+            self.assertEqual(worker_b.stats(db)["entries"], 2)
+        finally:
+            db.close()
+
+    def test_disabled_cache(self):
+        """Test that the 'none' backend always recomputes"""
+        self.patch.stop()
+        self.patch = patch.object(analytics, 'analytics_cache', AnalyticsCache(None))
+        self.patch.start()
+        self.assertEqual(self.get_expenses()[0], "BYPASS")
+        self.assertEqual(self.get_expenses()[0], "BYPASS")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Batch Processor Tests for Scan&Track
+Tests for streaming JSON Lines results, running totals, the worker pool mode and
+the resumable manifest of the batch receipt processor
+"""
+
+import unittest
+import sys
+import os
+import io
+import json
+import hashlib
+import sqlite3
+import tempfile
+from contextlib import redirect_stdout
+from unittest.mock import patch
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'examples'))
+
+from app.services.ocr_service import OCRService
+import batch_processor
+from batch_processor import BatchProcessor
+
+RECEIPT_TEXT = """
+STARBUCKS COFFEE
+Date: 01/15/2024
+Coffee $3.50
+Total $3.50
+"""
+
+class TestBatchProcessor(unittest.TestCase):
+    """Test cases for the batch receipt processor"""
+
+    def setUp(self):
+        """Create a directory of receipt files plus a file that is not an image"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.names = [f"receipt_{index:02d}.{'PNG' if index % 2 else 'jpg'}" for index in range(6)]
+        for name in self.names + ["notes.txt"]:
+            with open(os.path.join(self.temp_dir.name, name), 'wb') as f:
+                f.write(b"not really an image")
+        self.output_file = os.path.join(self.temp_dir.name, "results.jsonl")
+
+    def tearDown(self):
+        """Tear down fixtures"""
+        self.temp_dir.cleanup()
+
+    def run_processor(self, processor, **options):
+        with redirect_stdout(io.StringIO()):
+            summary = processor.process_directory(self.temp_dir.name, self.output_file, **options)
+        with open(self.output_file, encoding='utf-8') as f:
+            return summary, [json.loads(line) for line in f]
+
+    def manifest_rows(self):
+        connection = sqlite3.connect(f"{self.output_file}.manifest.sqlite")
+        try:
+            return {os.path.basename(path): (status, offset) for path, status, offset
+                    in connection.execute("SELECT path, status, result_offset FROM files")}
+        finally:
+            connection.close()
+
+    def test_in_process_results_and_running_summary(self):
+        """Test one JSON line per image and totals accumulated without keeping results"""
+        with patch.object(OCRService, 'extract_text', side_effect=[RECEIPT_TEXT] * 5 + [Exception("blurry")]):
+            summary, results = self.run_processor(BatchProcessor())
+
+        self.assertEqual([result['filename'] for result in results], self.names)
+        self.assertEqual([result['status'] for result in results], ['success'] * 5 + ['error'])
+        self.assertEqual((summary.processed, summary.successful, summary.failed), (6, 5, 1))
+        self.assertAlmostEqual(summary.total_amount, 5 * 3.50)
+        self.assertEqual(sum(summary.categories.values()) % 5, 0)
+        self.assertFalse(hasattr(BatchProcessor(), 'results'))
+
+    def test_worker_pool_preserves_order(self):
+        """Test the process pool writes every file in input order with --ordered"""
+        # Workers OCR the unreadable files for real, so every result is an error
+        summary, results = self.run_processor(BatchProcessor(workers=2, ordered=True, max_in_flight=3))
+
+        self.assertEqual([result['filename'] for result in results], self.names)
+        self.assertTrue(all(result['status'] == 'error' and result['error'] for result in results))
+        self.assertEqual((summary.processed, summary.failed), (6, 6))
+
+    def test_worker_pool_unordered(self):
+        """Test results written as they complete still cover every file once"""
+        summary, results = self.run_processor(BatchProcessor(workers=2))
+
+        self.assertEqual(sorted(result['filename'] for result in results), self.names)
+        self.assertEqual(summary.processed, 6)
+
+    def test_rerun_skips_unchanged_successes(self):
+        """Test a rerun only processes failed, new and changed files and appends their results"""
+        with patch.object(OCRService, 'extract_text', side_effect=[RECEIPT_TEXT] * 5 + [Exception("blurry")]):
+            self.run_processor(BatchProcessor())
+
+        with open(os.path.join(self.temp_dir.name, "receipt_99.jpg"), 'wb') as f:
+            f.write(b"a new receipt")
+        with open(os.path.join(self.temp_dir.name, self.names[0]), 'wb') as f:
+            f.write(b"a rescanned receipt")
+        # Same content with a new mtime is not processed again
+        os.utime(os.path.join(self.temp_dir.name, self.names[1]), ns=(0, 0))
+
+        with patch.object(OCRService, 'extract_text', return_value=RECEIPT_TEXT) as extract_text:
+            summary, results = self.run_processor(BatchProcessor())
+        self.assertEqual(extract_text.call_count, 3)
+        self.assertEqual(summary.processed, 3)
+        self.assertEqual([result['filename'] for result in results[6:]], [self.names[0], self.names[5], "receipt_99.jpg"])
+
+        # Each manifest row points at the file's latest line
+        rows = self.manifest_rows()
+        self.assertEqual(len(rows), 7)
+        with open(self.output_file, 'rb') as f:
+            for name, (status, offset) in rows.items():
+                f.seek(offset)
+                result = json.loads(f.readline())
+                self.assertEqual((result['filename'], result['status']), (name, status))
+
+    def test_manifest_uses_what_the_worker_read(self):
+        """Test the manifest takes each file's hash and stat from the worker instead of reading it again"""
+        path = os.path.join(self.temp_dir.name, self.names[0])
+        with patch.object(batch_processor, 'file_hash', side_effect=AssertionError("file read twice")), \
+                patch.object(OCRService, 'extract_text', return_value=RECEIPT_TEXT):
+            self.run_processor(BatchProcessor())
+
+        connection = sqlite3.connect(f"{self.output_file}.manifest.sqlite")
+        try:
+            size, mtime_ns, sha256 = connection.execute(
+                "SELECT size, mtime_ns, sha256 FROM files WHERE path = ?", (os.path.abspath(path),)
+            ).fetchone()
+        finally:
+            connection.close()
+        stat = os.stat(path)
+        self.assertEqual((size, mtime_ns), (stat.st_size, stat.st_mtime_ns))
+        self.assertEqual(sha256, hashlib.sha256(b"not really an image").hexdigest())
+
+    def test_missing_or_truncated_output_resets_the_manifest(self):
+        """Test files are processed again when the output no longer holds their recorded results"""
+        with patch.object(OCRService, 'extract_text', return_value=RECEIPT_TEXT):
+            self.run_processor(BatchProcessor())
+
+        os.remove(self.output_file)
+        with patch.object(OCRService, 'extract_text', return_value=RECEIPT_TEXT):
+            summary, results = self.run_processor(BatchProcessor())
+        self.assertEqual(summary.processed, 6)
+        self.assertEqual([result['filename'] for result in results], self.names)
+
+        with open(self.output_file, 'r+b') as f:
+            f.truncate(max(offset for _, offset in self.manifest_rows().values()))
+        with patch.object(OCRService, 'extract_text', return_value=RECEIPT_TEXT):
+            summary, results = self.run_processor(BatchProcessor())
+        self.assertEqual(summary.processed, 6)
+        self.assertEqual([result['filename'] for result in results], self.names)
+
+    def test_retry_failed_and_recursive(self):
+        """Test --retry-failed re-processes only failures, and --recursive walks subdirectories"""
+        with patch.object(OCRService, 'extract_text', side_effect=Exception("blurry")):
+            self.run_processor(BatchProcessor())
+        with open(os.path.join(self.temp_dir.name, "receipt_99.jpg"), 'wb') as f:
+            f.write(b"a new receipt")
+        os.makedirs(os.path.join(self.temp_dir.name, "2024", "march"))
+        with open(os.path.join(self.temp_dir.name, "2024", "march", "nested.jpeg"), 'wb') as f:
+            f.write(b"a nested receipt")
+
+        with patch.object(OCRService, 'extract_text', return_value=RECEIPT_TEXT):
+            summary, _ = self.run_processor(BatchProcessor(), retry_failed=True)
+        self.assertEqual((summary.processed, summary.successful), (6, 6))
+
+        with patch.object(OCRService, 'extract_text', return_value=RECEIPT_TEXT):
+            summary, results = self.run_processor(BatchProcessor(), recursive=True)
+        self.assertEqual([result['filename'] for result in results[12:]], ["nested.jpeg", "receipt_99.jpg"])
+        self.assertTrue(all(status == 'success' for status, _ in self.manifest_rows().values()))
+
+if __name__ == '__main__':
+    # Run tests
+    unittest.main(verbosity=2)
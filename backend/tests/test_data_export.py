@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Data Export Tests for Scan&Track
+Tests for the streaming export endpoint, the export CLI built on the same core
+and the columnar Parquet/Arrow export
+"""
+
+import unittest
+import sys
+import os
+import csv
+import io
+import json
+import tempfile
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.main import app
+from app.database import async_session_override, get_async_db
+from app.models import Base
+from app.services import receipt_export
+from app.services.columnar_export import PYARROW_AVAILABLE, ColumnarExporter
+from app.services.receipt_export import CsvEncoder, write_export
+from app.services.receipt_store import create_receipt
+from utils.data_export import OPENPYXL_AVAILABLE, DataExporter
+from query_counter import QueryBudgetMixin
+
+RECEIPTS = 7
+
+class TestDataExport(QueryBudgetMixin, unittest.TestCase):
+    """Test cases for the streaming receipt export"""
+
+    @classmethod
+    def setUpClass(cls):
+        """Create receipts with two items each, and one receipt without items"""
+        cls.db_dir = tempfile.TemporaryDirectory()
+        cls.engine = create_engine(f"sqlite:///{os.path.join(cls.db_dir.name, 'test.db')}")
+        Base.metadata.create_all(bind=cls.engine)
+        cls.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=cls.engine)
+        cls.start = datetime(2024, 3, 1, 9, 0)
+
+        db = cls.SessionLocal()
+        try:
+            for index in range(RECEIPTS):
+                items = [{"item_name": f"Item {n}", "unit_price": 2.0, "total_price": 2.0, "category": "Other"}
+                         for n in range(2)]
+                create_receipt(db, items, filename=f"r{index}.jpg", file_path=f"uploads/r{index}.jpg",
+                               merchant_name="Café Lumière", total_amount=4.0,
+                               created_at=cls.start + timedelta(days=index))
+            create_receipt(db, [], filename="empty.jpg", file_path="uploads/empty.jpg", raw_text="page 1\x0cpage 2",
+                           created_at=cls.start - timedelta(days=30))
+            db.commit()
+        finally:
+            db.close()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Tear down fixtures"""
+        cls.engine.dispose()
+        cls.db_dir.cleanup()
+
+    def setUp(self):
+        """Route the API to the seeded database with small batches"""
+        self.async_engine, override_get_async_db = async_session_override(str(self.engine.url))
+        app.dependency_overrides[get_async_db] = override_get_async_db
+        self.batch_patch = patch.object(receipt_export, 'EXPORT_BATCH_SIZE', 3)
+        self.batch_patch.start()
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        """Tear down fixtures"""
+        self.batch_patch.stop()
+        app.dependency_overrides.clear()
+
+    def export(self, format, **params):
+        response = self.client.get("/api/export", params={"format": format, **params})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("attachment", response.headers["content-disposition"])
+        return response.text
+
+    def test_csv(self):
+        """Test one row per item, and one row with empty item columns for a receipt without items"""
+        rows = list(csv.DictReader(io.StringIO(self.export("csv"))))
+        self.assertEqual(len(rows), RECEIPTS * 2 + 1)
+        self.assertEqual(rows[0]["merchant_name"], "Café Lumière")
+        self.assertEqual(rows[-1]["filename"], "empty.jpg")
+        self.assertEqual(rows[-1]["item_name"], "")
+
+    def test_jsonl_and_json(self):
+        """Test that both JSON formats hold every receipt, newest first, with its items"""
+        lines = [json.loads(line) for line in self.export("jsonl").splitlines()]
+        self.assertEqual(len(lines), RECEIPTS + 1)
+        self.assertEqual([len(line["items"]) for line in lines], [2] * RECEIPTS + [0])
+        self.assertGreater(lines[0]["created_at"], lines[1]["created_at"])
+
+        document = json.loads(self.export("json"))
+        self.assertEqual(document["export_info"]["total_receipts"], RECEIPTS + 1)
+        self.assertEqual(document["receipts"], lines)
+
+    def test_date_range_and_invalid_format(self):
+        """Test the created_at filters and the error for an unknown format"""
+        lines = self.export("jsonl", start_date=self.start.isoformat(),
+                            end_date=(self.start + timedelta(days=2)).isoformat()).splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(self.client.get("/api/export?format=xml").status_code, 400)
+
+    def test_cli_matches_endpoint(self):
+        """Test that the CLI writes the same CSV as the endpoint"""
+        with tempfile.TemporaryDirectory() as out_dir:
+            output_file = os.path.join(out_dir, "receipts.csv")
+            exporter = DataExporter(self.SessionLocal())
+            try:
+                exporter.export_to_csv(output_file)
+            finally:
+                exporter.close()
+            with open(output_file, encoding="utf-8", newline="") as f:
+                self.assertEqual(f.read(), self.export("csv"))
+
+    @unittest.skipUnless(OPENPYXL_AVAILABLE, "openpyxl not installed")
+    def test_excel(self):
+        """Test the Receipts, Items and Summary sheets of the Excel export"""
+        from openpyxl import load_workbook
+
+        with tempfile.TemporaryDirectory() as out_dir:
+            output_file = os.path.join(out_dir, "receipts.xlsx")
+            exporter = DataExporter(self.SessionLocal())
+            try:
+                exporter.export_to_excel(output_file)
+            finally:
+                exporter.close()
+            workbook = load_workbook(output_file, read_only=True)
+            sheets = {name: [list(row) for row in workbook[name].iter_rows(values_only=True)] for name in workbook.sheetnames}
+            workbook.close()
+
+        self.assertEqual(list(sheets), ["Receipts", "Items", "Summary"])
+        self.assertEqual(len(sheets["Receipts"]), RECEIPTS + 2)
+        self.assertEqual(sheets["Receipts"][-1][-1], "page 1page 2")
+        self.assertEqual(len(sheets["Items"]), RECEIPTS * 2 + 1)
+        summary = {row[0]: row[1] for row in sheets["Summary"][1:] if row[0]}
+        self.assertEqual(summary["Total Receipts"], RECEIPTS + 1)
+        self.assertEqual(summary["Total Amount"], f"${4.0 * RECEIPTS:.2f}")
+        self.assertEqual(summary["Average Receipt"], f"${4.0 * RECEIPTS / (RECEIPTS + 1):.2f}")
+        self.assertEqual(summary["Other"], f"${4.0 * RECEIPTS:.2f} ({RECEIPTS * 2} items)")
+
+    def test_items_loaded_per_batch(self):
+        """Test one query for the receipts plus one items query per batch"""
+        db = self.SessionLocal()
+        try:
+            with self.assertQueryBudget(self.engine, 1 + 3):
+                encoder = write_export(db, CsvEncoder(), io.StringIO(), batch_size=3)
+        finally:
+            db.close()
+        self.assertEqual((encoder.receipts, encoder.rows), (RECEIPTS + 1, RECEIPTS * 2 + 1))
+
+@unittest.skipUnless(PYARROW_AVAILABLE, "pyarrow not installed")
+class TestColumnarExport(unittest.TestCase):
+    """Test cases for the Parquet and Arrow IPC export"""
+
+    def setUp(self):
+        """Create receipts at two merchants, and one receipt without items"""
+        self.db_dir = tempfile.TemporaryDirectory()
+        self.engine = create_engine(f"sqlite:///{os.path.join(self.db_dir.name, 'test.db')}")
+        Base.metadata.create_all(bind=self.engine)
+        self.db = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)()
+        self.start = datetime(2024, 3, 1, 9, 0)
+        for index in range(6):
+            items = [{"item_name": f"Item {n}", "unit_price": 1.5, "total_price": 1.5,
+                      "category": "Travel" if n else "Other"} for n in range(2)]
+            create_receipt(self.db, items, filename=f"r{index}.jpg", file_path=f"uploads/r{index}.jpg",
+                           merchant_name=f"Merchant {index % 2}", total_amount=3.0,
+                           created_at=self.start + timedelta(days=index))
+        create_receipt(self.db, [], filename="empty.jpg", file_path="uploads/empty.jpg",
+                       created_at=self.start - timedelta(days=30))
+        self.db.commit()
+
+    def tearDown(self):
+        """Tear down fixtures"""
+        self.db.close()
+        self.engine.dispose()
+        self.db_dir.cleanup()
+
+    def test_parquet_typed_columns_and_row_groups(self):
+        """Test typed, dictionary-encoded columns written in several row groups"""
+        import pandas as pd
+        import pyarrow.parquet as pq
+
+        output_file = os.path.join(self.db_dir.name, "receipts.parquet")
+        self.assertEqual(ColumnarExporter(self.db, chunk_rows=4).write(output_file), 13)
+        self.assertEqual(pq.ParquetFile(output_file).num_row_groups, 4)
+
+        frame = pd.read_parquet(output_file)
+        self.assertEqual(str(frame["merchant_name"].dtype), "category")
+        self.assertEqual(str(frame["item_category"].dtype), "category")
+        self.assertEqual(str(frame["item_total_price"].dtype), "float64")
+        self.assertEqual(str(frame["created_at"].dtype), "datetime64[us]")
+        self.assertEqual(frame["item_total_price"].sum(), 18.0)
+        self.assertTrue(frame.iloc[-1][["item_name", "item_category"]].isna().all())
+
+        # Row group statistics let readers skip the older rows
+        recent = pd.read_parquet(output_file, filters=[("created_at", ">=", pd.Timestamp(self.start + timedelta(days=4)))])
+        self.assertEqual(sorted(recent["receipt_id"].unique()), [5, 6])
+
+    def test_arrow_and_date_range(self):
+        """Test an Arrow IPC file whose dictionaries grow across batches, filtered in SQL"""
+        import pyarrow.ipc as pa_ipc
+
+        output_file = os.path.join(self.db_dir.name, "receipts.arrow")
+        rows = ColumnarExporter(self.db, chunk_rows=3).write(
+            output_file, "arrow", start_date=self.start + timedelta(days=1), end_date=self.start + timedelta(days=3)
+        )
+        self.assertEqual(rows, 6)
+        table = pa_ipc.open_file(output_file).read_all()
+        self.assertEqual(table.num_rows, 6)
+        self.assertEqual(sorted(set(table.column("merchant_name").to_pylist())), ["Merchant 0", "Merchant 1"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Database Pool Tests for Scan&Track
+Tests for the async engine URL mapping and the connection pool monitor
+"""
+
+import unittest
+import sys
+import os
+import asyncio
+import tempfile
+import time
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.main import app
+from app.database import PoolMonitor, async_database_url, pool_options
+
+class TestDatabasePool(unittest.TestCase):
+    """Test cases for the database engine configuration"""
+
+    def test_async_database_url(self):
+        """Test that sync URLs map to their async drivers"""
+        self.assertEqual(async_database_url("postgresql://u:p@db:5432/scan"), "postgresql+asyncpg://u:p@db:5432/scan")
+        self.assertEqual(async_database_url("postgresql+psycopg2://u:p@db/scan"), "postgresql+asyncpg://u:p@db/scan")
+        self.assertEqual(async_database_url("sqlite:////tmp/scan.db"), "sqlite+aiosqlite:////tmp/scan.db")
+        self.assertEqual(async_database_url("sqlite+aiosqlite:///scan.db"), "sqlite+aiosqlite:///scan.db")
+
+    def test_in_memory_sqlite_is_not_pooled(self):
+        """Test that pool settings are only passed for databases that can use a pool"""
+        self.assertEqual(pool_options("sqlite://"), {})
+        self.assertIn("pool_size", pool_options("postgresql://u:p@db/scan"))
+
+    def test_monitor_counts_connections_and_waits(self):
+        """Test that a full pool makes sessions wait and the monitor sees it"""
+        with tempfile.TemporaryDirectory() as db_dir:
+            engine = create_async_engine(
+                f"sqlite+aiosqlite:///{os.path.join(db_dir, 'test.db')}",
+                poolclass=AsyncAdaptedQueuePool, pool_size=2, max_overflow=0
+            )
+            monitor = PoolMonitor(engine.sync_engine)
+
+            async def hold_connection():
+                start = time.perf_counter()
+                async with engine.connect():
+                    monitor.record_wait(time.perf_counter() - start)
+                    await asyncio.sleep(0.05)
+
+            async def run():
+                await asyncio.gather(*(hold_connection() for _ in range(4)))
+                await engine.dispose()
+
+            asyncio.run(run())
+
+        stats = monitor.stats()
+        self.assertEqual((stats["peak_in_use"], stats["in_use"]), (2, 0))
+        self.assertEqual((stats["checkouts"], stats["connections_opened"]), (4, 2))
+        # Two of the four sessions waited for a connection to be returned
+        self.assertGreaterEqual(stats["max_wait_ms"], 40)
+
+    def test_pool_stats_endpoint(self):
+        """Test that the pool stats endpoint reports both engines"""
+        response = TestClient(app).get("/health/db")
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(set(body), {"async", "sync"})
+        for key in ("in_use", "peak_in_use", "checkouts", "avg_wait_ms", "max_wait_ms"):
+            self.assertIn(key, body["async"])
+
+if __name__ == '__main__':
+    unittest.main()
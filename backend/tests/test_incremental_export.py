@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Incremental Export Tests for Scan&Track
+Tests for the updated_at watermark, deletion tombstones and the lag window of the
+incremental export
+"""
+
+import unittest
+import sys
+import os
+import io
+import json
+import tempfile
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.main import app
+from app.database import async_session_override, get_async_db
+from app.models import Base, ExportWatermark, Receipt, ReceiptDeletion
+from app.models.receipt import utcnow
+from app.services.incremental_export import as_utc, run_incremental_export
+from app.services.receipt_export import JsonEncoder, JsonLinesEncoder
+from app.services.receipt_store import create_receipt
+from utils.data_export import DataExporter
+
+class TestIncrementalExport(unittest.TestCase):
+    """Test cases for the watermark-driven incremental export"""
+
+    def setUp(self):
+        """Create a database with three receipts and route the API to it"""
+        self.db_dir = tempfile.TemporaryDirectory()
+        self.engine = create_engine(f"sqlite:///{os.path.join(self.db_dir.name, 'test.db')}")
+        Base.metadata.create_all(bind=self.engine)
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+
+        db = self.SessionLocal()
+        try:
+            self.receipt_ids = [create_receipt(
+                db, [{"item_name": "Coffee", "unit_price": 3.0, "total_price": 3.0, "category": "Food & Dining"}],
+                filename=f"r{index}.jpg", file_path=f"uploads/r{index}.jpg", total_amount=3.0
+            ).id for index in range(3)]
+            db.commit()
+        finally:
+            db.close()
+
+        self.async_engine, override_get_async_db = async_session_override(str(self.engine.url))
+        app.dependency_overrides[get_async_db] = override_get_async_db
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        """Tear down fixtures"""
+        app.dependency_overrides.clear()
+        self.engine.dispose()
+        self.db_dir.cleanup()
+
+    def run_export(self, name="nightly", cutoff=None):
+        """Run one incremental JSON Lines export and commit its watermark"""
+        output = io.StringIO()
+        db = self.SessionLocal()
+        try:
+            stats = run_incremental_export(db, name, JsonLinesEncoder(), output,
+                                           cutoff=cutoff or utcnow() + timedelta(seconds=1))
+            db.commit()
+        finally:
+            db.close()
+        return stats, [json.loads(line) for line in output.getvalue().splitlines()]
+
+    def test_first_run_exports_everything_then_nothing(self):
+        """Test a new watermark exports every receipt and a repeated run exports none"""
+        stats, records = self.run_export()
+        self.assertEqual([record['id'] for record in records], self.receipt_ids)
+        self.assertTrue(all(record['deleted'] is False and len(record['items']) == 1 for record in records))
+        self.assertEqual(stats['watermark']['receipt_id'], self.receipt_ids[-1])
+
+        stats, records = self.run_export()
+        self.assertEqual(records, [])
+        self.assertEqual((stats['receipts'], stats['deletions']), (0, 0))
+
+    def test_updates_inserts_and_deletions(self):
+        """Test only edited and new receipts are exported, followed by tombstones"""
+        self.run_export()
+
+        # An item-only edit must still move the receipt past the watermark
+        response = self.client.put(f"/api/receipts/{self.receipt_ids[0]}", json={
+            "items": [{"item_name": "Tea", "quantity": 1, "unit_price": 2.5, "total_price": 2.5}]
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.delete(f"/api/receipts/{self.receipt_ids[1]}").status_code, 200)
+        db = self.SessionLocal()
+        try:
+            new_id = create_receipt(db, [], filename="new.jpg", file_path="uploads/new.jpg").id
+            db.commit()
+        finally:
+            db.close()
+
+        stats, records = self.run_export()
+        self.assertEqual([record['id'] for record in records], [self.receipt_ids[0], new_id, self.receipt_ids[1]])
+        self.assertEqual(records[0]['items'][0]['item_name'], "Tea")
+        self.assertTrue(records[2]['deleted'])
+        self.assertEqual((stats['receipts'], stats['deletions']), (2, 1))
+
+        # A new watermark starts from scratch: every live receipt plus every tombstone
+        _, records = self.run_export(name="audit")
+        self.assertEqual([record['deleted'] for record in records], [False, False, False, True])
+
+    def test_recent_changes_wait_for_the_next_run(self):
+        """Test changes inside the lag window are left for the next run instead of being skipped"""
+        db = self.SessionLocal()
+        try:
+            receipts = db.query(Receipt).order_by(Receipt.id).all()
+            receipts[-1].updated_at = utcnow() + timedelta(hours=1)
+            db.commit()
+        finally:
+            db.close()
+
+        _, records = self.run_export()
+        self.assertEqual([record['id'] for record in records], self.receipt_ids[:-1])
+        _, records = self.run_export(cutoff=utcnow() + timedelta(hours=2))
+        self.assertEqual([record['id'] for record in records], self.receipt_ids[-1:])
+
+    def test_cutoff_with_a_utc_offset(self):
+        """Test tombstones are compared with the cutoff as instants, not wall-clock times"""
+        self.run_export()
+        self.assertEqual(self.client.delete(f"/api/receipts/{self.receipt_ids[0]}").status_code, 200)
+        db = self.SessionLocal()
+        try:
+            deleted_at = as_utc(db.query(ReceiptDeletion.deleted_at).scalar())
+        finally:
+            db.close()
+
+        # A minute before the deletion, written at UTC+05:00: its wall-clock time is hours later
+        plus_five = timezone(timedelta(hours=5))
+        stats, _ = self.run_export(cutoff=(deleted_at - timedelta(minutes=1)).astimezone(plus_five))
+        self.assertEqual(stats['deletions'], 0)
+        stats, _ = self.run_export(cutoff=(deleted_at + timedelta(minutes=1)).astimezone(plus_five))
+        self.assertEqual(stats['deletions'], 1)
+
+    def test_as_utc(self):
+        """Test aware values are converted to UTC and naive ones are taken as UTC"""
+        instant = datetime(2024, 1, 15, 12, 0, tzinfo=timezone.utc)
+        self.assertEqual(as_utc(instant.astimezone(timezone(timedelta(hours=-8)))), instant)
+        self.assertEqual(as_utc(instant.replace(tzinfo=None)), instant)
+        self.assertEqual(as_utc(instant.astimezone(timezone(timedelta(hours=2)))).tzinfo, timezone.utc)
+
+    def test_failed_run_keeps_the_watermark(self):
+        """Test a run that is not committed is repeated in full"""
+        db = self.SessionLocal()
+        try:
+            run_incremental_export(db, "nightly", JsonLinesEncoder(), io.StringIO(), cutoff=utcnow() + timedelta(seconds=1))
+            db.rollback()
+            self.assertIsNone(db.get(ExportWatermark, "nightly"))
+        finally:
+            db.close()
+
+        _, records = self.run_export()
+        self.assertEqual(len(records), 3)
+
+    def test_cli_json_file(self):
+        """Test the exporter writes a JSON document, commits the watermark and rejects other formats"""
+        output_file = os.path.join(self.db_dir.name, "delta.json")
+        exporter = DataExporter(self.SessionLocal())
+        try:
+            with patch('app.services.incremental_export.INCREMENTAL_EXPORT_LAG', -1):
+                stats = exporter.export_incremental(output_file, 'json', 'cli')
+            with self.assertRaises(ValueError):
+                exporter.export_incremental(output_file, 'csv', 'cli')
+        finally:
+            exporter.close()
+
+        with open(output_file, encoding='utf-8') as f:
+            document = json.load(f)
+        self.assertEqual(len(document['receipts']), 3)
+        self.assertEqual(document['export_info']['total_receipts'], stats['receipts'])
+
+        db = self.SessionLocal()
+        try:
+            self.assertEqual(db.get(ExportWatermark, "cli").receipt_id, self.receipt_ids[-1])
+        finally:
+            db.close()
+
+if __name__ == "__main__":
+    unittest.main()
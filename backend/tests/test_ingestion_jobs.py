@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Ingestion Job Tests for Scan&Track
+Tests for uploading receipts in background job mode
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch, AsyncMock
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.main import app
+from app.database import async_session_factory, async_session_override, get_async_db
+from app.models import Base, Receipt, IngestionJob
+from app.services.ocr_executor import ocr_executor
+from app.services.ingestion_queue import ingestion_queue, claim_job, INGESTION_JOB_TIMEOUT
+
+RECEIPT_DATA = {
+    "raw_text": "Test receipt text",
+    "merchant_name": "Test Store",
+    "total_amount": 25.99,
+    "purchase_date": "2024-01-15",
+    "items": [
+        {
+            "item_name": "Coffee",
+            "quantity": 1.0,
+            "unit_price": 3.50,
+            "total_price": 3.50,
+            "category": None
+        }
+    ]
+}
+
+class TestIngestionJobs(unittest.TestCase):
+    """Test cases for 202 Accepted uploads and the job status endpoint"""
+
+    def setUp(self):
+        """Set up an isolated database and a client with the app lifespan running"""
+        self.db_dir = tempfile.TemporaryDirectory()
+        engine = create_engine(f"sqlite:///{os.path.join(self.db_dir.name, 'test.db')}")
+        Base.metadata.create_all(bind=engine)
+        self.engine = engine
+
+        self.async_engine, override_get_async_db = async_session_override(str(engine.url))
+        app.dependency_overrides[get_async_db] = override_get_async_db
+        _, TestingAsyncSessionLocal = async_session_factory(str(engine.url))
+        self.patches = [
+            patch.object(ocr_executor, 'max_workers', 0),
+            patch.object(ingestion_queue, 'session_factory', TestingAsyncSessionLocal),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        """Tear down fixtures"""
+        for p in reversed(self.patches):
+            p.stop()
+        app.dependency_overrides.clear()
+        self.engine.dispose()
+        self.db_dir.cleanup()
+
+    def wait_for_job(self, client, job_id, timeout=5.0):
+        """Poll the job endpoint until the job finishes"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            job = client.get(f"/api/receipts/jobs/{job_id}").json()
+            if job["status"] in ("completed", "failed"):
+                return job
+            time.sleep(0.05)
+        self.fail(f"Job {job_id} did not finish in {timeout}s")
+
+    def test_job_upload_returns_202_and_completes(self):
+        """Test that a job-mode upload is accepted and finalized in the background"""
+        mock_process = AsyncMock(return_value=RECEIPT_DATA)
+        with patch.object(ocr_executor, 'extract_receipt_data', mock_process), TestClient(app) as client:
+            response = client.post(
+                "/api/receipts/upload?mode=job",
+                files={"file": ("test.jpg", b"fake_image_data", "image/jpeg")}
+            )
+            self.assertEqual(response.status_code, 202)
+            job = response.json()
+            self.assertEqual(job["status"], "pending")
+            self.assertIn("store", job["stage_timings"])
+
+            job = self.wait_for_job(client, job["id"])
+            self.assertEqual(job["status"], "completed")
+            for stage in ("store", "queued", "ocr", "persist"):
+                self.assertIn(stage, job["stage_timings"])
+
+            receipt = client.get(f"/api/receipts/{job['receipt_id']}").json()
+            self.assertEqual(receipt["processing_status"], "completed")
+            self.assertEqual(receipt["merchant_name"], "Test Store")
+            self.assertEqual(len(receipt["items"]), 1)
+            self.assertEqual(receipt["items"][0]["category"], "Food & Dining")
+
+            client.delete(f"/api/receipts/{job['receipt_id']}")
+
+    def test_failed_job_reports_error(self):
+        """Test that OCR failures mark both the job and the receipt as failed"""
+        mock_process = AsyncMock(side_effect=Exception("cannot identify image file"))
+        with patch.object(ocr_executor, 'extract_receipt_data', mock_process), TestClient(app) as client:
+            response = client.post(
+                "/api/receipts/upload?mode=job",
+                files={"file": ("test.jpg", b"fake_image_data", "image/jpeg")}
+            )
+            job = self.wait_for_job(client, response.json()["id"])
+            self.assertEqual(job["status"], "failed")
+            self.assertIn("cannot identify image file", job["error"])
+
+            receipt = client.get(f"/api/receipts/{job['receipt_id']}").json()
+            self.assertEqual(receipt["processing_status"], "failed")
+
+            client.delete(f"/api/receipts/{job['receipt_id']}")
+
+    def test_unknown_job(self):
+        """Test getting a non-existent job"""
+        with TestClient(app) as client:
+            response = client.get("/api/receipts/jobs/does-not-exist")
+            self.assertEqual(response.status_code, 404)
+
+    def test_invalid_upload_mode(self):
+        """Test upload with an unknown mode"""
+        with TestClient(app) as client:
+            response = client.post(
+                "/api/receipts/upload?mode=later",
+                files={"file": ("test.jpg", b"fake_image_data", "image/jpeg")}
+            )
+            self.assertEqual(response.status_code, 400)
+
+    def add_job(self, job_id, status="pending", started_at=None):
+        """Insert a receipt with one ingestion job"""
+        with Session(self.engine) as db:
+            receipt = Receipt(filename="test.jpg", file_path="uploads/test.jpg", processing_status=status)
+            receipt.ingestion_jobs.append(IngestionJob(id=job_id, status=status, started_at=started_at))
+            db.add(receipt)
+            db.commit()
+
+    def claim(self, job_id):
+        """Claim a job in its own session, as a separate worker would"""
+        with Session(self.engine) as db:
+            claimed = claim_job(db, job_id)
+            db.commit()
+            return claimed
+
+    def test_job_is_claimed_once(self):
+        """Test that a second worker cannot claim a job that is already being processed"""
+        self.add_job("job-1")
+
+        self.assertIsNotNone(self.claim("job-1"))
+        self.assertIsNone(self.claim("job-1"))
+
+        with Session(self.engine) as db:
+            job = db.get(IngestionJob, "job-1")
+            self.assertEqual(job.status, "processing")
+            self.assertEqual(job.receipt.processing_status, "processing")
+
+    def test_only_stale_processing_jobs_are_reclaimed(self):
+        """Test that processing jobs are reclaimed only once they exceed the job timeout"""
+        now = datetime.now(timezone.utc)
+        self.add_job("recent", "processing", now - timedelta(seconds=INGESTION_JOB_TIMEOUT / 2))
+        self.add_job("stale", "processing", now - timedelta(seconds=INGESTION_JOB_TIMEOUT * 2))
+        self.add_job("done", "completed", now - timedelta(seconds=INGESTION_JOB_TIMEOUT * 2))
+
+        self.assertIsNone(self.claim("recent"))
+        self.assertIsNone(self.claim("done"))
+        self.assertIsNotNone(self.claim("stale"))
+
+if __name__ == '__main__':
+    # Run tests
+    unittest.main(verbosity=2)
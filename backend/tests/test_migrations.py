@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Migration Tests for Scan&Track
+Tests that the Alembic history builds the same schema as the models
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import Session
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.migrations import upgrade_database
+from app.models import Base, DailySpendRollup, Receipt
+from app.services.spending_rollups import find_rollup_mismatches
+
+# What create_all made from the original models, before the migration history existed
+BASELINE_SCHEMA = (
+    """CREATE TABLE receipts (
+        id INTEGER NOT NULL, filename VARCHAR NOT NULL, file_path VARCHAR NOT NULL, total_amount FLOAT,
+        merchant_name VARCHAR, purchase_date DATETIME, created_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+        updated_at DATETIME, raw_text TEXT, PRIMARY KEY (id)
+    )""",
+    "CREATE INDEX ix_receipts_id ON receipts (id)",
+    """CREATE TABLE receipt_items (
+        id INTEGER NOT NULL, receipt_id INTEGER NOT NULL, item_name VARCHAR NOT NULL, quantity FLOAT,
+        unit_price FLOAT NOT NULL, total_price FLOAT NOT NULL, category VARCHAR, description TEXT,
+        PRIMARY KEY (id), FOREIGN KEY(receipt_id) REFERENCES receipts (id)
+    )""",
+    "CREATE INDEX ix_receipt_items_id ON receipt_items (id)",
+)
+
+class TestMigrations(unittest.TestCase):
+    """Test cases for the migration history"""
+
+    def setUp(self):
+        """Set up an empty database"""
+        self.db_dir = tempfile.TemporaryDirectory()
+        self.engine = create_engine(f"sqlite:///{os.path.join(self.db_dir.name, 'test.db')}")
+
+    def tearDown(self):
+        """Clean up"""
+        self.engine.dispose()
+        self.db_dir.cleanup()
+
+    def assertMatchesModels(self):
+        with self.engine.connect() as connection:
+            diff = compare_metadata(MigrationContext.configure(connection), Base.metadata)
+        self.assertEqual(diff, [])
+
+    def test_upgrade_matches_models(self):
+        """Test that upgrading an empty database yields the models' tables and indexes"""
+        upgrade_database(self.engine)
+        self.assertMatchesModels()
+
+        indexes = {index["name"] for index in inspect(self.engine).get_indexes("receipts")}
+        self.assertIn("ix_receipts_created_at_total_amount", indexes)
+        self.assertIn("ix_receipts_merchant_name", indexes)
+        item_indexes = {index["name"] for index in inspect(self.engine).get_indexes("receipt_items")}
+        self.assertIn("ix_receipt_items_receipt_id_category_total_price", item_indexes)
+
+    def test_create_all_database_is_stamped_and_upgraded(self):
+        """Test that a database made by create_all gets the later migrations and their backfills"""
+        with self.engine.begin() as connection:
+            for statement in BASELINE_SCHEMA:
+                connection.execute(text(statement))
+            connection.execute(text(
+                "INSERT INTO receipts (id, filename, file_path, total_amount, created_at) "
+                "VALUES (1, 'r.jpg', 'uploads/r.jpg', 12.5, '2024-01-15 10:30:00')"
+            ))
+            connection.execute(text(
+                "INSERT INTO receipt_items (receipt_id, item_name, unit_price, total_price, category) "
+                "VALUES (1, 'Coffee', 12.5, 12.5, 'Food & Dining')"
+            ))
+
+        upgrade_database(self.engine)
+
+        self.assertMatchesModels()
+        with self.engine.connect() as connection:
+            self.assertEqual(connection.execute(text("SELECT version_num FROM alembic_version")).scalar(), "0007")
+            # Receipts never edited get updated_at from created_at, for incremental exports
+            self.assertEqual(connection.execute(text("SELECT updated_at FROM receipts")).scalar(), "2024-01-15 10:30:00")
+        with Session(self.engine) as db:
+            self.assertEqual(db.query(DailySpendRollup.total_amount).scalar(), 12.5)
+            self.assertEqual(find_rollup_mismatches(db), [])
+            # Columns added after the baseline exist, so ORM queries work
+            self.assertEqual(db.query(Receipt.processing_status).scalar(), "completed")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+ML Categorizer Tests for Scan&Track
+Unit tests for the trainable category model and its use in CategorizationService
+"""
+
+import unittest
+import sys
+import os
+import subprocess
+import tempfile
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.categorization_service import CategorizationService
+from app.services.ml_categorizer import MLCategorizer
+
+TRAINING_ITEMS = [
+    (("Croissant", "Le Fournil"), "Food & Dining"),
+    (("Baguette", "Le Fournil"), "Food & Dining"),
+    (("Croissant x2", None), "Food & Dining"),
+    (("Pain au chocolat", "Boulangerie"), "Food & Dining"),
+    (("Ibuprofen 200mg", "Apotheke"), "Healthcare"),
+    (("Paracetamol", "Apotheke"), "Healthcare"),
+    (("Ibuprofen", None), "Healthcare"),
+    (("Antacid tablets", "Apotheke"), "Healthcare"),
+]
+
+class TestMLCategorizer(unittest.TestCase):
+    """Test cases for MLCategorizer"""
+    
+    def setUp(self):
+        """Train a small model"""
+        self.categorizer = MLCategorizer()
+        items, categories = zip(*TRAINING_ITEMS)
+        self.categorizer.train(items, categories, test_size=0)
+    
+    def test_batched_predict(self):
+        """Test that a batch is predicted in order"""
+        predictions = self.categorizer.predict([("CROISSANT", "Le Fournil"), ("ibuprofen 400mg", "Apotheke")])
+        self.assertEqual(predictions, ["Food & Dining", "Healthcare"])
+        self.assertEqual(self.categorizer.predict([]), [])
+    
+    def test_save_and_load(self):
+        """Test that a saved model loads back and a missing file yields None"""
+        with tempfile.TemporaryDirectory() as model_dir:
+            path = os.path.join(model_dir, "nested", "model.joblib")
+            self.categorizer.save(path)
+            loaded = MLCategorizer.load(path)
+            self.assertEqual(loaded.predict([("Croissant", None)]), ["Food & Dining"])
+            self.assertIsNone(MLCategorizer.load(os.path.join(model_dir, "missing.joblib")))
+    
+    def test_rules_first_then_model(self):
+        """Test that keyword rules win and only unmatched items reach the model"""
+        service = CategorizationService(model=self.categorizer)
+        self.assertEqual(service.categorize_many([
+            ("Parking", "Apotheke"),
+            ("Paracetamol", "Apotheke"),
+            ("Croissant", None),
+        ]), ["Transportation", "Healthcare", "Food & Dining"])
+        
+        service.set_model(None)
+        self.assertEqual(service.categorize_item("Croissant"), "Other")
+
+    def test_rules_alone_do_not_import_sklearn(self):
+        """Test that a service without a model file never loads scikit-learn or joblib"""
+        script = (
+            "import sys\n"
+            "from app.services.categorization_service import CategorizationService\n"
+            "service = CategorizationService(model_path='missing.joblib')\n"
+            "service.categorize_item('Coffee', 'Starbucks')\n"
+            "print(sorted(name for name in ('sklearn', 'joblib') if name in sys.modules))\n"
+        )
+        backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        output = subprocess.run(
+            [sys.executable, "-c", script], cwd=backend_dir, capture_output=True, text=True, check=True
+        ).stdout
+        self.assertEqual(output.strip(), "[]")
+
+if __name__ == '__main__':
+    # Run tests
+    unittest.main(verbosity=2)
@@ -7,13 +7,21 @@ Unit tests for OCR functionality
 import unittest
 import sys
 import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import patch, MagicMock
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app.services.ocr_service import OCRService
+from app.services.ocr_service import OCRService, OCRBackend, PytesseractBackend, create_ocr_backend, ocr_pipeline_version
 from app.services.categorization_service import CategorizationService
+from app.services.image_preprocessing import ImagePreprocessor
+from app.services.receipt_parser import parse_receipt_text
+from app.services.pdf_extraction import PDFIUM_AVAILABLE, is_pdf
+from PIL import Image, ImageDraw
 
 class TestOCRService(unittest.TestCase):
     """Test cases for OCR service"""
@@ -34,7 +42,7 @@ class TestOCRService(unittest.TestCase):
         Date: 2024-01-15
         """
         
-        merchant_name = self.ocr_service._extract_merchant_name(test_text)
+        merchant_name = parse_receipt_text(test_text)["merchant_name"]
         self.assertEqual(merchant_name, "STARBUCKS COFFEE")
     
     def test_extract_total_amount(self):
@@ -49,7 +57,7 @@ class TestOCRService(unittest.TestCase):
         
         for text, expected in test_cases:
             with self.subTest(text=text):
-                result = self.ocr_service._extract_total_amount(text)
+                result = parse_receipt_text(text)["total_amount"]
                 self.assertEqual(result, expected)
     
     def test_extract_purchase_date(self):
@@ -63,7 +71,7 @@ class TestOCRService(unittest.TestCase):
         
         for text, expected in test_cases:
             with self.subTest(text=text):
-                result = self.ocr_service._extract_purchase_date(text)
+                result = parse_receipt_text(text)["purchase_date"]
                 self.assertEqual(result, expected)
     
     def test_extract_items(self):
@@ -76,7 +84,7 @@ class TestOCRService(unittest.TestCase):
         Total $16.94
         """
         
-        items = self.ocr_service._extract_items(test_text)
+        items = parse_receipt_text(test_text)["items"]
         self.assertGreater(len(items), 0)
         
         # Check that items have required fields
@@ -222,6 +230,238 @@ class TestCategorizationService(unittest.TestCase):
                 category = self.categorization_service.categorize_item(item)
                 self.assertEqual(category, "Other")
 
+    def test_category_precedence(self):
+        """Test that keywords beat patterns and earlier categories beat later ones"""
+        # "gas" is a Transportation and a Utilities keyword
+        self.assertEqual(self.categorization_service.categorize_item("Gas bill"), "Transportation")
+        # "tea" is only a food pattern, "pharmacy" a Healthcare keyword
+        self.assertEqual(self.categorization_service.categorize_item("Tea", "City Pharmacy"), "Healthcare")
+    
+    def test_patterns_match_whole_words_in_item_only(self):
+        """Test that pattern rules need word boundaries and ignore the merchant"""
+        self.assertEqual(self.categorization_service.categorize_item("Teapot"), "Other")
+        self.assertEqual(self.categorization_service.categorize_item("Item", "Tea House"), "Other")
+        self.assertEqual(self.categorization_service.categorize_item("Green tea"), "Food & Dining")
+    
+    def test_reload_rules(self):
+        """Test that added rules take effect after reload_rules"""
+        self.categorization_service.category_keywords["Travel"].append("ferry")
+        self.assertEqual(self.categorization_service.categorize_item("Ferry ticket"), "Other")
+        self.categorization_service.reload_rules()
+        self.assertEqual(self.categorization_service.categorize_item("Ferry ticket"), "Travel")
+
+    def test_cache_normalizes_and_evicts(self):
+        """Test that case variants share a cache entry and the LRU entry is evicted"""
+        service = CategorizationService(cache_size=2)
+        service.categorize_item("COFFEE", "STARBUCKS")
+        service.categorize_item("Coffee", "Starbucks")
+        service.categorize_item("Parking", None)
+        service.categorize_item("coffee", "starbucks")
+        service.categorize_item("Bread", "")
+        
+        info = service.cache_info()
+        self.assertEqual((info['hits'], info['misses'], info['evictions']), (2, 3, 1))
+        self.assertEqual(info['size'], 2)
+        # "Parking" was least recently used
+        self.assertNotIn(("parking", ""), service._cache)
+        
+        service.reload_rules()
+        self.assertEqual(service.cache_info()['size'], 0)
+
+class TestImagePreprocessor(unittest.TestCase):
+    """Test cases for OCR image preprocessing"""
+    
+    def setUp(self):
+        """Set up a large photo-like image with content in the middle"""
+        self.image = Image.new('RGB', (4000, 3000), 'white')
+        draw = ImageDraw.Draw(self.image)
+        draw.rectangle((1000, 500, 3000, 2500), outline='black', width=8)
+    
+    def test_none_profile_keeps_image(self):
+        """Test that the 'none' profile only normalizes the color mode"""
+        image, timings = ImagePreprocessor('none').process(self.image.convert('L'))
+        self.assertEqual(image.size, (4000, 3000))
+        self.assertEqual(image.mode, 'RGB')
+        self.assertEqual(list(timings), ['decode'])
+    
+    def test_default_profile_shrinks_and_crops(self):
+        """Test that the default profile downscales, grayscales and crops margins"""
+        image, timings = ImagePreprocessor('default').process(self.image)
+        self.assertEqual(image.mode, 'L')
+        self.assertLess(image.width, 1200)
+        self.assertLess(image.height, 900)
+        for step in ('grayscale', 'downscale', 'crop_margins', 'binarize'):
+            self.assertIn(step, timings)
+    
+    def test_steps_are_toggleable(self):
+        """Test that individual steps can be overridden per preprocessor"""
+        image, timings = ImagePreprocessor('default', crop_margins=False, binarize=False).process(self.image)
+        self.assertEqual(image.size, (1200, 900))
+        self.assertNotIn('crop_margins', timings)
+    
+    def test_unknown_profile(self):
+        """Test that unknown profiles are rejected"""
+        with self.assertRaises(ValueError):
+            ImagePreprocessor('sharpest')
+    
+    def test_signature_tracks_configuration(self):
+        """Test that different configurations produce different cache signatures"""
+        self.assertEqual(ImagePreprocessor('none').signature, 'none')
+        self.assertNotEqual(ImagePreprocessor('default').signature, ImagePreprocessor('accurate').signature)
+
+class StaticBackend(OCRBackend):
+    """Backend returning fixed text, standing in for Tesseract"""
+    
+    name = "static"
+    thread_safe = True
+    
+    def __init__(self, text):
+        super().__init__()
+        self.text = text
+        self.images = []
+    
+    @classmethod
+    def engine_version(cls):
+        return "test"
+    
+    def image_to_string(self, image):
+        self.images.append(image)
+        return self.text
+
+class TestOCRBackends(unittest.TestCase):
+    """Test cases for OCR backend selection"""
+    
+    def test_explicit_pytesseract_backend(self):
+        """Test selecting the subprocess backend"""
+        self.assertIsInstance(create_ocr_backend('pytesseract'), PytesseractBackend)
+    
+    def test_tesserocr_falls_back_when_missing(self):
+        """Test that requesting tesserocr without it installed uses pytesseract"""
+        with patch('app.services.ocr_service.TESSEROCR_AVAILABLE', False):
+            self.assertIsInstance(create_ocr_backend('tesserocr'), PytesseractBackend)
+    
+    def test_unknown_backend(self):
+        """Test that unknown backends are rejected"""
+        with self.assertRaises(ValueError):
+            create_ocr_backend('cuneiform')
+    
+    def test_service_uses_backend_with_in_memory_image(self):
+        """Test that OCRService hands the preprocessed image to its backend"""
+        backend = StaticBackend("STARBUCKS COFFEE\nTotal $3.50")
+        ocr_service = OCRService(preprocessing_profile='fast', backend=backend)
+        
+        with tempfile.NamedTemporaryFile(suffix='.png') as image_file:
+            Image.new('RGB', (2400, 1200), 'white').save(image_file.name)
+            receipt_data = ocr_service.extract_receipt_data(image_file.name)
+        
+        self.assertEqual(receipt_data['merchant_name'], "STARBUCKS COFFEE")
+        self.assertEqual(backend.images[0].size, (1200, 600))
+        self.assertIn('ocr', ocr_service.last_timings)
+        self.assertTrue(ocr_service.pipeline_version.startswith('tesseract-test|'))
+
+    def test_backend_without_engine_version_is_abstract(self):
+        """Test that a backend must implement the engine hooks"""
+        with self.assertRaises(TypeError):
+            OCRBackend()
+    
+    def test_pipeline_version_without_loading_engine(self):
+        """Test that the cache's pipeline version matches a service's without creating a backend"""
+        ocr_service = OCRService(preprocessing_profile='fast', backend=StaticBackend(""))
+        with patch.object(StaticBackend, '__init__', side_effect=AssertionError("backend created")):
+            version = ocr_pipeline_version('fast', StaticBackend)
+        self.assertEqual(version, ocr_service.pipeline_version)
+    
+    def test_thread_unsafe_backend_is_never_shared(self):
+        """Test that concurrent extractions each get their own thread-unsafe backend and timings"""
+        class SingleThreadBackend(StaticBackend):
+            thread_safe = False
+            
+            def __init__(self, text="Total $1.00"):
+                super().__init__(text)
+                self.lock = threading.Lock()
+            
+            def clone(self):
+                return SingleThreadBackend(self.text)
+            
+            def image_to_string(self, image):
+                if not self.lock.acquire(blocking=False):
+                    raise AssertionError("backend used by two threads at once")
+                try:
+                    time.sleep(0.02)
+                    return self.text
+                finally:
+                    self.lock.release()
+        
+        ocr_service = OCRService(preprocessing_profile='none', backend=SingleThreadBackend())
+        with tempfile.NamedTemporaryFile(suffix='.png') as image_file:
+            Image.new('RGB', (50, 50), 'white').save(image_file.name)
+            
+            def extract(_):
+                text = ocr_service.extract_text(image_file.name)
+                return text, dict(ocr_service.last_timings)
+            
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                results = list(pool.map(extract, range(8)))
+        
+        self.assertTrue(all(text == "Total $1.00" and 'ocr' in timings for text, timings in results))
+
+def make_text_pdf(lines):
+    """Build a one-page PDF whose text layer holds the given lines"""
+    stream = "BT /F1 12 Tf 14 TL 20 750 Td " + " ".join(f"({line}) '" for line in lines) + " ET"
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+        "/Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+        f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream",
+    ]
+    pdf = "%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += f"{number} 0 obj\n{body}\nendobj\n"
+    xref = len(pdf)
+    pdf += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n"
+    pdf += "".join(f"{offset:010d} 00000 n \n" for offset in offsets)
+    pdf += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n"
+    return pdf.encode("latin-1")
+
+@unittest.skipUnless(PDFIUM_AVAILABLE, "pypdfium2 not installed")
+class TestPDFExtraction(unittest.TestCase):
+    """Test cases for PDF receipts"""
+    
+    def test_text_layer_skips_ocr(self):
+        """Test that a PDF with embedded text is read without rendering or OCR"""
+        backend = StaticBackend("should not be used")
+        ocr_service = OCRService(backend=backend)
+        pdf = make_text_pdf(["WALMART SUPERCENTER", "Milk 3.49", "Total $3.49"])
+        
+        self.assertTrue(is_pdf(pdf))
+        receipt_data = ocr_service.extract_receipt_data(pdf)
+        
+        self.assertEqual(receipt_data['merchant_name'], "WALMART SUPERCENTER")
+        self.assertEqual(receipt_data['total_amount'], 3.49)
+        self.assertEqual(backend.images, [])
+    
+    def test_scanned_pages_are_ocred_in_page_order(self):
+        """Test that every page of an image-only PDF is OCRed and merged in order"""
+        class PageBackend(StaticBackend):
+            def image_to_string(self, image):
+                # Pages are drawn with a different width so they can be told apart
+                return f"page-{image.width}"
+        
+        ocr_service = OCRService(preprocessing_profile='none', backend=PageBackend(""))
+        ocr_service.pdf_extractor.dpi = 72
+        pages = [Image.new('RGB', (100 + 10 * index, 200), 'white') for index in range(5)]
+        
+        with tempfile.NamedTemporaryFile(suffix='.pdf') as pdf_file:
+            pages[0].save(pdf_file.name, 'PDF', save_all=True, append_images=pages[1:], resolution=72)
+            text = ocr_service.extract_text(pdf_file.name)
+        
+        self.assertEqual(text.split('\n'), [f"page-{100 + 10 * index}" for index in range(5)])
+        self.assertIn('pdf_render', ocr_service.last_timings)
+
 class TestIntegration(unittest.TestCase):
     """Integration tests for OCR and categorization"""
     
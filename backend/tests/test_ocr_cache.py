@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+OCR Cache Tests for Scan&Track
+Unit tests for the content-hash OCR result cache
+"""
+
+import unittest
+import sys
+import os
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models import Base, OCRCacheEntry, Receipt
+from app.services.ocr_cache import OCRCache
+
+RECEIPT_DATA = {
+    "raw_text": "STARBUCKS COFFEE\nTotal $3.50",
+    "merchant_name": "STARBUCKS COFFEE",
+    "total_amount": 3.50,
+    "purchase_date": None,
+    "items": []
+}
+
+class TestOCRCache(unittest.TestCase):
+    """Test cases for the OCR cache"""
+
+    def setUp(self):
+        """Set up an in-memory database"""
+        engine = create_engine(
+            "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        Base.metadata.create_all(bind=engine)
+        self.db = sessionmaker(bind=engine)()
+        self.cache = OCRCache(max_entries=2, max_age_days=30, enabled=True, pipeline_version="v1")
+
+    def tearDown(self):
+        """Tear down fixtures"""
+        self.db.close()
+
+    def test_miss_then_hit(self):
+        """Test that stored results are returned for the same content hash"""
+        content_hash = OCRCache.content_hash(b"image bytes")
+        self.assertIsNone(self.cache.get(self.db, content_hash))
+
+        self.cache.put(self.db, content_hash, RECEIPT_DATA)
+        self.assertEqual(self.cache.get(self.db, content_hash), RECEIPT_DATA)
+
+        stats = self.cache.stats(self.db)
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["entries"], 1)
+        self.assertEqual(self.db.get(OCRCacheEntry, content_hash).hit_count, 1)
+
+    def test_pipeline_version_invalidates(self):
+        """Test that entries written by another pipeline version are ignored and evicted"""
+        content_hash = OCRCache.content_hash(b"image bytes")
+        self.cache.put(self.db, content_hash, RECEIPT_DATA)
+
+        upgraded = OCRCache(max_entries=2, max_age_days=30, enabled=True, pipeline_version="v2")
+        self.assertIsNone(upgraded.get(self.db, content_hash))
+        self.assertEqual(upgraded.evict(self.db), 1)
+
+    def test_evicts_least_recently_used(self):
+        """Test that the cache is trimmed to max_entries by last use"""
+        hashes = [OCRCache.content_hash(bytes([i])) for i in range(3)]
+        for content_hash in hashes:
+            self.cache.put(self.db, content_hash, RECEIPT_DATA)
+
+        self.assertEqual(self.cache.evict(self.db), 1)
+        self.assertEqual(self.cache.stats(self.db)["entries"], 2)
+
+    def test_leaves_the_callers_transaction_alone(self):
+        """Test that cache reads and writes neither commit nor discard the caller's pending work"""
+        content_hash = OCRCache.content_hash(b"image bytes")
+        self.db.add(Receipt(filename="pending.jpg", file_path="uploads/pending.jpg"))
+        self.db.flush()
+
+        self.cache.put(self.db, content_hash, RECEIPT_DATA)
+        self.cache.put(self.db, content_hash, RECEIPT_DATA)
+        self.assertIsNotNone(self.cache.get(self.db, content_hash))
+        self.assertTrue(self.db.in_transaction())
+        self.assertEqual(self.db.query(Receipt).count(), 1)
+
+        self.db.rollback()
+        self.assertEqual(self.db.query(Receipt).count(), 0)
+        self.assertIsNone(self.cache.get(self.db, content_hash))
+
+if __name__ == '__main__':
+    # Run tests
+    unittest.main(verbosity=2)
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+OCR Executor Tests for Scan&Track
+Unit tests for running OCR off the event loop
+"""
+
+import asyncio
+import time
+import unittest
+import sys
+import os
+from unittest.mock import AsyncMock, MagicMock, patch
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services import receipt_pipeline
+from app.services.ocr_executor import OCRExecutor
+from app.services.ocr_service import OCRService
+
+RECEIPT_TEXT = """
+STARBUCKS COFFEE
+Date: 01/15/2024
+Coffee $3.50
+Total $3.50
+"""
+
+class TestOCRExecutor(unittest.TestCase):
+    """Test cases for the OCR executor"""
+
+    def test_thread_fallback_without_pool(self):
+        """Test that an executor without worker processes still processes receipts"""
+        executor = OCRExecutor(max_workers=0)
+        executor.start()
+        self.assertFalse(executor.running)
+
+        with patch.object(OCRService, 'extract_text', return_value=RECEIPT_TEXT):
+            result = asyncio.run(executor.process_receipt(b"fake_image_data"))
+
+        self.assertEqual(result["merchant_name"], "STARBUCKS COFFEE")
+        self.assertEqual(result["total_amount"], 3.50)
+        for item in result["items"]:
+            self.assertIsNotNone(item["category"])
+
+    def test_cached_receipts_are_categorized_in_the_executor(self):
+        """Test that an OCR cache hit is categorized by the executor, not on the event loop"""
+        receipt_data = {"merchant_name": "STARBUCKS COFFEE", "items": [{"item_name": "Latte", "total_price": 4.5}]}
+        executor = OCRExecutor(max_workers=0)
+        categorize = AsyncMock(side_effect=executor.categorize_receipt)
+        with patch.object(receipt_pipeline.ocr_cache, 'get', return_value=receipt_data), \
+                patch.object(receipt_pipeline.ocr_executor, 'categorize_receipt', categorize):
+            result = asyncio.run(receipt_pipeline.process_receipt_file(MagicMock(), "uploads/r.jpg", "hash"))
+
+        categorize.assert_awaited_once_with(receipt_data)
+        self.assertIsNotNone(result["items"][0]["category"])
+        self.assertNotIn("category", receipt_data["items"][0])
+
+    def test_shutdown_is_idempotent(self):
+        """Test that shutting down a stopped executor is a no-op"""
+        executor = OCRExecutor(max_workers=0)
+        executor.shutdown()
+        executor.shutdown()
+        self.assertFalse(executor.running)
+
+    def test_shutdown_finishes_queued_receipts(self):
+        """Test that receipts still queued behind a busy worker are processed, not cancelled"""
+        executor = OCRExecutor(max_workers=1)
+        executor.start()
+        pool = executor._pool
+        futures = [pool.submit(time.sleep, 0.2) for _ in range(3)]
+        executor.shutdown()
+
+        self.assertFalse(executor.running)
+        self.assertTrue(all(future.done() and not future.cancelled() for future in futures))
+
+if __name__ == '__main__':
+    # Run tests
+    unittest.main(verbosity=2)
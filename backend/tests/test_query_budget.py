@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Query Budget Tests for Scan&Track
+Fail when list endpoints go back to loading receipt items one receipt at a time,
+or analytics endpoints grow extra round trips
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.main import app
+from app.api import analytics
+from app.database import async_session_override, get_async_db
+from app.models import Base
+from app.services.analytics_cache import AnalyticsCache, MemoryCacheBackend
+from app.services.receipt_store import create_receipt
+from app.services.spending_rollups import rebuild_rollups
+from utils.data_export import OPENPYXL_AVAILABLE, DataExporter
+from query_counter import QueryBudgetMixin
+
+RECEIPTS = 100
+
+# Generous enough for slow CI machines; the rollup queries take a few milliseconds
+ANALYTICS_LATENCY_MS = 500
+
+class TestQueryBudget(QueryBudgetMixin, unittest.TestCase):
+    """Statement and latency budgets for list and analytics endpoints"""
+
+    @classmethod
+    def setUpClass(cls):
+        """Create a database with receipts that each have a few items"""
+        cls.db_dir = tempfile.TemporaryDirectory()
+        cls.engine = create_engine(f"sqlite:///{os.path.join(cls.db_dir.name, 'test.db')}")
+        Base.metadata.create_all(bind=cls.engine)
+        cls.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=cls.engine)
+
+        db = cls.SessionLocal()
+        try:
+            for index in range(RECEIPTS):
+                items = [{"item_name": f"Item {n}", "unit_price": 1.0, "total_price": 1.0, "category": "Other"}
+                         for n in range(3)]
+                create_receipt(db, items, filename=f"r{index}.jpg", file_path=f"uploads/r{index}.jpg",
+                               total_amount=3.0)
+            rebuild_rollups(db)
+            db.commit()
+        finally:
+            db.close()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Tear down fixtures"""
+        cls.engine.dispose()
+        cls.db_dir.cleanup()
+
+    def setUp(self):
+        """Route the API to the seeded database"""
+        self.async_engine, override_get_async_db = async_session_override(str(self.engine.url))
+        app.dependency_overrides[get_async_db] = override_get_async_db
+        # Measure the analytics queries themselves, not cached responses
+        self.cache_patch = patch.object(analytics, 'analytics_cache', AnalyticsCache(None))
+        self.cache_patch.start()
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        """Tear down fixtures"""
+        self.cache_patch.stop()
+        app.dependency_overrides.clear()
+
+    def test_receipt_list(self):
+        """Test that a page of receipts costs one query plus one for all their items"""
+        with self.assertQueryBudget(self.async_engine.sync_engine, 2):
+            response = self.client.get(f"/api/receipts/?limit={RECEIPTS}")
+        self.assertEqual(len(response.json()), RECEIPTS)
+        self.assertEqual(len(response.json()[0]["items"]), 3)
+
+    def test_single_receipt(self):
+        """Test that one receipt is loaded with its items in two queries"""
+        receipt_id = self.client.get("/api/receipts/?limit=1").json()[0]["id"]
+        with self.assertQueryBudget(self.async_engine.sync_engine, 2):
+            response = self.client.get(f"/api/receipts/{receipt_id}")
+        self.assertEqual(len(response.json()["items"]), 3)
+
+    def test_expense_analytics(self):
+        """Test that expense analytics take one statement for the totals and one for recent receipts"""
+        with self.assertQueryBudget(self.async_engine.sync_engine, 2), self.assertLatencyBudget(ANALYTICS_LATENCY_MS):
+            response = self.client.get("/api/analytics/expenses")
+        self.assertEqual(response.json()["total_expenses"], 3.0 * RECEIPTS)
+        self.assertEqual(len(response.json()["recent_receipts"]), 10)
+        self.assertEqual(len(response.json()["recent_receipts"][0]["items"]), 3)
+
+    def test_category_stats(self):
+        """Test that category statistics take a single statement"""
+        with self.assertQueryBudget(self.async_engine.sync_engine, 1), self.assertLatencyBudget(ANALYTICS_LATENCY_MS):
+            response = self.client.get("/api/analytics/categories")
+        self.assertEqual(response.json()[0]["item_count"], 3 * RECEIPTS)
+
+    def test_monthly_trends(self):
+        """Test that monthly trends take a single statement"""
+        with self.assertQueryBudget(self.async_engine.sync_engine, 1), self.assertLatencyBudget(ANALYTICS_LATENCY_MS):
+            response = self.client.get("/api/analytics/monthly-trends")
+        self.assertEqual(sum(sum(month.values()) for month in response.json().values()), 3.0 * RECEIPTS)
+
+    def test_cached_analytics(self):
+        """Test that a cached response costs only the data version lookup"""
+        with patch.object(analytics, 'analytics_cache', AnalyticsCache(MemoryCacheBackend())):
+            self.client.get("/api/analytics/expenses")
+            with self.assertQueryBudget(self.async_engine.sync_engine, 1):
+                response = self.client.get("/api/analytics/expenses")
+        self.assertEqual(response.headers["X-Cache"], "HIT")
+
+    @unittest.skipUnless(OPENPYXL_AVAILABLE, "openpyxl not installed")
+    def test_excel_export(self):
+        """Test that the Excel export reads receipts, their items and the summary in four queries"""
+        db = self.SessionLocal()
+        try:
+            with tempfile.TemporaryDirectory() as out_dir, self.assertQueryBudget(self.engine, 4):
+                DataExporter(db).export_to_excel(os.path.join(out_dir, "receipts.xlsx"))
+        finally:
+            db.close()
+
+if __name__ == '__main__':
+    # Run tests
+    unittest.main(verbosity=2)
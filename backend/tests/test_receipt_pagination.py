@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Receipt Pagination Tests for Scan&Track
+Tests for cursor pagination and filters on the receipt list
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.main import app
+from app.database import async_session_override, get_async_db
+from app.models import Base
+from app.services.receipt_store import create_receipt
+
+class TestReceiptPagination(unittest.TestCase):
+    """Test cases for GET /api/receipts/page"""
+
+    @classmethod
+    def setUpClass(cls):
+        """Create receipts, most of them sharing a created_at second"""
+        cls.db_dir = tempfile.TemporaryDirectory()
+        cls.engine = create_engine(f"sqlite:///{os.path.join(cls.db_dir.name, 'test.db')}")
+        Base.metadata.create_all(bind=cls.engine)
+        cls.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=cls.engine)
+
+        db = cls.SessionLocal()
+        try:
+            for index in range(25):
+                category = "Travel" if index % 5 == 0 else "Food & Dining"
+                fields = {"filename": f"r{index}.jpg", "file_path": f"uploads/r{index}.jpg",
+                          "merchant_name": "Harbour Hotel" if index % 5 == 0 else "Corner Deli"}
+                if index < 5:
+                    # Older receipts with explicit timestamps, two of them identical
+                    fields["created_at"] = datetime(2024, 1, 1) + timedelta(hours=min(index, 3))
+                items = [{"item_name": "Thing", "unit_price": 1.0, "total_price": 1.0, "category": category}]
+                create_receipt(db, items, **fields)
+            db.commit()
+        finally:
+            db.close()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Tear down fixtures"""
+        cls.engine.dispose()
+        cls.db_dir.cleanup()
+
+    def setUp(self):
+        """Route the API to the seeded database"""
+        self.async_engine, override_get_async_db = async_session_override(str(self.engine.url))
+        app.dependency_overrides[get_async_db] = override_get_async_db
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        """Tear down fixtures"""
+        app.dependency_overrides.clear()
+
+    def collect(self, **params):
+        """Follow next_cursor until the last page and return all receipt ids"""
+        ids, cursor = [], None
+        while True:
+            response = self.client.get("/api/receipts/page", params={**params, **({"cursor": cursor} if cursor else {})})
+            self.assertEqual(response.status_code, 200)
+            page = response.json()
+            ids.extend(receipt["id"] for receipt in page["items"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return ids
+
+    def test_pages_cover_every_receipt_once_in_order(self):
+        """Test that walking the cursor matches the offset listing exactly"""
+        ids = self.collect(limit=7)
+        offset_ids = [receipt["id"] for receipt in self.client.get("/api/receipts/?limit=100").json()]
+        self.assertEqual(len(ids), 25)
+        self.assertEqual(ids, offset_ids)
+
+    def test_filters(self):
+        """Test merchant, category and date range filters"""
+        self.assertEqual(len(self.collect(limit=2, merchant="hotel")), 5)
+        self.assertEqual(len(self.collect(limit=2, category="Food & Dining")), 20)
+        self.assertEqual(len(self.collect(start_date="2024-01-01T00:00:00", end_date="2024-01-01T02:00:00")), 3)
+        self.assertEqual(len(self.collect(limit=1, start_date="2024-01-01T03:00:00", end_date="2024-01-01T03:00:00")), 2)
+
+    def test_invalid_cursor(self):
+        """Test that a malformed cursor is rejected"""
+        response = self.client.get("/api/receipts/page", params={"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 400)
+
+if __name__ == '__main__':
+    # Run tests
+    unittest.main(verbosity=2)
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Receipt Parser Tests for Scan&Track
+Unit tests for the single-pass receipt text parser
+"""
+
+import unittest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.receipt_parser import parse_receipt_text
+
+class TestReceiptParser(unittest.TestCase):
+    """Test cases for parse_receipt_text"""
+    
+    def test_full_receipt(self):
+        """Test that every field is filled from one receipt"""
+        receipt_data = parse_receipt_text("""1234
+        CORNER DELI
+        Date: 03/07/2024
+        Bagel $2.50
+        Total: $2.50
+        """)
+        
+        self.assertEqual(receipt_data['merchant_name'], "CORNER DELI")
+        self.assertEqual(receipt_data['total_amount'], 2.50)
+        self.assertEqual(receipt_data['purchase_date'], "03/07/2024")
+        self.assertEqual([item['item_name'] for item in receipt_data['items']], ["Date:", "Bagel", "Total:"])
+    
+    def test_total_on_following_line(self):
+        """Test that an amount printed below its TOTAL label is still found"""
+        self.assertEqual(parse_receipt_text("Coffee $3.50\nTOTAL\n\n   $3.50")['total_amount'], 3.50)
+        self.assertEqual(parse_receipt_text("TOTAL\nCash\n$20.00")['total_amount'], 20.00)
+    
+    def test_total_preferred_over_amount_and_dollars(self):
+        """Test keyword precedence: last total, then last amount, then last dollar figure"""
+        self.assertEqual(parse_receipt_text("Total 5.00\nAmount 7.00\n$9.00")['total_amount'], 5.00)
+        self.assertEqual(parse_receipt_text("Amount 7.00\n$9.00")['total_amount'], 7.00)
+        self.assertEqual(parse_receipt_text("$1.00 $ x\n$9.00 $")['total_amount'], 9.00)
+    
+    def test_date_precedence(self):
+        """Test that a slash date wins even when it appears after other formats"""
+        self.assertEqual(parse_receipt_text("2024-01-15\n02/16/2024")['purchase_date'], "02/16/2024")
+        self.assertEqual(parse_receipt_text("Paid 15\nMarch 2024")['purchase_date'], "15\nMarch 2024")
+    
+    def test_empty_text(self):
+        """Test that empty OCR output yields empty fields"""
+        self.assertEqual(parse_receipt_text(""), {
+            "merchant_name": None, "total_amount": None, "purchase_date": None, "items": []
+        })
+
+if __name__ == '__main__':
+    # Run tests
+    unittest.main(verbosity=2)
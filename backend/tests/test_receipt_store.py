@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Receipt Store Tests for Scan&Track
+Tests for writing receipts and their items in a single transaction
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+from unittest.mock import patch, AsyncMock
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.main import app
+from app.database import async_session_factory, async_session_override, get_async_db
+from app.models import Base, Receipt, ReceiptItem
+from app.services.ocr_executor import ocr_executor
+from app.services.ingestion_queue import ingestion_queue
+from app.services.receipt_store import create_receipt, replace_items
+
+ITEMS = [
+    {"item_name": "Coffee", "quantity": 1.0, "unit_price": 3.50, "total_price": 3.50, "category": "Food & Dining"},
+    {"item_name": "Bagel", "unit_price": 2.25, "total_price": 2.25},
+    {"item_name": "Parking", "quantity": 2.0, "unit_price": 4.00, "total_price": 8.00, "category": "Transportation"},
+]
+
+class TestReceiptStore(unittest.TestCase):
+    """Test cases for the receipt persistence helpers"""
+
+    def setUp(self):
+        """Set up an isolated database"""
+        self.db_dir = tempfile.TemporaryDirectory()
+        self.engine = create_engine(f"sqlite:///{os.path.join(self.db_dir.name, 'test.db')}")
+        Base.metadata.create_all(bind=self.engine)
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self.statements = []
+        event.listen(self.engine, "before_cursor_execute", self.record_statement)
+
+    def tearDown(self):
+        """Tear down fixtures"""
+        app.dependency_overrides.clear()
+        self.engine.dispose()
+        self.db_dir.cleanup()
+
+    def record_statement(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def test_create_receipt_uses_two_inserts(self):
+        """Test that a receipt and all of its items take one INSERT each and no SELECT"""
+        db = self.SessionLocal()
+        try:
+            receipt = create_receipt(db, ITEMS, filename="r.jpg", file_path="uploads/r.jpg", merchant_name="Deli")
+            self.assertIsNotNone(receipt.id)
+            self.assertEqual(receipt.processing_status, "completed")
+            self.assertEqual([item.item_name for item in receipt.items], ["Coffee", "Bagel", "Parking"])
+            self.assertEqual(receipt.items[1].quantity, 1.0)
+            db.commit()
+        finally:
+            db.close()
+
+        self.assertEqual(len([s for s in self.statements if s.startswith("INSERT")]), 2)
+        self.assertFalse([s for s in self.statements if s.startswith("SELECT")])
+
+    def test_rollback_leaves_nothing_behind(self):
+        """Test that nothing is written until the caller commits"""
+        db = self.SessionLocal()
+        try:
+            create_receipt(db, ITEMS, filename="r.jpg", file_path="uploads/r.jpg")
+            db.rollback()
+            self.assertEqual(db.query(Receipt).count(), 0)
+            self.assertEqual(db.query(ReceiptItem).count(), 0)
+        finally:
+            db.close()
+
+    def test_replace_items(self):
+        """Test that replacing items removes the old ones"""
+        db = self.SessionLocal()
+        try:
+            receipt = create_receipt(db, ITEMS, filename="r.jpg", file_path="uploads/r.jpg")
+            db.commit()
+            replace_items(db, receipt, ITEMS[:1])
+            db.commit()
+            self.assertEqual(db.query(ReceiptItem).filter(ReceiptItem.receipt_id == receipt.id).count(), 1)
+        finally:
+            db.close()
+
+    def test_sync_upload_and_update(self):
+        """Test the upload and update endpoints end to end"""
+        self.async_engine, override_get_async_db = async_session_override(str(self.engine.url))
+        app.dependency_overrides[get_async_db] = override_get_async_db
+        _, TestingAsyncSessionLocal = async_session_factory(str(self.engine.url))
+        receipt_data = {"raw_text": "Deli\nTotal 13.75", "merchant_name": "Deli", "total_amount": 13.75,
+                        "purchase_date": "2024-01-15", "items": ITEMS}
+        mock_extract = AsyncMock(return_value=receipt_data)
+        with patch.object(ocr_executor, 'max_workers', 0), \
+                patch.object(ocr_executor, 'extract_receipt_data', mock_extract), \
+                patch.object(ingestion_queue, 'session_factory', TestingAsyncSessionLocal), TestClient(app) as client:
+            response = client.post(
+                "/api/receipts/upload?mode=sync",
+                files={"file": ("test.jpg", b"fake_image_data", "image/jpeg")}
+            )
+            self.assertEqual(response.status_code, 200)
+            receipt = response.json()
+            self.assertEqual(len(receipt["items"]), 3)
+            self.assertIsNotNone(receipt["created_at"])
+
+            response = client.put(f"/api/receipts/{receipt['id']}", json={
+                "merchant_name": "Corner Deli",
+                "items": [{"item_name": "Tea", "quantity": 1, "unit_price": 2.0, "total_price": 2.0}]
+            })
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()["merchant_name"], "Corner Deli")
+            self.assertEqual([item["item_name"] for item in response.json()["items"]], ["Tea"])
+
+            client.delete(f"/api/receipts/{receipt['id']}")
+
+if __name__ == '__main__':
+    # Run tests
+    unittest.main(verbosity=2)
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Spending Rollup Tests for Scan&Track
+Tests that the daily rollups follow receipt writes and back the analytics endpoints
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+from unittest.mock import patch
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import sessionmaker
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.main import app
+from app.api import analytics
+from app.database import async_session_override, get_async_db
+from app.models import Base, DailyCategoryRollup, DailySpendRollup
+from app.services.analytics_cache import AnalyticsCache
+from app.services.receipt_store import create_receipt
+from app.services.spending_rollups import find_rollup_mismatches, rebuild_rollups, refresh_receipt_rollups
+
+def item(name, price, category):
+    return {"item_name": name, "unit_price": price, "total_price": price, "category": category}
+
+class TestSpendingRollups(unittest.TestCase):
+    """Test cases for the daily spending rollups"""
+
+    def setUp(self):
+        """Set up an isolated database routed to the API"""
+        self.db_dir = tempfile.TemporaryDirectory()
+        self.engine = create_engine(f"sqlite:///{os.path.join(self.db_dir.name, 'test.db')}")
+        Base.metadata.create_all(bind=self.engine)
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+
+        self.async_engine, override_get_async_db = async_session_override(str(self.engine.url))
+        app.dependency_overrides[get_async_db] = override_get_async_db
+        # Every analytics request reads the rollups rather than a cached response
+        self.cache_patch = patch.object(analytics, 'analytics_cache', AnalyticsCache(None))
+        self.cache_patch.start()
+        self.client = TestClient(app)
+        self.today = datetime.now().replace(hour=12, minute=0, second=0, microsecond=0)
+
+    def tearDown(self):
+        """Tear down fixtures"""
+        self.cache_patch.stop()
+        app.dependency_overrides.clear()
+        self.engine.dispose()
+        self.db_dir.cleanup()
+
+    def add_receipt(self, created_at, total_amount, items):
+        db = self.SessionLocal()
+        try:
+            receipt = create_receipt(db, items, filename="r.jpg", file_path="uploads/missing.jpg",
+                                     total_amount=total_amount, created_at=created_at)
+            refresh_receipt_rollups(db, [receipt])
+            db.commit()
+            return receipt.id
+        finally:
+            db.close()
+
+    def assertConsistent(self):
+        db = self.SessionLocal()
+        try:
+            self.assertEqual(find_rollup_mismatches(db), [])
+        finally:
+            db.close()
+
+    def test_writes_keep_rollups_consistent(self):
+        """Test that upload, update and delete leave rollups equal to the raw aggregation"""
+        first = self.add_receipt(self.today, 10.0, [item("Coffee", 4.0, "Food & Dining"), item("Bagel", 6.0, "Food & Dining")])
+        second = self.add_receipt(self.today, 30.0, [item("Parking", 30.0, "Transportation")])
+        self.add_receipt(self.today - timedelta(days=3), 5.0, [item("Tea", 5.0, "Food & Dining")])
+        self.assertConsistent()
+
+        response = self.client.put(f"/api/receipts/{first}", json={
+            "total_amount": 8.0,
+            "items": [{"item_name": "Pen", "quantity": 1, "unit_price": 8.0, "total_price": 8.0, "category": "Shopping"}]
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertConsistent()
+
+        self.assertEqual(self.client.delete(f"/api/receipts/{second}").status_code, 200)
+        self.assertConsistent()
+
+        db = self.SessionLocal()
+        try:
+            today = db.get(DailySpendRollup, self.today.date())
+            self.assertEqual((today.receipt_count, today.total_amount), (1, 8.0))
+            self.assertIsNone(db.get(DailyCategoryRollup, (self.today.date(), "Transportation")))
+        finally:
+            db.close()
+
+    def test_analytics_read_rollups(self):
+        """Test the analytics endpoints against known totals"""
+        self.add_receipt(self.today, 10.0, [item("Coffee", 4.0, "Food & Dining"), item("Bagel", 6.0, "Food & Dining")])
+        self.add_receipt(self.today - timedelta(days=1), 30.0, [item("Parking", 30.0, "Transportation")])
+        # Outside a one month window
+        self.add_receipt(self.today - timedelta(days=60), 99.0, [item("Taxi", 99.0, "Transportation")])
+
+        expenses = self.client.get("/api/analytics/expenses?months=1").json()
+        self.assertEqual(expenses["total_expenses"], 40.0)
+        self.assertEqual(
+            {row["category"]: row["total"] for row in expenses["category_breakdown"]},
+            {"Food & Dining": 10.0, "Transportation": 30.0}
+        )
+        self.assertEqual(sum(row["total"] for row in expenses["monthly_expenses"]), 40.0)
+
+        categories = {row["category"]: row for row in self.client.get("/api/analytics/categories?months=1").json()}
+        food = categories["Food & Dining"]
+        self.assertEqual((food["item_count"], food["avg_amount"], food["min_amount"], food["max_amount"]), (2, 5.0, 4.0, 6.0))
+
+        trends = self.client.get("/api/analytics/monthly-trends?months=3").json()
+        self.assertEqual(sum(total for month in trends.values() for total in month.values()), 139.0)
+
+    def test_check_detects_and_rebuild_repairs_drift(self):
+        """Test that the consistency check reports tampered rows and a rebuild fixes them"""
+        self.add_receipt(self.today, 10.0, [item("Coffee", 10.0, "Food & Dining")])
+        db = self.SessionLocal()
+        try:
+            db.execute(update(DailySpendRollup).values(total_amount=11.0))
+            db.commit()
+            mismatches = find_rollup_mismatches(db)
+            self.assertEqual(len(mismatches), 1)
+            self.assertEqual(mismatches[0]["table"], "daily_spend_rollups")
+            self.assertEqual(mismatches[0]["actual"]["total_amount"], 11.0)
+
+            counts = rebuild_rollups(db)
+            db.commit()
+            self.assertEqual(counts, {"days": 1, "category_days": 1})
+            self.assertEqual(find_rollup_mismatches(db), [])
+        finally:
+            db.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Upload Storage Tests for Scan&Track
+Unit tests for streaming uploads to disk
+"""
+
+import asyncio
+import hashlib
+import io
+import unittest
+import sys
+import os
+import tempfile
+import threading
+from unittest.mock import patch
+from fastapi import UploadFile
+from fastapi.testclient import TestClient
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.main import app
+from app.services import upload_storage
+from app.services.upload_storage import CHUNK_SIZE, MAX_FILE_SIZE, store_upload, hash_file, UploadTooLarge
+
+class TestUploadStorage(unittest.TestCase):
+    """Test cases for streaming upload storage"""
+
+    def setUp(self):
+        """Set up a scratch upload directory"""
+        self.upload_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """Tear down fixtures"""
+        self.upload_dir.cleanup()
+
+    def test_store_upload_hashes_and_writes(self):
+        """Test that a streamed upload is written whole and hashed"""
+        content = os.urandom(3 * 1024 * 1024 + 17)
+        upload = UploadFile(file=io.BytesIO(content), filename="receipt.jpg")
+
+        stored = asyncio.run(store_upload(upload, "jpg", max_size=len(content), upload_dir=self.upload_dir.name))
+
+        self.assertEqual(stored.size, len(content))
+        self.assertEqual(stored.content_hash, hashlib.sha256(content).hexdigest())
+        self.assertEqual(hash_file(stored.file_path), stored.content_hash)
+        with open(stored.file_path, "rb") as f:
+            self.assertEqual(f.read(), content)
+
+    def test_oversized_upload_is_rejected_and_cleaned_up(self):
+        """Test that an upload over the limit raises and leaves nothing on disk"""
+        upload = UploadFile(file=io.BytesIO(b"x" * (2 * 1024 * 1024)), filename="large.jpg")
+
+        with self.assertRaises(UploadTooLarge):
+            asyncio.run(store_upload(upload, "jpg", max_size=1024 * 1024, upload_dir=self.upload_dir.name))
+
+        self.assertEqual(os.listdir(self.upload_dir.name), [])
+
+    def test_chunks_are_written_off_the_event_loop(self):
+        """Test that hashing and writing happen in worker threads, not on the event loop's thread"""
+        upload = UploadFile(file=io.BytesIO(os.urandom(2 * 1024 * 1024 + 1)), filename="receipt.jpg")
+        threads = []
+        hash_and_write = upload_storage._hash_and_write
+
+        def record_thread(*args):
+            threads.append(threading.get_ident())
+            hash_and_write(*args)
+
+        async def store():
+            with patch.object(upload_storage, '_hash_and_write', side_effect=record_thread):
+                await store_upload(upload, "jpg", upload_dir=self.upload_dir.name)
+            return threading.get_ident()
+
+        loop_thread = asyncio.run(store())
+        self.assertEqual(len(threads), 3)
+        self.assertNotIn(loop_thread, threads)
+
+    def test_size_limit_only_applies_to_uploads(self):
+        """Test that the Content-Length check rejects large uploads but no other POST"""
+        client = TestClient(app)
+        body = b"x" * (MAX_FILE_SIZE + 128 * 1024)
+
+        self.assertEqual(client.post("/api/receipts/upload", content=body).status_code, 400)
+        self.assertEqual(client.post("/api/analytics/categories", content=body).status_code, 405)
+
+    def test_size_limit_counts_bodies_without_content_length(self):
+        """Test that an oversized chunked upload is refused while it is being received"""
+        client = TestClient(app)
+        boundary = "receipt-boundary"
+
+        def body():
+            yield (f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; "
+                   f"filename=\"receipt.jpg\"\r\nContent-Type: image/jpeg\r\n\r\n").encode()
+            for _ in range(MAX_FILE_SIZE // CHUNK_SIZE + 2):
+                yield b"x" * CHUNK_SIZE
+
+        response = client.post(
+            "/api/receipts/upload",
+            content=body(),
+            headers={"content-type": f"multipart/form-data; boundary={boundary}"}
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["detail"], "File too large. Maximum size is 10MB.")
+
+if __name__ == '__main__':
+    # Run tests
+    unittest.main(verbosity=2)
@@ -1,11 +1,9 @@
 #!/usr/bin/env python3
 """
 Data Export Utility for Scan&Track
-Export receipt data to various formats (CSV, JSON, Excel)
+Export receipt data to various formats (CSV, JSON Lines, JSON, Parquet, Arrow, Excel)
 """
 
-import csv
-import json
 import sys
 import os
 import argparse
@@ -17,14 +15,17 @@ from typing import List, Dict, Any
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 try:
-    import pandas as pd
-    PANDAS_AVAILABLE = True
+    from openpyxl import Workbook
+    from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+    OPENPYXL_AVAILABLE = True
 except ImportError:
-    PANDAS_AVAILABLE = False
-    print("Warning: pandas not available. Excel export will be disabled.")
+    OPENPYXL_AVAILABLE = False
+    print("Warning: openpyxl not available. Excel export will be disabled.")
 
 from app.database import SessionLocal
-from app.models.receipt import Receipt, ReceiptItem
+from app.services.columnar_export import PYARROW_AVAILABLE, ColumnarExporter
+from app.services.incremental_export import INCREMENTAL_FORMATS, run_incremental_export
+from app.services.receipt_export import CsvEncoder, JsonEncoder, JsonLinesEncoder, export_summary, iter_export_batches, write_export
 
 class DataExporter:
     """Export receipt data to various formats"""
@@ -33,178 +34,91 @@ class DataExporter:
         self.db_session = db_session or SessionLocal()
     
     def export_to_csv(self, output_file: str, start_date=None, end_date=None):
-        """Export receipts to CSV format"""
-        receipts = self._get_receipts(start_date, end_date)
-        
-        with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
-            fieldnames = [
-                'receipt_id', 'filename', 'merchant_name', 'total_amount',
-                'purchase_date', 'created_at', 'item_name', 'item_quantity',
-                'item_unit_price', 'item_total_price', 'item_category'
-            ]
-            
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-            
-            for receipt in receipts:
-                if receipt.items:
-                    for item in receipt.items:
-                        writer.writerow({
-                            'receipt_id': receipt.id,
-                            'filename': receipt.filename,
-                            'merchant_name': receipt.merchant_name or '',
-                            'total_amount': receipt.total_amount or 0,
-                            'purchase_date': receipt.purchase_date.isoformat() if receipt.purchase_date else '',
-                            'created_at': receipt.created_at.isoformat(),
-                            'item_name': item.item_name,
-                            'item_quantity': item.quantity,
-                            'item_unit_price': item.unit_price,
-                            'item_total_price': item.total_price,
-                            'item_category': item.category or ''
-                        })
-                else:
-                    # Receipt without items
-                    writer.writerow({
-                        'receipt_id': receipt.id,
-                        'filename': receipt.filename,
-                        'merchant_name': receipt.merchant_name or '',
-                        'total_amount': receipt.total_amount or 0,
-                        'purchase_date': receipt.purchase_date.isoformat() if receipt.purchase_date else '',
-                        'created_at': receipt.created_at.isoformat(),
-                        'item_name': '',
-                        'item_quantity': '',
-                        'item_unit_price': '',
-                        'item_total_price': '',
-                        'item_category': ''
-                    })
-        
+        """Export receipts to CSV format, one row per item"""
+        self._write(CsvEncoder(start_date, end_date), output_file)
         print(f"✅ Data exported to CSV: {output_file}")
     
+    def export_to_jsonl(self, output_file: str, start_date=None, end_date=None):
+        """Export receipts to JSON Lines format, one receipt per line"""
+        self._write(JsonLinesEncoder(start_date, end_date), output_file)
+        print(f"✅ Data exported to JSON Lines: {output_file}")
+    
     def export_to_json(self, output_file: str, start_date=None, end_date=None):
         """Export receipts to JSON format"""
-        receipts = self._get_receipts(start_date, end_date)
-        
-        export_data = {
-            'export_info': {
-                'exported_at': datetime.now().isoformat(),
-                'total_receipts': len(receipts),
-                'start_date': start_date.isoformat() if start_date else None,
-                'end_date': end_date.isoformat() if end_date else None
-            },
-            'receipts': []
-        }
-        
-        for receipt in receipts:
-            receipt_data = {
-                'id': receipt.id,
-                'filename': receipt.filename,
-                'file_path': receipt.file_path,
-                'merchant_name': receipt.merchant_name,
-                'total_amount': receipt.total_amount,
-                'purchase_date': receipt.purchase_date.isoformat() if receipt.purchase_date else None,
-                'created_at': receipt.created_at.isoformat(),
-                'updated_at': receipt.updated_at.isoformat() if receipt.updated_at else None,
-                'raw_text': receipt.raw_text,
-                'items': []
-            }
-            
-            for item in receipt.items:
-                item_data = {
-                    'id': item.id,
-                    'item_name': item.item_name,
-                    'quantity': item.quantity,
-                    'unit_price': item.unit_price,
-                    'total_price': item.total_price,
-                    'category': item.category,
-                    'description': item.description
-                }
-                receipt_data['items'].append(item_data)
-            
-            export_data['receipts'].append(receipt_data)
-        
-        with open(output_file, 'w', encoding='utf-8') as jsonfile:
-            json.dump(export_data, jsonfile, indent=2, ensure_ascii=False)
-        
+        self._write(JsonEncoder(start_date, end_date), output_file)
         print(f"✅ Data exported to JSON: {output_file}")
     
-    def export_to_excel(self, output_file: str, start_date=None, end_date=None):
-        """Export receipts to Excel format"""
-        if not PANDAS_AVAILABLE:
-            print("❌ pandas not available. Cannot export to Excel.")
+    def export_to_parquet(self, output_file: str, start_date=None, end_date=None):
+        """Export receipt items to Parquet with typed, dictionary-encoded columns"""
+        self._write_columnar(output_file, 'parquet', start_date, end_date)
+    
+    def export_to_arrow(self, output_file: str, start_date=None, end_date=None):
+        """Export receipt items to an Arrow IPC (Feather v2) file"""
+        self._write_columnar(output_file, 'arrow', start_date, end_date)
+    
+    def _write_columnar(self, output_file: str, format: str, start_date=None, end_date=None):
+        if not PYARROW_AVAILABLE:
+            print(f"❌ pyarrow not available. Cannot export to {format.capitalize()}.")
             return
         
-        receipts = self._get_receipts(start_date, end_date)
-        
-        # Prepare data for Excel
-        receipts_data = []
-        items_data = []
-        
-        for receipt in receipts:
-            receipt_row = {
-                'Receipt ID': receipt.id,
-                'Filename': receipt.filename,
-                'Merchant Name': receipt.merchant_name or '',
-                'Total Amount': receipt.total_amount or 0,
-                'Purchase Date': receipt.purchase_date.isoformat() if receipt.purchase_date else '',
-                'Created At': receipt.created_at.isoformat(),
-                'Raw Text': receipt.raw_text or ''
-            }
-            receipts_data.append(receipt_row)
-            
-            for item in receipt.items:
-                item_row = {
-                    'Receipt ID': receipt.id,
-                    'Item Name': item.item_name,
-                    'Quantity': item.quantity,
-                    'Unit Price': item.unit_price,
-                    'Total Price': item.total_price,
-                    'Category': item.category or '',
-                    'Description': item.description or ''
-                }
-                items_data.append(item_row)
-        
-        # Create Excel file with multiple sheets
-        with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
-            # Receipts sheet
-            receipts_df = pd.DataFrame(receipts_data)
-            receipts_df.to_excel(writer, sheet_name='Receipts', index=False)
-            
-            # Items sheet
-            items_df = pd.DataFrame(items_data)
-            items_df.to_excel(writer, sheet_name='Items', index=False)
-            
-            # Summary sheet
-            summary_data = self._generate_summary_data(receipts)
-            summary_df = pd.DataFrame(summary_data)
-            summary_df.to_excel(writer, sheet_name='Summary', index=False)
-        
-        print(f"✅ Data exported to Excel: {output_file}")
+        rows = ColumnarExporter(self.db_session).write(output_file, format, start_date, end_date)
+        print(f"✅ {rows} rows exported to {format.capitalize()}: {output_file}")
     
-    def _get_receipts(self, start_date=None, end_date=None):
-        """Get receipts from database with optional date filtering"""
-        query = self.db_session.query(Receipt)
-        
-        if start_date:
-            query = query.filter(Receipt.created_at >= start_date)
-        if end_date:
-            query = query.filter(Receipt.created_at <= end_date)
-        
-        return query.order_by(Receipt.created_at.desc()).all()
+    def _write(self, encoder, output_file: str):
+        """Stream an export to a file batch by batch, as GET /api/export does"""
+        with open(output_file, 'w', newline='', encoding='utf-8') as output:
+            write_export(self.db_session, encoder, output)
     
-    def _generate_summary_data(self, receipts: List[Receipt]) -> List[Dict[str, Any]]:
-        """Generate summary statistics"""
-        total_receipts = len(receipts)
-        total_amount = sum(r.total_amount or 0 for r in receipts)
+    def export_to_excel(self, output_file: str, start_date=None, end_date=None):
+        """Export receipts to Excel format, streaming rows into a write-only workbook"""
+        if not OPENPYXL_AVAILABLE:
+            print("❌ openpyxl not available. Cannot export to Excel.")
+            return
         
-        # Category breakdown
-        categories = {}
-        for receipt in receipts:
-            for item in receipt.items:
-                category = item.category or 'Uncategorized'
-                if category not in categories:
-                    categories[category] = {'count': 0, 'total': 0}
-                categories[category]['count'] += 1
-                categories[category]['total'] += item.total_price
+        # Write-only sheets keep each row in a temporary file, not in memory
+        workbook = Workbook(write_only=True)
+        receipts_sheet = workbook.create_sheet('Receipts')
+        items_sheet = workbook.create_sheet('Items')
+        summary_sheet = workbook.create_sheet('Summary')
+        
+        receipts_sheet.append(['Receipt ID', 'Filename', 'Merchant Name', 'Total Amount', 'Purchase Date', 'Created At', 'Raw Text'])
+        items_sheet.append(['Receipt ID', 'Item Name', 'Quantity', 'Unit Price', 'Total Price', 'Category', 'Description'])
+        
+        for records in iter_export_batches(self.db_session, start_date, end_date):
+            for receipt in records:
+                receipts_sheet.append([
+                    receipt['id'],
+                    receipt['filename'],
+                    receipt['merchant_name'] or '',
+                    receipt['total_amount'] or 0,
+                    receipt['purchase_date'] or '',
+                    receipt['created_at'],
+                    # OCR text can hold control characters (form feeds) that Excel rejects
+                    ILLEGAL_CHARACTERS_RE.sub('', receipt['raw_text'] or '')
+                ])
+                for item in receipt['items']:
+                    items_sheet.append([
+                        receipt['id'],
+                        item['item_name'],
+                        item['quantity'],
+                        item['unit_price'],
+                        item['total_price'],
+                        item['category'] or '',
+                        item['description'] or ''
+                    ])
+        
+        summary_sheet.append(['Metric', 'Value'])
+        for row in self._generate_summary_data(start_date, end_date):
+            summary_sheet.append([row['Metric'], row['Value']])
+        
+        workbook.save(output_file)
+        print(f"✅ Data exported to Excel: {output_file}")
+    
+    def _generate_summary_data(self, start_date=None, end_date=None) -> List[Dict[str, Any]]:
+        """Generate summary statistics from SQL aggregates"""
+        summary = export_summary(self.db_session, start_date, end_date)
+        total_receipts = summary['total_receipts']
+        total_amount = summary['total_amount']
         
         summary_data = [
             {'Metric': 'Total Receipts', 'Value': total_receipts},
@@ -214,14 +128,28 @@ class DataExporter:
             {'Metric': 'Category Breakdown', 'Value': ''},
         ]
         
-        for category, data in sorted(categories.items(), key=lambda x: x[1]['total'], reverse=True):
+        # Already ordered by total, largest first
+        for category in summary['categories']:
             summary_data.append({
-                'Metric': category,
-                'Value': f"${data['total']:.2f} ({data['count']} items)"
+                'Metric': category['category'],
+                'Value': f"${category['total']:.2f} ({category['count']} items)"
             })
         
         return summary_data
     
+    def export_incremental(self, output_file: str, format: str = 'jsonl', watermark_name: str = 'default'):
+        """Export receipts changed since the last run with this watermark, plus deletion tombstones"""
+        if format not in INCREMENTAL_FORMATS:
+            raise ValueError(f"Incremental export supports {', '.join(INCREMENTAL_FORMATS)}, not '{format}'")
+        
+        encoder = JsonLinesEncoder() if format == 'jsonl' else JsonEncoder()
+        with open(output_file, 'w', newline='', encoding='utf-8') as output:
+            stats = run_incremental_export(self.db_session, watermark_name, encoder, output)
+        # The watermark only moves once the file is complete
+        self.db_session.commit()
+        print(f"✅ {stats['receipts']} changed receipts and {stats['deletions']} deletions exported: {output_file}")
+        return stats
+    
     def close(self):
         """Close database session"""
         if self.db_session:
@@ -230,12 +158,17 @@ class DataExporter:
 def main():
     """Main function"""
     parser = argparse.ArgumentParser(description='Export receipt data')
-    parser.add_argument('format', choices=['csv', 'json', 'excel'], help='Export format')
+    parser.add_argument('format', choices=['csv', 'jsonl', 'json', 'parquet', 'arrow', 'excel'], help='Export format')
     parser.add_argument('output', help='Output file path')
     parser.add_argument('--start-date', help='Start date (YYYY-MM-DD)')
     parser.add_argument('--end-date', help='End date (YYYY-MM-DD)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Only export receipts changed since the last incremental run, plus deletions')
+    parser.add_argument('--watermark', default='default', help='Name of the incremental export watermark')
     
     args = parser.parse_args()
+    if args.incremental and (args.format not in INCREMENTAL_FORMATS or args.start_date or args.end_date):
+        parser.error(f"--incremental supports {', '.join(INCREMENTAL_FORMATS)} without date filters")
     
     # Parse dates
     start_date = None
@@ -250,10 +183,18 @@ def main():
     exporter = DataExporter()
     
     try:
-        if args.format == 'csv':
+        if args.incremental:
+            exporter.export_incremental(args.output, args.format, args.watermark)
+        elif args.format == 'csv':
             exporter.export_to_csv(args.output, start_date, end_date)
+        elif args.format == 'jsonl':
+            exporter.export_to_jsonl(args.output, start_date, end_date)
         elif args.format == 'json':
             exporter.export_to_json(args.output, start_date, end_date)
+        elif args.format == 'parquet':
+            exporter.export_to_parquet(args.output, start_date, end_date)
+        elif args.format == 'arrow':
+            exporter.export_to_arrow(args.output, start_date, end_date)
         elif args.format == 'excel':
             exporter.export_to_excel(args.output, start_date, end_date)
     finally: